@@ -0,0 +1,169 @@
+"""
+File-content cache shared by the agents of one crew.
+
+Every file is read from disk once per version (path + mtime + size) and
+identified by a content digest. Small inputs are pre-inlined into task
+descriptions, so agents do not need a tool call to see them. The caching
+read tool remembers which agent has already been shown which file version,
+and answers a repeat read with a short reference to that copy instead of
+pasting the whole file into the context again.
+"""
+
+import hashlib
+import os
+import threading
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from crewai_tools import FileReadTool
+from pydantic import ConfigDict
+
+# Files up to this size are pasted into task descriptions instead of being read with a tool
+INLINE_MAX_BYTES = 16 * 1024
+
+
+class FileEntry:
+    def __init__(self, path: str, version: Tuple[int, int], content: str):
+        self.path = path
+        self.version = version
+        self.content = content
+        self.size = len(content.encode("utf-8"))
+        self.digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+class FileContentCache:
+    def __init__(self, inline_max_bytes: int = INLINE_MAX_BYTES):
+        self.inline_max_bytes = inline_max_bytes
+        self._entries: Dict[str, FileEntry] = {}
+        # (reader, path, digest) of every file version an agent has been shown
+        self._seen: Set[Tuple[str, str, str]] = set()
+        self._lock = threading.Lock()
+        self.stats = {
+            "reads": 0, "disk_reads": 0, "repeat_reads": 0, "bytes_saved": 0,
+            "inlined_files": 0, "inlined_bytes": 0
+        }
+
+    def get(self, path: str, encoding: str = "utf-8") -> FileEntry:
+        """
+        Return the current content of a file, reading it only when its mtime or size changed.
+
+        Raises:
+            OSError, UnicodeDecodeError: If the file cannot be read
+        """
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.version == version:
+                return entry
+        with open(path, "r", encoding=encoding) as file:
+            entry = FileEntry(path, version, file.read())
+        with self._lock:
+            self._entries[path] = entry
+            self.stats["disk_reads"] += 1
+        return entry
+
+    def mark_seen(self, reader: str, entry: FileEntry):
+        with self._lock:
+            self._seen.add((reader, entry.path, entry.digest))
+
+    def read(self, reader: str, path: str, label: Optional[str] = None, encoding: str = "utf-8") -> str:
+        """
+        Read a whole file on behalf of an agent.
+
+        Returns:
+            str: The file content the first time this agent asks for this
+                 version, otherwise a short reference to the copy it already has
+        """
+        entry = self.get(path, encoding)
+        with self._lock:
+            self.stats["reads"] += 1
+            if (reader, entry.path, entry.digest) in self._seen:
+                self.stats["repeat_reads"] += 1
+                self.stats["bytes_saved"] += entry.size
+                return reference(entry, label or path)
+            self._seen.add((reader, entry.path, entry.digest))
+        return entry.content
+
+    def inline(self, reader: str, paths: Iterable[str]) -> str:
+        """
+        Build a block of file contents to paste into a task description.
+
+        Files larger than inline_max_bytes, and files that cannot be read, are
+        left for the agent to read with the tool. Inlined files count as seen
+        by the reader, so reading them again returns a reference.
+
+        Args:
+            reader: The agent role the task belongs to
+            paths: Files to inline, shown to the agent under these names
+
+        Returns:
+            str: The block, or an empty string if nothing was inlined
+        """
+        blocks = []
+        for path in paths:
+            try:
+                entry = self.get(path)
+            except (OSError, UnicodeDecodeError):
+                continue
+            if entry.size > self.inline_max_bytes:
+                continue
+            self.mark_seen(reader, entry)
+            with self._lock:
+                self.stats["inlined_files"] += 1
+                self.stats["inlined_bytes"] += entry.size
+            blocks.append(f"[file {path} sha256:{entry.digest} {entry.size} bytes]\n"
+                          f"{entry.content.strip()}\n[end of file {path}]")
+        if not blocks:
+            return ""
+        return ("The following files are already included below; do not read them with a tool.\n\n"
+                + "\n\n".join(blocks))
+
+
+def reference(entry: FileEntry, label: str) -> str:
+    """Compact stand-in for a file the agent has already been shown."""
+    return (f"[unchanged: {label} sha256:{entry.digest} {entry.size} bytes. "
+            f"You already have its full content from your task description or an earlier read; use that copy.]")
+
+
+class CachedFileReadTool(FileReadTool):
+    """
+    FileReadTool backed by a FileContentCache shared across the crew.
+
+    Each agent gets its own instance (the reader name) over the same cache, so
+    one agent's reads are never answered with a reference to content only
+    another agent has seen.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    cache: FileContentCache
+    reader: str
+
+    def _run(self, file_path: Optional[str] = None, start_line: Optional[int] = 1,
+             line_count: Optional[int] = None) -> str:
+        if file_path is None:
+            resolved = self._declared_realpath
+        else:
+            try:
+                resolved = self._resolve_path(file_path)
+            except ValueError:
+                resolved = None
+        if resolved is None:
+            # Let FileReadTool produce its usual error message
+            return super()._run(file_path, start_line, line_count)
+
+        try:
+            if (start_line or 1) == 1 and not line_count:
+                return self.cache.read(self.reader, resolved, file_path, self.encoding)
+            entry = self.cache.get(resolved, self.encoding)
+        except (OSError, UnicodeDecodeError):
+            return super()._run(file_path, start_line, line_count)
+
+        # Line windows are served from the cached copy
+        start = max((start_line or 1) - 1, 0)
+        lines = entry.content.splitlines(keepends=True)
+        selected = lines[start:start + line_count if line_count else None]
+        if not selected and start > 0:
+            return f"Error: Start line {start_line} exceeds the number of lines in the file."
+        return "".join(selected)
@@ -0,0 +1,122 @@
+"""
+Incremental (delta) processing for the JSON processing crew.
+
+A run in incremental mode stores a state file with a content hash of every
+product's source1 and source2 record, the catalog order and the
+verification issues of each product. The next run compares the new hashes
+with the stored ones. Only products that were added, changed or removed in
+either source are rebuilt and re-verified; the other entries and their
+issues are carried over from the existing output.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+from merge_engine import id_field, source1_records, source2_records
+
+STATE_VERSION = 1
+
+
+def content_hash(value) -> str:
+    """Stable hash of a JSON value, independent of key order."""
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def file_digest(path: str) -> Optional[str]:
+    """SHA-256 of a file's bytes, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def record_hashes(source1: dict, source2: dict) -> Dict[str, Dict[str, str]]:
+    """Hash every source record, keyed by source and product ID."""
+    hashes = {}
+    for name, records in (("source1", source1_records(source1)), ("source2", source2_records(source2))):
+        key = id_field(records[0]) if records else None
+        hashes[name] = {record[key]: content_hash(record) for record in records}
+    return hashes
+
+
+def catalog_order(hashes: Dict[str, Dict[str, str]]) -> List[str]:
+    """Product IDs in merge_catalog order: source1 order, then source2-only products."""
+    order = list(hashes["source1"])
+    order.extend(pid for pid in hashes["source2"] if pid not in hashes["source1"])
+    return order
+
+
+class Delta:
+    def __init__(self, added: List[str], changed: List[str], removed: List[str]):
+        self.added = added
+        self.changed = changed
+        self.removed = removed
+
+    @property
+    def dirty(self) -> List[str]:
+        """Products whose catalog entries must be rebuilt."""
+        return self.added + self.changed
+
+    def to_dict(self) -> Dict:
+        return {"added": self.added, "changed": self.changed, "removed": self.removed}
+
+
+def diff_hashes(previous: Dict[str, Dict[str, str]], current: Dict[str, Dict[str, str]]) -> Delta:
+    """
+    Compare two record_hashes() results.
+
+    A product is added or removed when it appears in, or disappears from,
+    both sources combined, and changed when its record in either source
+    was added, edited or removed.
+    """
+    before = set(previous["source1"]) | set(previous["source2"])
+    after_order = catalog_order(current)
+    added, changed = [], []
+    for product_id in after_order:
+        if product_id not in before:
+            added.append(product_id)
+        elif any(previous[name].get(product_id) != current[name].get(product_id) for name in ("source1", "source2")):
+            changed.append(product_id)
+    after = set(after_order)
+    removed = [product_id for product_id in catalog_order(previous) if product_id not in after]
+    return Delta(added, changed, removed)
+
+
+def results_from_issues(order: List[str], issues: Dict[str, Dict[str, List[Dict]]]) -> Dict:
+    """Rebuild a verification result, in catalog order, from per-product issues."""
+    schema_problems, integrity_problems = [], []
+    for product_id in order:
+        product_issues = issues.get(product_id)
+        if product_issues:
+            schema_problems.extend(product_issues["schema"])
+            integrity_problems.extend(product_issues["integrity"])
+    return {
+        "schema_compliance": {"is_compliant": not schema_problems, "issues": schema_problems},
+        "data_integrity": {"is_valid": not integrity_problems, "issues": integrity_problems},
+    }
+
+
+def load_state(path: str) -> Optional[Dict]:
+    """Load the previous run's state, or None if it is missing or from another version."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            state = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return state if state.get("version") == STATE_VERSION else None
+
+
+def save_state(path: str, state: Dict) -> None:
+    # Write then rename, so an interrupted run leaves the previous state intact
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump({"version": STATE_VERSION, **state}, file, separators=(",", ":"))
+    os.replace(temporary, path)
@@ -1,9 +1,29 @@
+import argparse
+import asyncio
+import copy
+import hashlib
 import json
-from crewai import Agent, Task, Crew, LLM
-from crewai_tools import FileReadTool, FileWriterTool
+import sys
+import time
 from typing import Dict, List
 import os
 from dotenv import load_dotenv
+from merge_engine import (
+    load_json, derive_field_mapping, merge_catalog, schema_fingerprint, mapping_fingerprint,
+    source_field_paths, source_layouts,
+    index_by_id, source1_records, source2_records, build_entry
+)
+from verification import ReportWriter, compile_item_validator, verify_catalog, schema_issues, mismatch_issues
+from streaming import iter_records, stream_merge, write_catalog_stream
+from incremental import (
+    Delta, content_hash, file_digest, record_hashes, catalog_order, diff_hashes,
+    results_from_issues, load_state, save_state
+)
+from sharding import SHARD_SIZE, MAX_SHARD_BYTES, catalog_ids, plan_shards, split_sources, merge_shard_outputs, write_shard
+
+# Share the dependency-free telemetry module with the prompt-engineering examples
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "prompt-engineering"))
+from telemetry import get_telemetry, telemetry_snapshot
 
 # Load environment variables from .env file
 load_dotenv()
@@ -15,6 +35,16 @@ class JSONProcessor:
         self.schema_path = "data/target_schema.json"
         self.output_path = "data/processed_output.json"
         self.verification_report_path = "data/verification_report.json"
+        self.field_mapping_path = "data/field_mapping.json"
+        self.state_path = "data/processed_state.json"
+        self.shard_dir = "data/shards"
+        # Agents log their steps; for_shard() turns this off so concurrent shard crews do not interleave
+        self.verbose = True
+        # Shared by every agent's read tool; created with the agents
+        self.file_cache = None
+
+        # CrewAI is imported on first use so the CLI and --help start quickly
+        from crewai import LLM
 
         # Initialize the LLM using CrewAI's LLM class
         self.llm = LLM(
@@ -23,9 +53,154 @@ class JSONProcessor:
             api_key=os.getenv("OPENAI_API_KEY")
         )
         
-    def create_tools(self):
-        # Create a single file read tool that can be used for all files
-        file_read_tool = FileReadTool()
+    def load_field_mapping(self, target_schema: Dict, layouts: Dict[str, List[str]]) -> Dict:
+        # Reuse the mapping derived on a previous run while the schema and the source
+        # layouts are unchanged, so the LLM is consulted at most once per combination
+        fingerprint = mapping_fingerprint(target_schema, layouts)
+        if os.path.exists(self.field_mapping_path):
+            cached = load_json(self.field_mapping_path)
+            if cached.get("fingerprint") == fingerprint:
+                return cached["mapping"]
+
+        mapping, unresolved = derive_field_mapping(target_schema, layouts, llm=self.llm)
+        if unresolved:
+            print(f"Warning: no source field found for {', '.join(unresolved)}")
+        with open(self.field_mapping_path, "w", encoding="utf-8") as file:
+            json.dump({"fingerprint": fingerprint, "mapping": mapping}, file, indent=2)
+        return mapping
+
+    def load_sources(self):
+        return load_json(self.source1_path), load_json(self.source2_path), load_json(self.schema_path)
+
+    def merge_sources(self, source1: Dict, source2: Dict, target_schema: Dict):
+        # Join both sources on product ID in code and write the processed output
+        mapping = self.load_field_mapping(target_schema, source_layouts(source1, source2))
+        catalog = merge_catalog(source1, source2, mapping)
+
+        with open(self.output_path, "w", encoding="utf-8") as file:
+            json.dump({"product_catalog": catalog}, file, separators=(",", ":"))
+        return catalog, mapping
+
+    def verify_output(self, catalog: List[Dict], mapping: Dict, source1: Dict, source2: Dict, target_schema: Dict) -> Dict:
+        # Validate against the compiled schema and cross-check every field against the sources
+        # Issues are streamed into the report as they are found
+        validator = compile_item_validator(target_schema)
+        with ReportWriter(self.verification_report_path) as report:
+            results = verify_catalog(
+                catalog, validator, mapping,
+                index_by_id(source1_records(source1)), index_by_id(source2_records(source2)),
+                report=report
+            )
+            report.summary["products_processed"] = len(catalog)
+        return results
+
+    def merge_and_verify_streaming(self, target_schema: Dict, index_on_disk: bool = False) -> Dict:
+        # Parse both sources incrementally, index the smaller one and stream the catalog out,
+        # verifying each entry as it is written so nothing is held in memory
+        mapping = self.load_field_mapping(target_schema, {
+            "source1": source_field_paths(iter_records(self.source1_path, "source1")),
+            "source2": source_field_paths(iter_records(self.source2_path, "source2"))
+        })
+        validator = compile_item_validator(target_schema)
+        schema_problems, integrity_problems = [], []
+        report = ReportWriter(self.verification_report_path)
+
+        def verified_entries():
+            merged = stream_merge(
+                {"source1": self.source1_path, "source2": self.source2_path},
+                mapping,
+                index_path=self.output_path + ".index.sqlite" if index_on_disk else None
+            )
+            for entry, sources in merged:
+                found = schema_issues(validator, entry), mismatch_issues(entry, mapping, sources)
+                schema_problems.extend(found[0])
+                integrity_problems.extend(found[1])
+                report.add("schema", found[0])
+                report.add("mismatch", found[1])
+                yield entry
+
+        with report:
+            report.summary["products_processed"] = write_catalog_stream(verified_entries(), self.output_path)
+        return {
+            "schema_compliance": {"is_compliant": not schema_problems, "issues": schema_problems},
+            "data_integrity": {"is_valid": not integrity_problems, "issues": integrity_problems}
+        }
+
+    def merge_and_verify_incremental(self):
+        # Rebuild and re-verify only the products whose source records changed since the
+        # previous incremental run; everything else is carried over from the existing output
+        state = load_state(self.state_path)
+        files = {
+            "source1": file_digest(self.source1_path),
+            "source2": file_digest(self.source2_path),
+            "schema": file_digest(self.schema_path)
+        }
+        # Edits to the output outside this mode invalidate the carried-over entries
+        output_intact = state is not None and file_digest(self.output_path) == state["output_digest"]
+        if output_intact and state["files"] == files:
+            results = results_from_issues(state["order"], state["issues"])
+            return results, results_from_issues([], {}), Delta([], [], [])
+
+        source1, source2, target_schema = self.load_sources()
+        mapping = self.load_field_mapping(target_schema, source_layouts(source1, source2))
+        hashes = record_hashes(source1, source2)
+        order = catalog_order(hashes)
+        fingerprint = content_hash([schema_fingerprint(target_schema), mapping])
+
+        if output_intact and state["fingerprint"] == fingerprint:
+            delta = diff_hashes(state["hashes"], hashes)
+            previous = dict(zip(state["order"], load_json(self.output_path)["product_catalog"]))
+            unchanged = set(order).difference(delta.dirty)
+            issues = {pid: found for pid, found in state["issues"].items() if pid in unchanged}
+        else:
+            # First run, or the schema or mapping changed: every product is new
+            delta = Delta(order, [], [])
+            previous, issues = {}, {}
+
+        validator = compile_item_validator(target_schema)
+        source1_index = index_by_id(source1_records(source1))
+        source2_index = index_by_id(source2_records(source2))
+        rebuilt = {}
+        for product_id in delta.dirty:
+            sources = {"source1": source1_index.get(product_id), "source2": source2_index.get(product_id)}
+            entry = build_entry(mapping, product_id, sources)
+            rebuilt[product_id] = entry
+            found = {"schema": schema_issues(validator, entry), "integrity": mismatch_issues(entry, mapping, sources)}
+            if found["schema"] or found["integrity"]:
+                issues[product_id] = found
+
+        catalog = [rebuilt[pid] if pid in rebuilt else previous[pid] for pid in order]
+        encoded = json.dumps({"product_catalog": catalog}, separators=(",", ":"))
+        with open(self.output_path, "w", encoding="utf-8") as file:
+            file.write(encoded)
+
+        results = results_from_issues(order, issues)
+        with ReportWriter(self.verification_report_path) as report:
+            report.add_results(results)
+            report.summary.update({
+                "products_processed": len(order),
+                "products_reprocessed": len(delta.dirty),
+                "delta": {name: len(ids) for name, ids in delta.to_dict().items()}
+            })
+        save_state(self.state_path, {
+            "files": files,
+            "fingerprint": fingerprint,
+            "output_digest": hashlib.sha256(encoded.encode("utf-8")).hexdigest(),
+            "hashes": hashes,
+            "order": order,
+            "issues": issues
+        })
+        return results, results_from_issues(delta.dirty, issues), delta
+
+    def create_tools(self, reader: str):
+        from crewai_tools import FileWriterTool
+        from file_cache import FileContentCache, CachedFileReadTool
+
+        # One file cache for the whole crew: each file is read from disk once per version,
+        # and an agent that reads a file it has already seen gets a short reference back
+        if self.file_cache is None:
+            self.file_cache = FileContentCache()
+        file_read_tool = CachedFileReadTool(cache=self.file_cache, reader=reader)
         
         # Create a single file write tool for the output file
         file_write_tool = FileWriterTool()
@@ -36,9 +211,8 @@ class JSONProcessor:
         ]
 
     def create_agents(self):
-        # Get the tools
-        tools = self.create_tools()
-        
+        from crewai import Agent
+
         # Data Processor Agent
         processor_agent = Agent(
             role='Data Processor',
@@ -46,9 +220,9 @@ class JSONProcessor:
             backstory="""You are an expert data processor specialized in combining and transforming 
             JSON data while maintaining data integrity and following specific schemas. You are efficient
             and avoid redundant operations.""",
-            tools=tools,
+            tools=self.create_tools('Data Processor'),
             llm=self.llm,
-            verbose=True
+            verbose=self.verbose
         )
 
         # Verification Agent
@@ -58,14 +232,22 @@ class JSONProcessor:
             backstory="""You are a meticulous data verifier who ensures all processed data 
             matches the source data and follows the specified schema. You are efficient and
             avoid redundant operations.""",
-            tools=tools,
+            tools=self.create_tools('Data Verifier'),
             llm=self.llm,
-            verbose=True
+            verbose=self.verbose
         )
 
         return processor_agent, verification_agent
 
     def create_tasks(self, processor_agent, verification_agent):
+        from crewai import Task
+
+        # Small inputs are pasted into the descriptions, saving a tool call and a
+        # second copy of each file in the context; larger ones are read with the tool
+        inputs = [self.source1_path, self.source2_path, self.schema_path]
+        processor_files = self.file_cache.inline(processor_agent.role, inputs)
+        verifier_files = self.file_cache.inline(verification_agent.role, inputs)
+
         # Task 1: Process JSON Data
         process_task = Task(
             description=f"""Read and process data from {self.source1_path} and {self.source2_path}.
@@ -82,6 +264,8 @@ class JSONProcessor:
             Action Input: {{"file_path": "path/to/file"}} for read tools or {{"filename": "filename", "content": "content"}} for write tools
             
             After reading all files, process the data and write the output file in a single step.
+
+            {processor_files}
             """,
             agent=processor_agent,
             expected_output="A JSON file containing the combined data from both source files, following the target schema."
@@ -91,14 +275,19 @@ class JSONProcessor:
         verify_task = Task(
             description=f"""Verify the {self.output_path} file:
             1. Read the processed output file at {self.output_path}
-            2. Read the first source file at {self.source1_path}
-            3. Read the second source file at {self.source2_path}
-            4. Read the target schema at {self.schema_path}
+            2. Use the first source file at {self.source1_path}
+            3. Use the second source file at {self.source2_path}
+            4. Use the target schema at {self.schema_path}
             5. Verify the data integrity and schema compliance
-            6. Write the verification report in json format to {self.verification_report_path}
+            6. Write the verification report in json format to {self.verification_report_path}.
+               The report lists only problems: one entry per schema violation
+               ({{"type": "schema", "product_id", "path", "message"}}) and per field that differs from
+               its source ({{"type": "mismatch", "product_id", "path", "expected", "actual"}}), followed
+               by summary counts. Do not copy the processed or source data into the report.
             
             IMPORTANT: Complete this task in a single pass. Do not repeat steps or make redundant calls.
-            Read each file only once and perform all verification at once.
+            Files whose content is included below must not be read again; read each other file only once
+            and perform all verification at once.
             
             When using tools, follow this format:
             Thought: Think about what to do next
@@ -106,6 +295,8 @@ class JSONProcessor:
             Action Input: {{"file_path": "path/to/file"}} for read tools or {{"filename": "filename", "content": "content"}} for write tools
             
             After reading all files, perform the verification and return the report in a single step.
+
+            {verifier_files}
             """,
             agent=verification_agent,
             expected_output="A detailed verification report confirming that the processed data is valid, complete, and follows the target schema."
@@ -113,25 +304,226 @@ class JSONProcessor:
 
         return [process_task, verify_task]
 
-    def run(self):
-        # Create agents
-        processor_agent, verification_agent = self.create_agents()
-        
-        # Create tasks
-        tasks = self.create_tasks(processor_agent, verification_agent)
+    def create_explanation_task(self, verification_agent, results: Dict):
+        from crewai import Task
+
+        # The violations are already known; the agent only has to explain them
+        issues = {
+            "schema_issues": results["schema_compliance"]["issues"],
+            "integrity_issues": results["data_integrity"]["issues"]
+        }
+        return Task(
+            description=f"""Automated verification of {self.output_path} against {self.schema_path},
+            {self.source1_path} and {self.source2_path} found the following violations:
+
+            {json.dumps(issues, indent=2)}
+
+            For each violation, explain the most likely cause and how to fix it.
+            Everything you need is above; do not read any files.
+            """,
+            agent=verification_agent,
+            expected_output="A short explanation of each violation and how to fix it."
+        )
+
+    def run(self, native_merge=True, streaming=False, index_on_disk=False, incremental=False,
+            shard_size=None, max_shard_bytes=MAX_SHARD_BYTES, concurrency=4):
+        if not native_merge and shard_size:
+            return self.run_sharded(shard_size, max_shard_bytes, concurrency)
+
+        if native_merge:
+            # Merge and verify in code; the LLM is only needed to explain violations
+            if incremental:
+                _, results, delta = self.merge_and_verify_incremental()
+                # Issues of unchanged products were already reported by an earlier run
+                if results["schema_compliance"]["is_compliant"] and results["data_integrity"]["is_valid"]:
+                    return (f"Incremental run: {len(delta.added)} added, {len(delta.changed)} changed, "
+                            f"{len(delta.removed)} removed; no new issues in {self.output_path}.")
+            else:
+                if streaming:
+                    results = self.merge_and_verify_streaming(load_json(self.schema_path), index_on_disk)
+                else:
+                    source1, source2, target_schema = self.load_sources()
+                    catalog, mapping = self.merge_sources(source1, source2, target_schema)
+                    results = self.verify_output(catalog, mapping, source1, source2, target_schema)
+                if results["schema_compliance"]["is_compliant"] and results["data_integrity"]["is_valid"]:
+                    return f"Verification passed: {self.output_path} has no schema or integrity issues."
+            # Agents (and their tools) are only built when the LLM is actually needed
+            processor_agent, verification_agent = self.create_agents()
+            agents, tasks = [verification_agent], [self.create_explanation_task(verification_agent, results)]
+        else:
+            processor_agent, verification_agent = self.create_agents()
+            agents, tasks = [processor_agent, verification_agent], self.create_tasks(processor_agent, verification_agent)
         
-        # Create and run the crew
+        crew, timing = self.create_crew(agents, tasks)
+        with get_telemetry().span("crew", self.llm.model, "kickoff", tasks=len(tasks)) as span:
+            timing["last_finished"] = span.started
+            result = crew.kickoff()
+            self.record_crew_usage(crew, span)
+        return result
+
+    def create_crew(self, agents, tasks):
+        from crewai import Crew
+
+        # Record every task, and the crew's token usage, as telemetry spans
+        telemetry = get_telemetry()
+        timing = {"last_finished": time.perf_counter()}
+
+        def record_task(output):
+            # Tasks run sequentially, so each one started when the previous one finished
+            span = telemetry.start_span("crew_task", self.llm.model, output.name or output.description.strip()[:60],
+                                        started=timing["last_finished"], agent=output.agent)
+            telemetry.finish(span)
+            timing["last_finished"] = span.started + span.latency
+
+        for task in tasks:
+            task.callback = record_task
+
         crew = Crew(
-            agents=[processor_agent, verification_agent],
+            agents=agents,
             tasks=tasks,
-            verbose=True
+            verbose=self.verbose
         )
-        
-        result = crew.kickoff()
+        return crew, timing
+
+    def record_crew_usage(self, crew, span):
+        usage = crew.usage_metrics
+        if usage is not None:
+            span.set_usage({
+                "prompt_tokens": usage.prompt_tokens,
+                "completion_tokens": usage.completion_tokens,
+                "cached_tokens": usage.cached_prompt_tokens
+            })
+            span.attributes["requests"] = usage.successful_requests
+        if self.file_cache is not None:
+            span.attributes["file_cache"] = dict(self.file_cache.stats)
+
+    def for_shard(self, directory: str):
+        # Same LLM and settings, with every data path inside the shard's directory
+        processor = copy.copy(self)
+        processor.source1_path = os.path.join(directory, "source1.json")
+        processor.source2_path = os.path.join(directory, "source2.json")
+        processor.schema_path = os.path.join(directory, "target_schema.json")
+        processor.output_path = os.path.join(directory, "processed_output.json")
+        processor.verification_report_path = os.path.join(directory, "verification_report.json")
+        processor.file_cache = None
+        processor.verbose = False
+        return processor
+
+    async def run_shard(self, number: int, products: int):
+        # Each shard gets its own agents, tools and file cache
+        processor_agent, verification_agent = self.create_agents()
+        tasks = self.create_tasks(processor_agent, verification_agent)
+        crew, timing = self.create_crew([processor_agent, verification_agent], tasks)
+        with get_telemetry().span("crew", self.llm.model, f"shard {number}", tasks=len(tasks),
+                                  shard=number, products=products) as span:
+            timing["last_finished"] = span.started
+            result = await crew.kickoff_async()
+            self.record_crew_usage(crew, span)
         return result
 
-if __name__ == "__main__":
+    async def run_shards(self, processors: List, shards: List[List[str]], concurrency: int):
+        # At most `concurrency` crews are in flight; a failed shard does not stop the others
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def guarded(number, processor, shard):
+            async with semaphore:
+                try:
+                    return await processor.run_shard(number, len(shard))
+                except Exception as e:
+                    return e
+
+        return await asyncio.gather(*(
+            guarded(number, processor, shard) for number, (processor, shard) in enumerate(zip(processors, shards))
+        ))
+
+    def run_sharded(self, shard_size: int = SHARD_SIZE, max_shard_bytes: int = MAX_SHARD_BYTES, concurrency: int = 4):
+        # Split the products into bounded shards, run an agent merge crew per shard
+        # concurrently, then merge the outputs and verify the combined catalog in code
+        source1, source2, target_schema = self.load_sources()
+        source1_index = index_by_id(source1_records(source1))
+        source2_index = index_by_id(source2_records(source2))
+        shards = plan_shards(source1_index, source2_index, shard_size, max_shard_bytes)
+
+        processors = []
+        for number, (shard_source1, shard_source2) in enumerate(split_sources(source1, source2, shards)):
+            directory = os.path.join(self.shard_dir, f"shard-{number:04d}")
+            write_shard(directory, shard_source1, shard_source2, target_schema)
+            processors.append(self.for_shard(directory))
+
+        outcomes = asyncio.run(self.run_shards(processors, shards, concurrency))
+
+        # Only failed shards are reported; the agents' own reports stay in the shard directories
+        outputs, failed_shards = [], []
+        for number, (processor, shard, outcome) in enumerate(zip(processors, shards, outcomes)):
+            output, error = None, None
+            if isinstance(outcome, Exception):
+                error = f"{type(outcome).__name__}: {outcome}"
+            else:
+                try:
+                    output = load_json(processor.output_path)["product_catalog"]
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    error = f"Unreadable output {processor.output_path}: {e}"
+            outputs.append(output)
+            if error is not None:
+                failed_shards.append({"shard": number, "first_product": shard[0], "last_product": shard[-1],
+                                      "error": error})
+
+        catalog, missing = merge_shard_outputs(catalog_ids(source1_index, source2_index), shards, outputs)
+        with open(self.output_path, "w", encoding="utf-8") as file:
+            json.dump({"product_catalog": catalog}, file, separators=(",", ":"))
+
+        # The merged catalog is checked in code; products no shard produced are reported as missing
+        mapping = self.load_field_mapping(target_schema, source_layouts(source1, source2))
+        with ReportWriter(self.verification_report_path) as report:
+            results = verify_catalog(catalog, compile_item_validator(target_schema), mapping,
+                                     source1_index, source2_index, report=report)
+            report.summary.update({
+                "products_processed": len(catalog),
+                "shards": len(shards),
+                "failed_shards": failed_shards
+            })
+
+        passed = results["schema_compliance"]["is_compliant"] and results["data_integrity"]["is_valid"]
+        return (f"Sharded run: {len(shards)} shards ({len(failed_shards)} failed), {len(catalog)} products merged, "
+                f"{len(missing)} missing; verification {'passed' if passed else 'found issues'}, "
+                f"see {self.verification_report_path}.")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process and verify JSON data with CrewAI")
+    parser.add_argument("--agent-merge", action="store_true",
+                        help="Let the processor agent merge the sources instead of the native merge engine")
+    parser.add_argument("--stream", action="store_true",
+                        help="Parse the sources incrementally for files too large to load into memory")
+    parser.add_argument("--index-on-disk", action="store_true",
+                        help="With --stream, keep the product index in SQLite instead of memory")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Reprocess only products added, changed or removed since the previous incremental run")
+    parser.add_argument("--shard-size", type=int, metavar="N",
+                        help=f"With --agent-merge, run one crew per shard of at most N products (e.g. {SHARD_SIZE})")
+    parser.add_argument("--max-shard-bytes", type=int, default=MAX_SHARD_BYTES,
+                        help="Upper bound on the source records of one shard, which bounds each prompt")
+    parser.add_argument("--concurrency", type=int, default=4, help="Shard crews running at the same time")
+    args = parser.parse_args(argv)
+    if args.shard_size and not args.agent_merge:
+        parser.error("--shard-size requires --agent-merge; the native merge engine does not use shards")
+    if args.agent_merge and (args.stream or args.incremental):
+        parser.error("--stream and --incremental use the native merge engine and cannot be combined with --agent-merge")
+    if args.stream and args.incremental:
+        parser.error("--stream and --incremental cannot be combined; an incremental run loads both sources")
+    if args.index_on_disk and not args.stream:
+        parser.error("--index-on-disk requires --stream")
+
     processor = JSONProcessor()
-    result = processor.run()
+    result = processor.run(native_merge=not args.agent_merge, streaming=args.stream,
+                           index_on_disk=args.index_on_disk, incremental=args.incremental,
+                           shard_size=args.shard_size, max_shard_bytes=args.max_shard_bytes,
+                           concurrency=args.concurrency)
     print("\nFinal Result:")
-    print(result) 
\ No newline at end of file
+    print(result)
+
+    stats = telemetry_snapshot()
+    print(f"\nTelemetry: {stats['calls']} spans, {stats['prompt_tokens']} prompt / "
+          f"{stats['completion_tokens']} completion tokens, ~${stats['cost_usd']:.4f}, {stats['errors']} errors")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Native merge engine for the JSON processing crew.
+
+Joins the product source and the inventory source on product ID in code,
+using a field mapping that is derived once from the target schema. The LLM
+is only asked about target fields whose source cannot be resolved by name.
+"""
+
+import hashlib
+import itertools
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Field names recognised as the product ID in a source record, in priority order
+ID_FIELDS = ("product_id", "id")
+
+# A mapping entry lists, in priority order, the sources ("source1" or "source2")
+# and dotted paths inside their records that can feed a target path; the first
+# one with a value is used. The product ID itself comes from the join key and is
+# mapped to the pseudo-source "key".
+FieldMapping = Dict[str, List[Tuple[str, str]]]
+
+# Name of the object that holds each source's records. A target field nested
+# under an object of the same name is taken from that source first.
+SOURCE_CONTAINERS = {"source1": "products", "source2": "inventory"}
+
+# Other names the same data goes by, used when no source field has the target's name
+FIELD_SYNONYMS = {
+    "name": ("product_name", "title"),
+    "price": ("unit_price", "cost"),
+    "category": ("product_type", "type"),
+    "stock": ("available_units", "quantity", "qty"),
+    "manufacturer": ("brand", "vendor", "maker"),
+    "condition": ("state",),
+    "added_date": ("date_added", "created"),
+}
+
+# Records sampled per source when collecting the source field paths
+SAMPLE_RECORDS = 1000
+
+
+def load_json(path: str):
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def catalog_item_schema(target_schema: dict) -> dict:
+    """Return the JSON schema of a single product_catalog entry."""
+    schema = target_schema.get("schema", target_schema)
+    return schema["properties"]["product_catalog"]["items"]
+
+
+def schema_leaf_paths(item_schema: dict, prefix: str = "") -> List[str]:
+    """List the dotted paths of every scalar field in an object schema, in schema order."""
+    paths = []
+    for name, field_schema in item_schema.get("properties", {}).items():
+        path = f"{prefix}{name}"
+        if field_schema.get("type") == "object":
+            paths.extend(schema_leaf_paths(field_schema, f"{path}."))
+        else:
+            paths.append(path)
+    return paths
+
+
+def record_leaf_paths(record: dict, prefix: str = "") -> List[str]:
+    """List the dotted paths of every scalar value in a source record."""
+    paths = []
+    for name, value in record.items():
+        path = f"{prefix}{name}"
+        if isinstance(value, dict):
+            paths.extend(record_leaf_paths(value, f"{path}."))
+        else:
+            paths.append(path)
+    return paths
+
+
+def get_path(record: dict, path: str):
+    value = record
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def set_path(record: dict, path: str, value) -> None:
+    parts = path.split(".")
+    for part in parts[:-1]:
+        record = record.setdefault(part, {})
+    record[parts[-1]] = value
+
+
+def id_field(record: dict) -> str:
+    """Find the field holding the product ID in a source record."""
+    for name in ID_FIELDS:
+        if name in record:
+            return name
+    raise ValueError(f"No product ID field ({', '.join(ID_FIELDS)}) in record: {record}")
+
+
+def source1_records(source1: dict) -> List[dict]:
+    return source1["products"]
+
+
+def source2_records(source2: dict) -> List[dict]:
+    return source2["inventory"]["items"]
+
+
+def source_field_paths(records: Iterable[dict], limit: int = SAMPLE_RECORDS) -> List[str]:
+    """List the union of leaf paths over the first `limit` records, in first-seen order."""
+    paths: Dict[str, None] = {}
+    for record in itertools.islice(records, limit):
+        paths.update(dict.fromkeys(record_leaf_paths(record)))
+    return list(paths)
+
+
+def source_layouts(source1: dict, source2: dict) -> Dict[str, List[str]]:
+    """Sampled leaf paths of both sources' records, keyed by source name."""
+    return {"source1": source_field_paths(source1_records(source1)),
+            "source2": source_field_paths(source2_records(source2))}
+
+
+def match_in_source(target: str, paths: List[str]) -> Optional[str]:
+    """
+    Find the path in one source that holds a target field.
+
+    An exact path beats a path with the same last segment, which beats a
+    synonym of the last segment (see FIELD_SYNONYMS).
+    """
+    leaf = target.split(".")[-1]
+    if target in paths:
+        return target
+    for names in ((leaf,), FIELD_SYNONYMS.get(leaf, ())):
+        for name in names:
+            for path in paths:
+                if path.split(".")[-1] == name:
+                    return path
+    return None
+
+
+def resolve_by_name(target_paths: List[str], source_paths: Dict[str, List[str]]) -> Tuple[FieldMapping, List[str]]:
+    """
+    Map each target path to the field holding it in every source that has one.
+
+    Each source is searched separately, so a field found in both sources gets
+    both as candidates and a product present in only one source still gets a
+    value. A target nested under an object named after a source's container
+    (e.g. inventory.stock) lists that source first; otherwise sources keep the
+    order given. The target product ID is filled from the join key.
+
+    Returns:
+        The resolved mapping and the target paths left unresolved
+    """
+    mapping: FieldMapping = {}
+    unresolved = []
+    for target in target_paths:
+        leaf = target.split(".")[-1]
+        if leaf in ID_FIELDS:
+            mapping[target] = [("key", leaf)]
+            continue
+        parent = target.split(".")[0] if "." in target else None
+        sources = sorted(source_paths, key=lambda source: SOURCE_CONTAINERS.get(source) != parent)
+        candidates = []
+        for source in sources:
+            path = match_in_source(target, source_paths[source])
+            if path is not None:
+                candidates.append((source, path))
+        if candidates:
+            mapping[target] = candidates
+        else:
+            unresolved.append(target)
+    return mapping, unresolved
+
+
+def propose_mappings(llm, unresolved: List[str], source_paths: Dict[str, List[str]]) -> FieldMapping:
+    """
+    Ask the LLM to map target fields that could not be resolved by name.
+
+    Args:
+        llm: A CrewAI LLM exposing call(messages)
+        unresolved: Target paths without a mapping
+        source_paths: Available dotted paths per source
+
+    Returns:
+        Mappings for the fields the LLM could place; the rest are omitted
+    """
+    prompt = f"""Map each target field to the source field that holds the same data.
+    Target fields: {json.dumps(unresolved)}
+    Source fields: {json.dumps(source_paths)}
+
+    Respond with only a JSON object of the form
+    {{"target.field": ["source1" or "source2", "source.field.path"]}}.
+    Leave out target fields that have no matching source field."""
+    reply = llm.call([{"role": "user", "content": prompt}]) or ""
+    start, end = reply.find("{"), reply.rfind("}")
+    if start == -1 or end == -1:
+        return {}
+    # A reply that is not a JSON object leaves every field unresolved rather than stopping the merge
+    try:
+        proposed = json.loads(reply[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(proposed, dict):
+        return {}
+    mapping: FieldMapping = {}
+    for target, entry in proposed.items():
+        if target not in unresolved or not isinstance(entry, list) or len(entry) != 2:
+            continue
+        source, path = entry
+        if isinstance(source, str) and path in source_paths.get(source, []):
+            mapping[target] = [(source, path)]
+    return mapping
+
+
+def derive_field_mapping(target_schema: dict, source_paths: Dict[str, List[str]], llm=None) -> Tuple[FieldMapping, List[str]]:
+    """
+    Derive how every target field is filled from the two sources.
+
+    Args:
+        target_schema: The target schema document
+        source_paths: Leaf paths per source, from source_field_paths()
+        llm: Optional CrewAI LLM asked about fields no name or synonym matches
+
+    Returns:
+        The mapping and any target paths that remain unresolved
+    """
+    target_paths = schema_leaf_paths(catalog_item_schema(target_schema))
+    mapping, unresolved = resolve_by_name(target_paths, source_paths)
+    if unresolved and llm is not None:
+        mapping.update(propose_mappings(llm, unresolved, source_paths))
+        unresolved = [path for path in unresolved if path not in mapping]
+    # Keep schema order so merged records serialise like the target schema
+    return {path: mapping[path] for path in target_paths if path in mapping}, unresolved
+
+
+def schema_fingerprint(target_schema: dict) -> str:
+    return hashlib.sha256(json.dumps(target_schema, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def mapping_fingerprint(target_schema: dict, source_paths: Dict[str, List[str]]) -> str:
+    """Fingerprint of everything a derived mapping depends on: the schema and both source layouts."""
+    layouts = {source: sorted(paths) for source, paths in source_paths.items()}
+    return hashlib.sha256((schema_fingerprint(target_schema) + json.dumps(layouts, sort_keys=True)).encode("utf-8")).hexdigest()
+
+
+def resolve_value(candidates: List[Tuple[str, str]], sources: Dict[str, Optional[dict]]):
+    """Return the value of the first candidate whose source record has one, or None."""
+    for source, path in candidates:
+        record = sources.get(source)
+        if record is None:
+            continue
+        value = get_path(record, path)
+        if value is not None:
+            return value
+    return None
+
+
+def index_by_id(records: List[dict]) -> Dict[str, dict]:
+    """Build a hash index of records keyed by product ID."""
+    if not records:
+        return {}
+    key = id_field(records[0])
+    return {record[key]: record for record in records}
+
+
+def build_entry(mapping: FieldMapping, product_id: str, sources: Dict[str, Optional[dict]]) -> dict:
+    """Build one product_catalog entry from the matching source records."""
+    entry: dict = {}
+    for target, candidates in mapping.items():
+        if candidates[0][0] == "key":
+            set_path(entry, target, product_id)
+            continue
+        value = resolve_value(candidates, sources)
+        if value is not None:
+            set_path(entry, target, value)
+    return entry
+
+
+def merge_catalog(source1: dict, source2: dict, mapping: FieldMapping) -> List[dict]:
+    """
+    Hash-join the two sources on product ID and build product_catalog entries.
+
+    Products are emitted in source1 order, followed by products that only
+    appear in source2.
+    """
+    products = source1_records(source1)
+    inventory = index_by_id(source2_records(source2))
+    product_key = id_field(products[0]) if products else None
+    catalog = []
+    seen = set()
+    for product in products:
+        product_id = product[product_key]
+        seen.add(product_id)
+        catalog.append(build_entry(mapping, product_id, {"source1": product, "source2": inventory.get(product_id)}))
+    for product_id, item in inventory.items():
+        if product_id not in seen:
+            catalog.append(build_entry(mapping, product_id, {"source1": None, "source2": item}))
+    return catalog
@@ -0,0 +1,119 @@
+"""
+Sharded agent merge for catalogs too large for a single crew.
+
+Products are partitioned by ID into shards that are bounded both in product
+count and in the size of their source records, so each shard's source files
+fit in a task description no matter how large the catalog is. Every shard is
+written to its own directory and processed by its own processor/verifier
+crew; the crews run concurrently, and their outputs are merged back into one
+catalog in source order.
+"""
+
+import json
+import os
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+from merge_engine import index_by_id, source1_records, source2_records
+
+# Products per shard
+SHARD_SIZE = 50
+# Combined size of a shard's source records; kept under file_cache.INLINE_MAX_BYTES
+# so each shard file is pasted into the task descriptions rather than read with a tool
+MAX_SHARD_BYTES = 12 * 1024
+
+
+def catalog_ids(source1_index: Dict[str, dict], source2_index: Dict[str, dict]) -> List[str]:
+    """Product IDs in merge_catalog order: source1 order, then source2-only products."""
+    order = list(source1_index)
+    order.extend(pid for pid in source2_index if pid not in source1_index)
+    return order
+
+
+def plan_shards(source1_index: Dict[str, dict], source2_index: Dict[str, dict],
+                shard_size: int = SHARD_SIZE, max_bytes: int = MAX_SHARD_BYTES) -> List[List[str]]:
+    """
+    Partition product IDs into shards.
+
+    IDs are assigned in sorted order, so a product's shard depends only on
+    the set of IDs and not on where it appears in the sources. A shard is
+    closed when it holds shard_size products or adding the next product's
+    records would exceed max_bytes; a single product larger than max_bytes
+    gets a shard of its own.
+    """
+    shards, current, size = [], [], 0
+    for product_id in sorted(set(source1_index) | set(source2_index)):
+        record_size = sum(
+            len(json.dumps(index[product_id], separators=(",", ":")))
+            for index in (source1_index, source2_index) if product_id in index
+        )
+        if current and (len(current) >= shard_size or size + record_size > max_bytes):
+            shards.append(current)
+            current, size = [], 0
+        current.append(product_id)
+        size += record_size
+    if current:
+        shards.append(current)
+    return shards
+
+
+def split_sources(source1: dict, source2: dict, shards: List[List[str]]) -> List[Tuple[dict, dict]]:
+    """
+    Build a source1 and source2 document for every shard.
+
+    Each keeps the layout and top-level fields of the original source, and
+    its records in their original order, so a shard can be processed exactly
+    like the full dataset.
+    """
+    owner = {product_id: number for number, shard in enumerate(shards) for product_id in shard}
+    products: List[List[dict]] = [[] for _ in shards]
+    items: List[List[dict]] = [[] for _ in shards]
+    for records, buckets in ((source1_records(source1), products), (source2_records(source2), items)):
+        index = index_by_id(records)
+        for product_id, record in index.items():
+            buckets[owner[product_id]].append(record)
+
+    inventory = source2["inventory"]
+    return [
+        ({**source1, "products": shard_products}, {**source2, "inventory": {**inventory, "items": shard_items}})
+        for shard_products, shard_items in zip(products, items)
+    ]
+
+
+def merge_shard_outputs(order: List[str], shards: List[List[str]],
+                        outputs: List[Optional[List[dict]]]) -> Tuple[List[dict], List[str]]:
+    """
+    Combine the shards' product_catalog entries into one catalog.
+
+    An entry is only taken from the shard that owns its product ID, and the
+    first entry wins if a shard repeats one, so the result does not depend
+    on which crew finished first.
+
+    Args:
+        order: Product IDs in catalog order
+        shards: Product IDs of each shard, from plan_shards()
+        outputs: Each shard's catalog entries, or None if the shard failed
+
+    Returns:
+        The merged catalog in catalog order, and the IDs of products no shard produced
+    """
+    entries = {}
+    for shard, output in zip(shards, outputs):
+        owned = set(shard)
+        for entry in output or []:
+            product_id = entry.get("product_id") if isinstance(entry, dict) else None
+            if product_id in owned and product_id not in entries:
+                entries[product_id] = entry
+    catalog = [entries[pid] for pid in order if pid in entries]
+    missing = [pid for pid in order if pid not in entries]
+    return catalog, missing
+
+
+def write_shard(directory: str, source1: dict, source2: dict, target_schema: dict) -> None:
+    # Start from an empty directory so a previous run's processed_output.json
+    # is never merged as this shard's output
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    for name, document in (("source1.json", source1), ("source2.json", source2), ("target_schema.json", target_schema)):
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as file:
+            json.dump(document, file, separators=(",", ":"))
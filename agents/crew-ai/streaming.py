@@ -0,0 +1,162 @@
+"""
+Streaming merge for source files too large to load into memory.
+
+Both sources are parsed incrementally with ijson. The smaller source is
+reduced to a compact index holding only the mapped fields, and the larger
+one is streamed past it, so peak memory is proportional to the index rather
+than to the input files. Catalog entries are written out as they are built.
+"""
+
+import json
+import os
+import sqlite3
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from merge_engine import FieldMapping, build_entry, get_path, id_field, set_path
+
+# ijson prefixes of the record arrays in each source file
+SOURCE_PREFIXES = {
+    "source1": "products.item",
+    "source2": "inventory.items.item",
+}
+
+
+def iter_records(path: str, source: str) -> Iterator[dict]:
+    """Yield the records of a source file one at a time."""
+    # Imported here so the CLI and --help start without loading ijson
+    import ijson
+
+    with open(path, "rb") as file:
+        yield from ijson.items(file, SOURCE_PREFIXES[source], use_float=True)
+
+
+class SourceIndex:
+    """
+    Product ID index over one source, keeping only the fields the mapping uses.
+
+    Records are stored as tuples of the mapped values, in memory by default or
+    in a SQLite file when an on-disk path is given.
+    """
+
+    def __init__(self, paths: List[str], db_path: Optional[str] = None):
+        self.paths = paths
+        self._memory: Optional[Dict[str, Tuple]] = None
+        self._db = None
+        if db_path is None:
+            self._memory = {}
+        else:
+            if os.path.exists(db_path):
+                os.remove(db_path)
+            self._db = sqlite3.connect(db_path)
+            self._db.execute("PRAGMA journal_mode=OFF")
+            self._db.execute("PRAGMA synchronous=OFF")
+            self._db.execute("CREATE TABLE records (product_id TEXT PRIMARY KEY, fields TEXT NOT NULL)")
+
+    def add(self, product_id: str, record: dict) -> None:
+        values = tuple(get_path(record, path) for path in self.paths)
+        if self._memory is not None:
+            self._memory[product_id] = values
+        else:
+            self._db.execute("INSERT OR REPLACE INTO records VALUES (?, ?)", (product_id, json.dumps(values)))
+
+    def get(self, product_id: str) -> Optional[dict]:
+        if self._memory is not None:
+            values = self._memory.get(product_id)
+        else:
+            row = self._db.execute("SELECT fields FROM records WHERE product_id = ?", (product_id,)).fetchone()
+            values = json.loads(row[0]) if row else None
+        return None if values is None else self._expand(values)
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        if self._memory is not None:
+            for product_id, values in self._memory.items():
+                yield product_id, self._expand(values)
+        else:
+            for product_id, fields in self._db.execute("SELECT product_id, fields FROM records"):
+                yield product_id, self._expand(json.loads(fields))
+
+    def __len__(self) -> int:
+        if self._memory is not None:
+            return len(self._memory)
+        return self._db.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def _expand(self, values) -> dict:
+        record: dict = {}
+        for path, value in zip(self.paths, values):
+            if value is not None:
+                set_path(record, path, value)
+        return record
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.commit()
+            self._db.close()
+
+
+def stream_merge(source_paths: Dict[str, str], mapping: FieldMapping,
+                 index_path: Optional[str] = None) -> Iterator[Tuple[dict, Dict[str, Optional[dict]]]]:
+    """
+    Merge two source files on product ID without loading either into memory.
+
+    The smaller file (by size on disk) is indexed; the larger one is streamed.
+    Indexed products with no partner are emitted after the streamed ones.
+
+    Args:
+        source_paths: File path per source name ("source1", "source2")
+        mapping: The field mapping used to build entries
+        index_path: SQLite file for an on-disk index; in memory when omitted
+
+    Yields:
+        (entry, sources) pairs, where sources holds the compact source records
+        the entry was built from, for verification
+    """
+    indexed, streamed = sorted(source_paths, key=lambda name: os.path.getsize(source_paths[name]))
+    indexed_paths = list(dict.fromkeys(
+        path for candidates in mapping.values() for source, path in candidates if source == indexed
+    ))
+
+    index = SourceIndex(indexed_paths, index_path)
+    try:
+        key = None
+        for record in iter_records(source_paths[indexed], indexed):
+            key = key or id_field(record)
+            index.add(record[key], record)
+
+        matched = set()
+        key = None
+        for record in iter_records(source_paths[streamed], streamed):
+            key = key or id_field(record)
+            product_id = record[key]
+            partner = index.get(product_id)
+            if partner is not None:
+                matched.add(product_id)
+            sources = {streamed: record, indexed: partner}
+            yield build_entry(mapping, product_id, sources), sources
+
+        for product_id, partner in index.items():
+            if product_id not in matched:
+                sources = {streamed: None, indexed: partner}
+                yield build_entry(mapping, product_id, sources), sources
+    finally:
+        index.close()
+        if index_path is not None and os.path.exists(index_path):
+            os.remove(index_path)
+
+
+def write_catalog_stream(entries: Iterator[dict], output_path: str) -> int:
+    """
+    Write catalog entries to a product_catalog JSON document as they arrive.
+
+    Returns:
+        The number of entries written
+    """
+    count = 0
+    with open(output_path, "w", encoding="utf-8") as file:
+        file.write('{"product_catalog":[')
+        for entry in entries:
+            if count:
+                file.write(",")
+            file.write(json.dumps(entry, separators=(",", ":")))
+            count += 1
+        file.write("]}")
+    return count
@@ -0,0 +1,191 @@
+"""
+Code-based verification of the processed product catalog.
+
+The target schema is compiled into a jsonschema validator once, every
+catalog entry is validated against it, and every mapped field is
+cross-checked against the indexed source records. The LLM is only needed
+to explain the violations this finds.
+
+Reports are streamed to disk as problems are found and hold no catalog or
+source data, so their size grows with the number of problems only.
+"""
+
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+from merge_engine import FieldMapping, catalog_item_schema, get_path, record_leaf_paths, resolve_value
+
+
+def compile_item_validator(target_schema: dict):
+    """
+    Compile a validator for a single product_catalog entry.
+
+    The full schema is checked once for correctness; the returned validator
+    is reused for every record.
+    """
+    # Imported here so the CLI and --help start without loading jsonschema
+    from jsonschema.validators import validator_for
+
+    schema = target_schema.get("schema", target_schema)
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(catalog_item_schema(target_schema))
+
+
+def schema_issues(validator, entry: dict) -> List[Dict]:
+    """Return one issue per schema violation in a catalog entry."""
+    issues = []
+    for error in validator.iter_errors(entry):
+        issues.append({
+            "product_id": entry.get("product_id"),
+            "path": ".".join(str(part) for part in error.absolute_path),
+            "message": error.message,
+        })
+    return issues
+
+
+def mismatch_issues(entry: dict, mapping: FieldMapping, sources: Dict[str, Optional[dict]]) -> List[Dict]:
+    """
+    Cross-check an entry's fields against the source records it came from.
+
+    Every mapped field must equal the value of its first source candidate
+    that has one, and the entry may not
+    contain fields that no source provides.
+    """
+    product_id = entry.get("product_id")
+    issues = []
+    for target, candidates in mapping.items():
+        if candidates[0][0] == "key":
+            continue
+        expected = resolve_value(candidates, sources)
+        actual = get_path(entry, target)
+        if expected != actual:
+            issues.append({"product_id": product_id, "path": target, "expected": expected, "actual": actual})
+    for path in record_leaf_paths(entry):
+        if path not in mapping:
+            issues.append({"product_id": product_id, "path": path, "expected": None, "actual": get_path(entry, path)})
+    return issues
+
+
+class ReportWriter:
+    """
+    Stream a verification report to disk as problems are found.
+
+    The report is a single JSON document:
+
+        {"verification_report": {
+            "issues": [
+                {"type": "schema", "product_id": ..., "path": ..., "message": ...},
+                {"type": "mismatch", "product_id": ..., "path": ..., "expected": ..., "actual": ...}
+            ],
+            "summary": {"products_processed": ..., "schema_violations": ..., "field_mismatches": ...,
+                        "products_with_issues": ..., "is_compliant": ..., "is_valid": ...}
+        }}
+
+    Issues are written one per line as they are added. The summary comes last,
+    once the counts are known; callers add their own counts to `summary` before
+    the writer is closed. The document is written to a temporary file that
+    replaces the report on a clean exit, so readers never see half a report.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.summary: Dict = {}
+        self.schema_violations = 0
+        self.field_mismatches = 0
+        self._products = set()
+        self._temporary = path + ".tmp"
+        self._file = open(self._temporary, "w", encoding="utf-8")
+        self._file.write('{"verification_report":{"issues":[')
+
+    def add(self, kind: str, issues: List[Dict]) -> None:
+        """Write issues of one kind: "schema" for schema_issues(), "mismatch" for integrity issues."""
+        for issue in issues:
+            separator = ",\n" if self.schema_violations or self.field_mismatches else "\n"
+            self._file.write(separator + json.dumps({"type": kind, **issue}, separators=(",", ":")))
+            if kind == "schema":
+                self.schema_violations += 1
+            else:
+                self.field_mismatches += 1
+            self._products.add(issue.get("product_id"))
+
+    def add_results(self, results: Dict) -> None:
+        """Write every issue of a verify_catalog()-style result."""
+        self.add("schema", results["schema_compliance"]["issues"])
+        self.add("mismatch", results["data_integrity"]["issues"])
+
+    def close(self) -> None:
+        summary = {
+            **self.summary,
+            "schema_violations": self.schema_violations,
+            "field_mismatches": self.field_mismatches,
+            "products_with_issues": len(self._products),
+            "is_compliant": not self.schema_violations,
+            "is_valid": not self.field_mismatches
+        }
+        self._file.write('\n],"summary":' + json.dumps(summary, separators=(",", ":")) + "}}\n")
+        self._file.close()
+        os.replace(self._temporary, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+            return
+        # Leave the previous report in place
+        self._file.close()
+        os.remove(self._temporary)
+
+
+def verify_catalog(catalog: Iterable[dict], validator, mapping: FieldMapping,
+                   source1_index: Dict[str, dict], source2_index: Dict[str, dict],
+                   report: Optional[ReportWriter] = None) -> Dict:
+    """
+    Validate every catalog entry and cross-check it against both sources.
+
+    Args:
+        catalog: The processed product_catalog entries
+        validator: Validator from compile_item_validator()
+        mapping: The field mapping used to build the catalog
+        source1_index: source1 products keyed by product ID
+        source2_index: source2 inventory items keyed by product ID
+        report: If given, every issue is also written to this report as it is found
+
+    Returns:
+        Schema and integrity results in the verification report layout
+    """
+    schema_problems = []
+    integrity_problems = []
+
+    def record(kind, problems, issues):
+        problems.extend(issues)
+        if report is not None:
+            report.add(kind, issues)
+
+    seen = set()
+    for entry in catalog:
+        product_id = entry.get("product_id")
+        record("schema", schema_problems, schema_issues(validator, entry))
+        if product_id in seen:
+            record("mismatch", integrity_problems, [{"product_id": product_id, "path": "product_id",
+                                                     "expected": "unique", "actual": "duplicate"}])
+        seen.add(product_id)
+        sources = {"source1": source1_index.get(product_id), "source2": source2_index.get(product_id)}
+        if sources["source1"] is None and sources["source2"] is None:
+            record("mismatch", integrity_problems, [{"product_id": product_id, "path": "product_id",
+                                                     "expected": "present in a source", "actual": "not found"}])
+            continue
+        record("mismatch", integrity_problems, mismatch_issues(entry, mapping, sources))
+
+    for product_id in list(source1_index) + [pid for pid in source2_index if pid not in source1_index]:
+        if product_id not in seen:
+            record("mismatch", integrity_problems, [{"product_id": product_id, "path": "product_id",
+                                                     "expected": "present in output", "actual": "missing"}])
+
+    return {
+        "schema_compliance": {"is_compliant": not schema_problems, "issues": schema_problems},
+        "data_integrity": {"is_valid": not integrity_problems, "issues": integrity_problems},
+    }
@@ -0,0 +1,139 @@
+"""
+Import-Time Benchmark
+Measures cold-start time: how long a fresh Python process takes to show the
+CLI's help, each command's help, and to import the shared modules. Every
+target runs in a new interpreter several times and the fastest and median
+wall times are reported, interpreter startup included, so the numbers are
+what a cron job or a serverless invocation actually pays.
+
+Results can be saved and compared against a baseline run; a target whose
+median grows by more than the tolerance is reported and the script exits 1.
+
+Usage:
+    python import_time.py
+    python import_time.py --repeat 10 --output imports.json
+    python import_time.py --baseline imports.json --tolerance 0.3
+    python import_time.py --profile zero-shot
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT_DIR = os.path.join(ROOT, "prompt-engineering")
+CLI = os.path.join(PROMPT_DIR, "cli.py")
+COMMANDS = ("zero-shot", "few-shot", "role", "template", "rag", "cot", "summary", "cobol", "cobol-batch", "crew")
+
+
+def targets():
+    """
+    Return the measured targets.
+
+    Returns:
+        list: (name, argv) pairs, where argv follows the Python executable
+    """
+    found = [
+        ("python -c pass", ["-c", "pass"]),
+        ("import llm_client", ["-c", "import llm_client"]),
+        ("cli.py --help", [CLI, "--help"]),
+    ]
+    found += [(f"cli.py {command} --help", [CLI, command, "--help"]) for command in COMMANDS]
+    return found
+
+
+def measure(argv, repeat):
+    """
+    Run one target in fresh interpreters.
+
+    Returns:
+        dict: min_ms and median_ms of the wall time, and whether every run exited 0
+    """
+    times, ok = [], True
+    for _ in range(repeat):
+        started = time.perf_counter()
+        completed = subprocess.run([sys.executable, *argv], cwd=PROMPT_DIR,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append((time.perf_counter() - started) * 1000)
+        ok = ok and completed.returncode == 0
+    return {"min_ms": round(min(times), 1), "median_ms": round(statistics.median(times), 1), "ok": ok}
+
+
+def profile(command, top=15):
+    """
+    Print the modules with the largest cumulative import time for a command's --help.
+
+    Uses the interpreter's -X importtime report.
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", CLI, command, "--help"], cwd=PROMPT_DIR,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Only top-level entries, whose cumulative time includes their children
+        if not name.startswith("  "):
+            rows.append((int(cumulative), name.strip()))
+    for cumulative, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative / 1000:9.1f}ms  {name}")
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results with a baseline run.
+
+    Returns:
+        list: Human-readable regressions where the median time grew by more than the tolerance
+    """
+    previous = {r["target"]: r for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result["target"])
+        if before and result["median_ms"] > before["median_ms"] * (1 + tolerance):
+            regressions.append(f"{result['target']}: {before['median_ms']}ms -> {result['median_ms']}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of the CLI and shared modules")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per target")
+    parser.add_argument("--targets", nargs="*", help="Only targets whose name contains one of these strings")
+    parser.add_argument("--profile", metavar="COMMAND", help="Show the slowest imports of one command's --help")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed growth before a regression is reported")
+    args = parser.parse_args()
+
+    if args.profile:
+        profile(args.profile)
+        return
+
+    results = []
+    for name, argv in targets():
+        if args.targets and not any(part in name for part in args.targets):
+            continue
+        result = {"target": name, **measure(argv, args.repeat)}
+        results.append(result)
+        status = "" if result["ok"] else "  (failed)"
+        print(f"{name:<32} min={result['min_ms']:8.1f}ms median={result['median_ms']:8.1f}ms{status}", flush=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"config": vars(args), "results": results}, file, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            regressions = compare(results, json.load(file)["results"], args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            print("\n".join(regressions))
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
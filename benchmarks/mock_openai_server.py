@@ -0,0 +1,248 @@
+"""
+Mock OpenAI Server
+A local, OpenAI-compatible HTTP stub for benchmarking the examples without
+spending tokens. It answers /v1/chat/completions (plain and streaming) and
+/v1/embeddings, and simulates model behaviour with configurable latency,
+token generation rate, error rate and a provider-style concurrency limit.
+
+Run it on its own:
+    python mock_openai_server.py --port 8765 --latency 0.2 --tokens-per-second 80
+and point the examples at it with OPENAI_BASE_URL=http://127.0.0.1:8765/v1.
+"""
+
+import argparse
+import json
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+WORDS = ("the quick brown fox jumps over a lazy dog while seven wizards "
+         "quietly box jumping frogs near the old stone bridge").split()
+
+
+class MockConfig:
+    def __init__(self, latency=0.2, jitter=0.05, tokens_per_second=100.0, completion_tokens=40,
+                 error_rate=0.0, embedding_dim=256, seed=0, max_in_flight=0):
+        """
+        Simulated model behaviour.
+
+        Args:
+            latency (float): Seconds before the first byte of a response
+            jitter (float): Maximum extra random latency in seconds
+            tokens_per_second (float): Generation rate; 0 returns completions instantly
+            completion_tokens (int): Tokens in every completion (capped by max_tokens)
+            error_rate (float): Fraction of requests answered with a 429 or 500
+            embedding_dim (int): Dimensions of returned embeddings
+            seed (int): Random seed for jitter and errors
+            max_in_flight (int): Concurrent requests beyond which requests get a 429; 0 for no limit
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.embedding_dim = embedding_dim
+        self.max_in_flight = max_in_flight
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.in_flight = 0
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, delayed ACKs add ~40 ms per response
+    disable_nagle_algorithm = True
+    config = MockConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+        elif self.path == "/stats":
+            with self.config.lock:
+                self._send_json(200, {"requests": self.config.requests, "errors": self.config.errors,
+                                      "throttled": self.config.throttled})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        config = self.config
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with config.lock:
+            config.requests += 1
+            if config.max_in_flight and config.in_flight >= config.max_in_flight:
+                config.throttled += 1
+                throttled = True
+            else:
+                config.in_flight += 1
+                throttled = False
+            delay = config.latency + config.random.uniform(0, config.jitter)
+            fail = config.random.random() < config.error_rate
+            status = config.random.choice((429, 500)) if fail else 200
+            if fail:
+                config.errors += 1
+        if throttled:
+            self._send_json(429, {"error": {"message": "Too many concurrent requests", "type": "mock_error"}},
+                            {"Retry-After-Ms": "50"})
+            return
+        try:
+            time.sleep(delay)
+            if fail:
+                message = "Rate limit reached" if status == 429 else "Internal server error"
+                self._send_json(status, {"error": {"message": message, "type": "mock_error"}}, {"Retry-After": "0"})
+            elif self.path.endswith("/embeddings"):
+                self._embeddings(body)
+            elif self.path.endswith("/chat/completions"):
+                self._chat(body)
+            else:
+                self._send_json(404, {"error": {"message": "Not found"}})
+        finally:
+            with config.lock:
+                config.in_flight -= 1
+
+    def _embeddings(self, body):
+        inputs = body.get("input", [])
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        dim = self.config.embedding_dim
+        data = []
+        for i, text in enumerate(inputs):
+            # Deterministic pseudo-embedding so identical texts get identical vectors
+            rng = random.Random(zlib.crc32(str(text).encode("utf-8")))
+            data.append({"object": "embedding", "index": i, "embedding": [rng.uniform(-1, 1) for _ in range(dim)]})
+        tokens = sum(len(str(text).split()) for text in inputs)
+        self._send_json(200, {"object": "list", "data": data, "model": body.get("model", "mock"),
+                              "usage": {"prompt_tokens": tokens, "total_tokens": tokens}})
+
+    def _chat(self, body):
+        config = self.config
+        count = min(config.completion_tokens, body.get("max_tokens") or config.completion_tokens)
+        words = [WORDS[i % len(WORDS)] for i in range(count)]
+        prompt_tokens = sum(len(str(m.get("content") or "").split()) for m in body.get("messages", []))
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": count, "total_tokens": prompt_tokens + count}
+        step = 1.0 / config.tokens_per_second if config.tokens_per_second else 0.0
+        model = body.get("model", "mock")
+
+        if not body.get("stream"):
+            time.sleep(step * count)
+            self._send_json(200, {
+                "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)},
+                             "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, word in enumerate(words):
+            chunk = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [{"index": 0, "delta": {"content": (" " if i else "") + word},
+                                                  "finish_reason": None}]}
+            self._chunk(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+            if step:
+                time.sleep(step)
+        final = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                 "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        self._chunk(b"data: " + json.dumps(final).encode("utf-8") + b"\n\n")
+        self._chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients closing pooled keep-alive connections is expected, not an error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def free_port():
+    """Return a TCP port that is free on the loopback interface."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(port, config):
+    """Serve the mock API on 127.0.0.1:port until interrupted."""
+    MockHandler.config = config
+    MockServer(("127.0.0.1", port), MockHandler).serve_forever()
+
+
+def start_server_process(port=None, **options):
+    """
+    Start the mock server in a separate process, so its CPU time is not
+    counted against the client being measured.
+
+    Args:
+        port (int): Port to listen on; a free one is picked when omitted
+        **options: MockConfig arguments
+
+    Returns:
+        tuple: (process, base_url) once the server accepts connections
+    """
+    port = port or free_port()
+    command = [sys.executable, __file__, "--port", str(port)]
+    for name, value in options.items():
+        command += [f"--{name.replace('_', '-')}", str(value)]
+    process = subprocess.Popen(command)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process, f"http://127.0.0.1:{port}/v1"
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("Mock OpenAI server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first byte")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Maximum extra random latency")
+    parser.add_argument("--tokens-per-second", type=float, default=100.0, help="Generation rate, 0 for instant")
+    parser.add_argument("--completion-tokens", type=int, default=40, help="Tokens per completion")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--embedding-dim", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-in-flight", type=int, default=0, help="Concurrent requests before 429s, 0 for no limit")
+    args = parser.parse_args()
+
+    config = MockConfig(args.latency, args.jitter, args.tokens_per_second, args.completion_tokens,
+                        args.error_rate, args.embedding_dim, args.seed, args.max_in_flight)
+    try:
+        serve(args.port, config)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Offline Benchmarks
+Measures the latency, throughput and client-side CPU overhead of the
+examples against a local mock OpenAI server, so no tokens are spent.
+
+Every *_prompt function, ChatSession, create_summary_chain,
+convert_cobol_to_java and JSONProcessor.run are driven at several
+concurrency levels. For each scenario and level the harness reports
+p50/p95/p99 latency, requests per second, failed calls and the CPU time the
+client process spent per request. Results can be saved and compared against
+a baseline run to catch regressions.
+
+Usage:
+    python run_benchmarks.py --requests 100 --concurrency 1 8 32
+    python run_benchmarks.py --output baseline.json
+    python run_benchmarks.py --baseline baseline.json --tolerance 0.25
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from mock_openai_server import start_server_process
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT_DIR = os.path.join(ROOT, "prompt-engineering")
+CREW_DIR = os.path.join(ROOT, "agents", "crew-ai")
+
+
+class Scenario:
+    def __init__(self, name, setup, is_async=True, max_concurrency=None, max_requests=None):
+        """
+        One benchmarked entry point.
+
+        Args:
+            name (str): Scenario name used on the command line and in reports
+            setup (callable): Builds and returns call(i), run once per request
+            is_async (bool): Whether call(i) returns an awaitable
+            max_concurrency (int): Cap on concurrency for entry points that are not thread-safe
+            max_requests (int): Cap on requests for slow end-to-end scenarios
+        """
+        self.name = name
+        self.setup = setup
+        self.is_async = is_async
+        self.max_concurrency = max_concurrency
+        self.max_requests = max_requests
+
+
+def _prompt_scenario(module_name, function_name, make_prompt):
+    def setup():
+        function = getattr(__import__(module_name), function_name)
+        return lambda i: function(make_prompt(i))
+    return setup
+
+
+def _few_shot_setup():
+    from few_shot_prompting import afew_shot_prompt, TRANSLATION_EXAMPLES
+    from example_selector import ExampleSelector
+    selector = ExampleSelector(TRANSLATION_EXAMPLES, input_label="English", output_label="French")
+    return lambda i: afew_shot_prompt(selector.build_prompt(f"cheese platter {i}"))
+
+
+def _demonstration_setup():
+    from demonstration_prompting import ademonstration_prompt, ARITHMETIC_DEMONSTRATIONS
+    from example_selector import ExampleSelector
+    selector = ExampleSelector(ARITHMETIC_DEMONSTRATIONS, k=2)
+    return lambda i: ademonstration_prompt(selector.build_prompt(f"{i} + 6"))
+
+
+def _template_setup():
+    from template_prompting import atemplate_prompt, TRANSLATION_TEMPLATE
+    return lambda i: atemplate_prompt(TRANSLATION_TEMPLATE, source_language="English",
+                                      target_language="Spanish", sentence=f"How are you, friend number {i}?")
+
+
+def _retrieval_setup():
+    from retrieval_augmented_prompting import aretrieval_augmented_prompt, DEFAULT_CORPUS
+    from vector_index import build_index
+    index = build_index(DEFAULT_CORPUS)
+    return lambda i: aretrieval_augmented_prompt(f"How do I set up my API key? ({i})", index=index)
+
+
+def _chat_setup():
+    from chat_completion_example import ChatSession
+
+    def call(i):
+        session = ChatSession()
+        session.add_message("user", f"Tell me a fact about the number {i}.")
+        reply = "".join(session.stream_response())
+        session.add_message("user", "And another one?")
+        return reply + "".join(session.stream_response())
+    return call
+
+
+def _summary_setup():
+    from basic_langchain_chain import create_summary_chain
+    chain = create_summary_chain(max_chunk_tokens=400, max_concurrency=8)
+    paragraph = ("Artificial intelligence systems learn patterns from data and use them to make "
+                 "predictions, generate text and automate decisions across many industries. ") * 8
+    document = "\n\n".join(f"Section {n}. {paragraph}" for n in range(24))
+    return lambda i: chain.ainvoke(f"Document {i}.\n\n{document}")
+
+
+def _cobol_setup():
+    from cobol_to_java_conversion import aconvert_cobol_to_java
+    with open(os.path.join(PROMPT_DIR, "sample.cbl"), "r", encoding="utf-8") as file:
+        sample = file.read()
+    return lambda i: aconvert_cobol_to_java(f"      * Benchmark run {i}\n{sample}")
+
+
+def _large_cobol_program(paragraphs=120):
+    lines = [
+        "       IDENTIFICATION DIVISION.",
+        "       PROGRAM-ID. BENCHMARK.",
+        "       DATA DIVISION.",
+        "       WORKING-STORAGE SECTION.",
+    ]
+    for n in range(paragraphs):
+        lines += [f"       01 WS-TOTAL-{n} PIC 9(7)V99 VALUE ZERO.", f"       01 WS-COUNT-{n} PIC 9(5) VALUE ZERO."]
+    lines += ["       PROCEDURE DIVISION.", "       MAIN-LOGIC."]
+    lines += [f"           PERFORM STEP-{n}." for n in range(paragraphs)]
+    lines.append("           STOP RUN.")
+    for n in range(paragraphs):
+        lines += [
+            f"       STEP-{n}.",
+            f"           ADD 1 TO WS-COUNT-{n}.",
+            f"           COMPUTE WS-TOTAL-{n} = WS-TOTAL-{n} + WS-COUNT-{n} * 1.05.",
+            f"           IF WS-TOTAL-{n} > 1000",
+            f"               DISPLAY 'LIMIT REACHED IN STEP {n}'",
+            "           END-IF.",
+        ]
+    return "\n".join(lines)
+
+
+def _cobol_chunked_setup():
+    from cobol_to_java_conversion import aconvert_cobol_to_java
+    program = _large_cobol_program()
+    return lambda i: aconvert_cobol_to_java(f"      * Benchmark run {i}\n{program}")
+
+
+def _crew_setup():
+    # JSONProcessor uses paths relative to the working directory and writes its
+    # outputs there, so it runs against a scratch copy of the data directory
+    workdir = tempfile.mkdtemp(prefix="crew_benchmark_")
+    shutil.copytree(os.path.join(CREW_DIR, "data"), os.path.join(workdir, "data"),
+                    ignore=shutil.ignore_patterns("field_mapping.json"))
+    from main import JSONProcessor
+    processor = JSONProcessor()
+
+    def call(i):
+        previous = os.getcwd()
+        os.chdir(workdir)
+        try:
+            return str(processor.run())
+        finally:
+            os.chdir(previous)
+    return call
+
+
+SCENARIOS = [
+    Scenario("basic_prompt", _prompt_scenario("simple_prompting", "abasic_prompt",
+                                              lambda i: f"Write a haiku about the number {i}.")),
+    Scenario("zero_shot_prompt", _prompt_scenario(
+        "zero_shot_prompting", "azero_shot_prompt",
+        lambda i: f"Classify the sentiment of the following text: 'Review {i}: I loved it!'\nSentiment:")),
+    Scenario("few_shot_prompt", _few_shot_setup),
+    Scenario("role_prompt", _prompt_scenario(
+        "role_prompting", "arole_prompt",
+        lambda i: f"You are a historian. Describe the year {1000 + i} in one sentence.")),
+    Scenario("context_prompt", _prompt_scenario(
+        "context_prompting", "acontext_prompt",
+        lambda i: f"Context: Order {i} shipped on Monday.\nQuestion: When did order {i} ship?")),
+    Scenario("contrastive_prompt", _prompt_scenario(
+        "contrastive_prompting", "acontrastive_prompt",
+        lambda i: f"Compare option A ({i} apples) with option B ({i} oranges).")),
+    Scenario("demonstration_prompt", _demonstration_setup),
+    Scenario("instruction_prompt", _prompt_scenario(
+        "instruction_prompting", "ainstruction_prompt",
+        lambda i: f"List three uses for the number {i}.")),
+    Scenario("chain_of_thought_prompt", _prompt_scenario(
+        "chain_of_thought_prompting", "achain_of_thought_prompt",
+        lambda i: f"If a train travels {i} km in 2 hours, what is its speed? Let's think step by step.")),
+    Scenario("template_prompt", _template_setup),
+    Scenario("retrieval_augmented_prompt", _retrieval_setup),
+    Scenario("chat_session", _chat_setup, is_async=False),
+    Scenario("summary_chain", _summary_setup),
+    Scenario("convert_cobol_to_java", _cobol_setup),
+    Scenario("convert_cobol_to_java_chunked", _cobol_chunked_setup, max_requests=20),
+    Scenario("crew_run", _crew_setup, is_async=False, max_concurrency=1, max_requests=5),
+]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+async def measure(call, is_async, requests, concurrency):
+    """
+    Run call(0..requests-1) with at most `concurrency` calls in flight.
+
+    Returns:
+        dict: Latency percentiles (ms), requests/s, errors and client CPU usage
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+    latencies, errors = [], 0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    result = await call(i) if is_async else await loop.run_in_executor(pool, call, i)
+                    if isinstance(result, str) and result.startswith("Error:"):
+                        errors += 1
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        cpu_started, wall_started = time.process_time(), time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        cpu, wall = time.process_time() - cpu_started, time.perf_counter() - wall_started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "requests_per_second": round(requests / wall, 2) if wall else 0.0,
+        "cpu_ms_per_request": round(cpu / requests * 1000, 3),
+        "cpu_percent": round(cpu / wall * 100, 1) if wall else 0.0,
+    }
+
+
+async def run_all(scenarios, requests, levels, warmup):
+    results = []
+    for scenario in scenarios:
+        try:
+            call = scenario.setup()
+        except Exception as e:
+            print(f"{scenario.name}: setup failed ({e})")
+            continue
+        count = min(requests, scenario.max_requests or requests)
+        for level in sorted({min(level, scenario.max_concurrency or level) for level in levels}):
+            if warmup:
+                await measure(call, scenario.is_async, min(warmup, count), level)
+            result = dict(scenario=scenario.name, **await measure(call, scenario.is_async, count, level))
+            results.append(result)
+            print(f"{result['scenario']:<32} c={level:<4} p50={result['p50_ms']:>9.1f}ms "
+                  f"p95={result['p95_ms']:>9.1f}ms p99={result['p99_ms']:>9.1f}ms "
+                  f"{result['requests_per_second']:>8.1f} req/s  cpu={result['cpu_ms_per_request']:>7.2f}ms/req "
+                  f"errors={result['errors']}", flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results with a baseline run.
+
+    Returns:
+        list: Human-readable regressions where p95 latency or CPU per request
+              grew by more than the tolerance
+    """
+    previous = {(r["scenario"], r["concurrency"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result["scenario"], result["concurrency"]))
+        if before is None:
+            continue
+        for metric in ("p95_ms", "cpu_ms_per_request"):
+            if before[metric] and result[metric] > before[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{result['scenario']} c={result['concurrency']} {metric}: "
+                    f"{before[metric]} -> {result[metric]}"
+                )
+    return regressions
+
+
+def configure_environment(base_url, use_caches):
+    """Point every client at the mock server before the examples are imported."""
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_BASE"] = base_url
+    os.environ["OPENAI_API_KEY"] = "mock-key"
+    os.environ.setdefault("OPENAI_MODEL", "gpt-4.1-nano-2025-04-14")
+    os.environ.setdefault("OPENAI_TEMPERATURE", "0.7")
+    os.environ["CREWAI_DISABLE_TELEMETRY"] = "true"
+    os.environ["OTEL_SDK_DISABLED"] = "true"
+    if not use_caches:
+        os.environ["LLM_CACHE_BYPASS"] = "1"
+        os.environ["SEMANTIC_CACHE_BYPASS"] = "1"
+    for path in (PROMPT_DIR, CREW_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the examples against a local mock OpenAI server")
+    parser.add_argument("--scenarios", nargs="*", help="Scenarios to run (default: all)")
+    parser.add_argument("--list", action="store_true", help="List scenario names and exit")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per scenario and concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Concurrency levels")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests before each run")
+    parser.add_argument("--base-url", help="Use an already running server instead of starting the mock")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock latency before the first byte (s)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Mock random extra latency (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=100.0, help="Mock generation rate")
+    parser.add_argument("--completion-tokens", type=int, default=40, help="Mock tokens per completion")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of mock requests that fail")
+    parser.add_argument("--max-in-flight", type=int, default=0, help="Mock concurrency limit before 429s, 0 for none")
+    parser.add_argument("--use-caches", action="store_true", help="Leave the response and semantic caches on")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed growth before a regression is reported")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(scenario.name for scenario in SCENARIOS))
+        return
+    selected = [s for s in SCENARIOS if not args.scenarios or s.name in args.scenarios]
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server, base_url = start_server_process(
+            latency=args.latency, jitter=args.jitter, tokens_per_second=args.tokens_per_second,
+            completion_tokens=args.completion_tokens, error_rate=args.error_rate,
+            max_in_flight=args.max_in_flight
+        )
+    configure_environment(base_url, args.use_caches)
+    try:
+        results = asyncio.run(run_all(selected, args.requests, args.concurrency, args.warmup))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"config": vars(args), "results": results}, file, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            regressions = compare(results, json.load(file)["results"], args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            print("\n".join(regressions))
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
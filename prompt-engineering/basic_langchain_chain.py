@@ -3,56 +3,158 @@ Basic LangChain Example
 This script demonstrates how to create a simple chain using LangChain 0.3.
 """
 
-import os
-from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+import argparse
+import time
+from llm_client import settings, get_client, get_async_client
+from token_utils import count_tokens
 
-# Load environment variables from .env file
-load_dotenv()
-
-def create_summary_chain():
-    """
-    Create a LangChain that generates summaries of text.
-    
-    Returns:
-        A chain that can generate summaries
-    """
-    # Create a prompt template
-    template = """
+SUMMARY_TEMPLATE = """
     Please provide a concise summary of the following text:
     
     {text}
     
     Summary:
     """
+
+COMBINE_TEMPLATE = """
+    The following are summaries of consecutive parts of one document, in order:
     
-    prompt = PromptTemplate(
-        input_variables=["text"],
-        template=template
-    )
+    {text}
+    
+    Combine them into a single concise summary of the whole document:
+    """
+
+def split_into_chunks(text, max_tokens=3000, model=None):
+    """
+    Split text into chunks of at most max_tokens, preferring paragraph breaks.
+    
+    Args:
+        text (str): The text to split
+        max_tokens (int): Token limit per chunk
+        model (str): Model whose tokenizer is used for counting
+    
+    Returns:
+        list: Chunk strings in document order
+    """
+    pieces = []
+    for paragraph in text.split("\n\n"):
+        tokens = count_tokens(paragraph, model)
+        if tokens <= max_tokens:
+            pieces.append((paragraph, tokens))
+            continue
+        # Paragraph too long on its own: cut it on word boundaries
+        words, word_tokens = [], 0
+        for word in paragraph.split():
+            tokens = count_tokens(" " + word, model)
+            if words and word_tokens + tokens > max_tokens:
+                pieces.append((" ".join(words), word_tokens))
+                words, word_tokens = [], 0
+            words.append(word)
+            word_tokens += tokens
+        if words:
+            pieces.append((" ".join(words), word_tokens))
+    return _pack(pieces, max_tokens, separator="\n\n")
+
+def _pack(pieces, max_tokens, separator, min_per_chunk=1):
+    """Greedily join (text, tokens) pieces into chunks of at most max_tokens."""
+    chunks, current, current_tokens = [], [], 0
+    for text, tokens in pieces:
+        if not text.strip():
+            continue
+        if len(current) >= min_per_chunk and current_tokens + tokens > max_tokens:
+            chunks.append(separator.join(current))
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        chunks.append(separator.join(current))
+    return chunks
+
+def create_summary_chain(max_chunk_tokens=3000, max_concurrency=8):
+    """
+    Create a LangChain that generates summaries of text.
     
+    Text that fits in one chunk is summarized with a single call. Longer text
+    is map-reduced: it is split into token-bounded chunks that are summarized
+    concurrently, and the partial summaries are then combined in concurrent
+    waves until one summary remains, so latency grows with the number of
+    waves rather than the number of chunks.
+    
+    Args:
+        max_chunk_tokens (int): Token limit for one chunk or group of summaries
+        max_concurrency (int): Maximum requests in flight within a wave
+    
+    Returns:
+        A chain that can generate summaries
+    """
+    # LangChain takes seconds to import, so it is loaded only when a chain is built
+    from langchain_openai import ChatOpenAI
+    from langchain_core.prompts import PromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.runnables import RunnableLambda
+    from langchain_telemetry import TelemetryCallbackHandler
+
     # Initialize the language model
+    # Reuse the pooled clients from llm_client instead of opening new connections
     llm = ChatOpenAI(
-        temperature=float(os.getenv("OPENAI_TEMPERATURE", 0.7)),
-        model=os.getenv("OPENAI_MODEL", "gpt-4.1-nano-2025-04-14")
+        temperature=settings.temperature,
+        model=settings.model,
+        # LangChain calls the client directly rather than through the request
+        # executor, so keep the SDK's own retries on these shared-pool copies
+        client=get_client().with_options(max_retries=settings.max_retries).chat.completions,
+        async_client=get_async_client().with_options(max_retries=settings.max_retries).chat.completions,
+        # Record every model call as a telemetry span
+        callbacks=[TelemetryCallbackHandler(name="summary_chain")]
     )
     
-    # Create the chain using the new LCEL (LangChain Expression Language)
-    chain = (
-        {"text": RunnablePassthrough()} 
-        | prompt 
-        | llm 
-        | StrOutputParser()
-    )
+    # Create the chains using the new LCEL (LangChain Expression Language)
+    summarize = PromptTemplate.from_template(SUMMARY_TEMPLATE) | llm | StrOutputParser()
+    combine = PromptTemplate.from_template(COMBINE_TEMPLATE) | llm | StrOutputParser()
+    config = {"max_concurrency": max_concurrency}
+    
+    def groups(summaries):
+        pieces = [(summary, count_tokens(summary, settings.model)) for summary in summaries]
+        # At least two summaries per group so every wave shrinks the list
+        return [{"text": group} for group in _pack(pieces, max_chunk_tokens, "\n\n", min_per_chunk=2)]
     
-    return chain
+    def map_reduce(text):
+        chunks = split_into_chunks(text, max_chunk_tokens, settings.model)
+        if len(chunks) <= 1:
+            return summarize.invoke({"text": text})
+        summaries = summarize.batch([{"text": chunk} for chunk in chunks], config=config)
+        while len(summaries) > 1:
+            summaries = combine.batch(groups(summaries), config=config)
+        return summaries[0]
+    
+    async def amap_reduce(text):
+        chunks = split_into_chunks(text, max_chunk_tokens, settings.model)
+        if len(chunks) <= 1:
+            return await summarize.ainvoke({"text": text})
+        summaries = await summarize.abatch([{"text": chunk} for chunk in chunks], config=config)
+        while len(summaries) > 1:
+            summaries = await combine.abatch(groups(summaries), config=config)
+        return summaries[0]
+    
+    return RunnableLambda(map_reduce, afunc=amap_reduce, name="map_reduce_summary")
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize text with a LangChain chain")
+    parser.add_argument("--file", help="Text file to summarize; long files are map-reduced")
+    parser.add_argument("--chunk-tokens", type=int, default=3000, help="Token limit per chunk")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight per wave")
+    args = parser.parse_args(argv)
+    
     # Create the summary chain
-    summary_chain = create_summary_chain()
+    summary_chain = create_summary_chain(args.chunk_tokens, args.concurrency)
+    
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as file:
+            text = file.read()
+        started = time.perf_counter()
+        result = summary_chain.invoke(text)
+        print(f"Summary ({time.perf_counter() - started:.1f}s):")
+        print(result)
+        return
     
     # Example text to summarize
     text = """
@@ -0,0 +1,194 @@
+"""
+Batch Helpers
+Utilities for fanning many prompts out through the async prompt functions
+with bounded concurrency and a request-rate limit, while keeping results in
+input order so they can be streamed straight to disk, for reading the
+input files, and for resuming a JSONL results file after an interruption.
+"""
+
+import asyncio
+import collections
+import csv
+import json
+import os
+import time
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute):
+        """
+        Space requests evenly so no more than requests_per_minute start per minute.
+
+        Args:
+            requests_per_minute (float): Allowed request starts per minute
+        """
+        self.interval = 60.0 / requests_per_minute
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until the next request slot is available."""
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+async def ordered_map(func, items, concurrency=16, rate_limiter=None, window=None):
+    """
+    Run an async function over items concurrently and yield results in input order.
+
+    At most `concurrency` calls run at once and at most `window` results are
+    held in memory, so arbitrarily long inputs can be streamed.
+
+    Args:
+        func (callable): Async function called with each item
+        items (iterable): Input items, consumed lazily
+        concurrency (int): Maximum number of calls in flight
+        rate_limiter (RateLimiter): Optional limiter applied before each call
+        window (int): Maximum number of scheduled but unyielded items
+
+    Yields:
+        tuple: (item, result) pairs in the order items were given
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    window = window or concurrency * 4
+    pending = collections.deque()
+
+    async def run(item):
+        async with semaphore:
+            if rate_limiter is not None:
+                await rate_limiter.acquire()
+            return await func(item)
+
+    try:
+        for item in items:
+            pending.append((item, asyncio.ensure_future(run(item))))
+            if len(pending) >= window:
+                head, task = pending.popleft()
+                yield head, await task
+        while pending:
+            head, task = pending.popleft()
+            yield head, await task
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+
+def read_rows(input_path):
+    """
+    Stream rows from a JSONL or CSV file.
+
+    Args:
+        input_path (str): Path to a .jsonl or .csv file
+
+    Yields:
+        dict: One row per JSONL line or CSV record
+    """
+    with open(input_path, "r", newline="", encoding="utf-8") as file:
+        if input_path.endswith(".csv"):
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def with_ids(rows):
+    """
+    Give every row a string "id"; rows without one are numbered by position.
+
+    Args:
+        rows (iterable): Dicts, such as those from read_rows()
+
+    Yields:
+        tuple: (id, row) pairs in input order
+    """
+    for position, row in enumerate(rows):
+        record_id = row.get("id")
+        yield str(position if record_id in (None, "") else record_id), row
+
+
+def last_completed_id(output_path):
+    """
+    Find the ID of the last fully written result, dropping any partial line.
+
+    Args:
+        output_path (str): Path to the JSONL results file
+
+    Returns:
+        str: The last completed ID, or None if nothing has been written yet
+    """
+    if not os.path.exists(output_path):
+        return None
+    with open(output_path, "rb+") as file:
+        file.seek(0, os.SEEK_END)
+        end = file.tell()
+        # Read backwards until the last complete line is found
+        block = b""
+        position = end
+        while position > 0 and block.count(b"\n") < 2:
+            step = min(4096, position)
+            position -= step
+            file.seek(position)
+            block = file.read(step) + block
+        if not block.endswith(b"\n"):
+            # A crash left a partial line behind; cut it off before appending
+            cut = block.rfind(b"\n") + 1
+            file.truncate(position + cut)
+            block = block[:cut]
+        lines = block.splitlines()
+        if not lines:
+            return None
+        return json.loads(lines[-1])["id"]
+
+
+def failed_ids(output_path):
+    """
+    Find the IDs whose most recent result in the output has an "error" status.
+
+    Args:
+        output_path (str): Path to the JSONL results file
+
+    Returns:
+        set: IDs to retry on the next run
+    """
+    failed = set()
+    with open(output_path, "r", encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            if result.get("status") == "error":
+                failed.add(result["id"])
+            else:
+                failed.discard(result["id"])
+    return failed
+
+
+def pending_records(records, output_path, resume_after):
+    """
+    Skip the records a previous run completed, keeping the ones that failed.
+
+    Args:
+        records (iterable): Records with an "id" key, in input order
+        output_path (str): Path to the JSONL results file
+        resume_after (str): ID of the last result written, or None to start from the top
+
+    Yields:
+        dict: Records that failed before the checkpoint, then every record after it
+    """
+    if resume_after is None:
+        yield from records
+        return
+    failed = failed_ids(output_path)
+    for record in records:
+        if record["id"] == resume_after:
+            if record["id"] in failed:
+                yield record
+            break
+        if record["id"] in failed:
+            yield record
+    yield from records
@@ -4,16 +4,11 @@ This script demonstrates chain-of-thought (CoT) prompting using OpenAI's API.
 CoT prompting encourages the model to reason step by step before answering.
 """
 
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+import argparse
+from llm_client import complete, acomplete, user_message
+from semantic_cache import semantic_cached
 
+@semantic_cached("chain_of_thought_prompt")
 def chain_of_thought_prompt(prompt_with_cot):
     """
     Send a chain-of-thought prompt to OpenAI's API and get a response.
@@ -23,21 +18,28 @@ def chain_of_thought_prompt(prompt_with_cot):
         str: The model's response.
     """
     try:
-        response = client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
-            messages=[
-                {"role": "user", "content": prompt_with_cot}
-            ],
-            temperature=float(os.getenv("OPENAI_TEMPERATURE", 0.7)),
-            max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", 200))
-        )
-        return response.choices[0].message.content.strip()
+        return complete(user_message(prompt_with_cot)).strip()
     except Exception as e:
         return f"Error: {str(e)}"
 
-def main():
+@semantic_cached("chain_of_thought_prompt")
+async def achain_of_thought_prompt(prompt_with_cot):
+    """
+    Async variant of chain_of_thought_prompt() for running many requests concurrently.
+    """
+    try:
+        return (await acomplete(user_message(prompt_with_cot))).strip()
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chain-of-thought reasoning")
+    parser.add_argument("--question", help="Question to reason through step by step",
+                        default="If there are 3 cars and each car has 4 wheels, how many wheels are there in total?")
+    args = parser.parse_args(argv)
+
     print("Example: Chain-of-Thought Reasoning")
-    question = "If there are 3 cars and each car has 4 wheels, how many wheels are there in total?"
+    question = args.question
     prompt = f"{question}\nLet's think step by step."
     response = chain_of_thought_prompt(prompt)
     print(f"Question: {question}")
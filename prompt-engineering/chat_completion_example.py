@@ -3,32 +3,54 @@ Chat Completion Example with OpenAI
 This script demonstrates how to create an interactive chat session with OpenAI's API.
 """
 
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+import time
+from llm_client import complete, stream
+from chat_history import TokenBudgetHistory
 
 class ChatSession:
-    def __init__(self):
-        """Initialize a new chat session with an empty message history."""
-        self.messages = [
-            {"role": "system", "content": "You are a helpful AI assistant."}
-        ]
+    def __init__(self, token_budget=3000, keep_recent=6, compaction="truncate"):
+        """
+        Initialize a new chat session with an empty message history.
+        
+        Args:
+            token_budget (int): Maximum tokens of history sent with each turn
+            keep_recent (int): Number of most recent messages that are never compacted
+            compaction (str): "truncate" to drop old turns or "summary" to summarize them
+        """
+        self.history = TokenBudgetHistory(
+            {"role": "system", "content": "You are a helpful AI assistant."},
+            token_budget=token_budget,
+            keep_recent=keep_recent,
+            compaction=compaction
+        )
+        # Per-turn timings recorded by stream_response()
+        self.turn_metrics = []
+    
+    @property
+    def messages(self):
+        """
+        The messages sent with the next request, as a read-only tuple.
+
+        Use add_message() or assign a new list so token counts stay in step.
+        """
+        return tuple(self.history.messages)
+    
+    @messages.setter
+    def messages(self, messages):
+        self.history.reset(messages)
     
     def add_message(self, role, content):
         """
-        Add a message to the chat history.
+        Add a message to the chat history, compacting older turns if needed.
         
         Args:
             role (str): Either 'user' or 'assistant'
             content (str): The message content
+
+        Raises:
+            ValueError: If the message alone does not fit the token budget
         """
-        self.messages.append({"role": role, "content": content})
+        self.history.append(role, content)
     
     def get_response(self):
         """
@@ -38,15 +60,41 @@ class ChatSession:
             str: The assistant's response
         """
         try:
-            response = client.chat.completions.create(
-                model=os.getenv("OPENAI_MODEL", "gpt-4.1-nano-2025-04-14"),
-                messages=self.messages,
-                temperature=float(os.getenv("OPENAI_TEMPERATURE", 0.7)),
-                max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", 150))
-            )
-            return response.choices[0].message.content
+            return complete(self.messages)
         except Exception as e:
             return f"Error: {str(e)}"
+    
+    def stream_response(self):
+        """
+        Stream a response from the OpenAI API, yielding text as it arrives.
+        
+        Once the stream finishes, the assembled reply is added to the chat
+        history and the turn's time-to-first-token and total latency are
+        appended to self.turn_metrics. If the stream fails, the pending user
+        message is removed so the history never holds two user turns in a row.
+        
+        Yields:
+            str: Pieces of the assistant's response
+        """
+        started = time.perf_counter()
+        first_token = None
+        parts = []
+        try:
+            for delta in stream(self.messages):
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                parts.append(delta)
+                yield delta
+        except Exception as e:
+            if self.history.messages[-1]["role"] == "user":
+                self.history.pop()
+            yield f"Error: {str(e)}"
+            return
+        self.turn_metrics.append({
+            "time_to_first_token": first_token,
+            "total_latency": time.perf_counter() - started,
+        })
+        self.add_message("assistant", "".join(parts))
 
 def main():
     # Create a new chat session
@@ -65,14 +113,23 @@ def main():
             break
         
         # Add user message to chat history
-        chat.add_message("user", user_input)
+        try:
+            chat.add_message("user", user_input)
+        except ValueError as e:
+            print(f"\nError: {str(e)}")
+            continue
         
-        # Get and print assistant's response
-        response = chat.get_response()
-        print(f"\nAssistant: {response}")
+        # Print the assistant's response as it streams in; the finished
+        # reply is added to the chat history by stream_response()
+        print("\nAssistant: ", end="", flush=True)
+        for delta in chat.stream_response():
+            print(delta, end="", flush=True)
+        print()
         
-        # Add assistant's response to chat history
-        chat.add_message("assistant", response)
+        if chat.turn_metrics:
+            metrics = chat.turn_metrics[-1]
+            if metrics["time_to_first_token"] is not None:
+                print(f"(first token {metrics['time_to_first_token']:.2f}s, total {metrics['total_latency']:.2f}s)")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""
+Token-Budgeted Chat History
+Keeps a chat history under a fixed token budget so each turn's request stays
+bounded no matter how long the session runs. Token counts are computed once
+per message when it is added, and older turns are compacted either by
+dropping them or by folding them into a rolling summary. The leading system
+message and the newest message are always kept whole; the other recent
+turns are kept too unless they alone exceed the budget, in which case the
+oldest of them are dropped. A message too large to fit beside the system
+message is rejected rather than cut.
+"""
+
+from llm_client import complete
+from token_utils import count_message_tokens, truncate_to_tokens
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+def summarize_messages(previous_summary, messages, max_tokens=200):
+    """
+    Fold older messages into a rolling conversation summary.
+
+    Args:
+        previous_summary (str): The current summary, or "" if none yet
+        messages (list): Messages being removed from the history
+        max_tokens (int): Length limit for the new summary
+
+    Returns:
+        str: The updated summary
+    """
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    prompt = f"""Update the summary of a conversation with the new messages below.
+    Keep facts, names, decisions and open questions. Be concise.
+
+    Current summary:
+    {previous_summary or "(none)"}
+
+    New messages:
+    {transcript}
+
+    Updated summary:"""
+    return complete([{"role": "user", "content": prompt}], temperature=0, max_tokens=max_tokens).strip()
+
+
+class TokenBudgetHistory:
+    def __init__(self, system_message, token_budget=3000, keep_recent=6,
+                 compaction="truncate", summarizer=summarize_messages, model=None):
+        """
+        Create a history that stays within a token budget.
+
+        Args:
+            system_message (dict): The system message, always kept first
+            token_budget (int): Maximum tokens for the whole history
+            keep_recent (int): Number of most recent messages never compacted
+            compaction (str): "truncate" to drop old turns or "summary" to summarize them
+            summarizer (callable): Called as summarizer(previous_summary, messages)
+            model (str): Model whose tokenizer is used for counting
+        """
+        if compaction not in ("truncate", "summary"):
+            raise ValueError(f"Unknown compaction strategy: {compaction}")
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.compaction = compaction
+        self.summarizer = summarizer
+        self.model = model
+        self.summary = ""
+        self.messages = []
+        self.token_counts = []
+        self.total_tokens = 0
+        self._append(system_message)
+
+    def _append(self, message):
+        tokens = count_message_tokens(message, self.model)
+        self.messages.append(message)
+        self.token_counts.append(tokens)
+        self.total_tokens += tokens
+
+    def _pop(self, index):
+        self.total_tokens -= self.token_counts.pop(index)
+        return self.messages.pop(index)
+
+    def append(self, role, content):
+        """
+        Add a message and compact older turns if the budget is exceeded.
+
+        Args:
+            role (str): Either 'user' or 'assistant'
+            content (str): The message content
+
+        Raises:
+            ValueError: If the message does not fit the budget beside the system message;
+                        it is not added
+        """
+        self._append({"role": role, "content": content})
+        if self.total_tokens > self.token_budget:
+            self._compact()
+
+    def pop(self):
+        """
+        Remove the newest message, e.g. a user turn whose request failed.
+
+        Returns:
+            dict: The removed message
+        """
+        return self._pop(len(self.messages) - 1)
+
+    def reset(self, messages):
+        """
+        Replace the history, keeping the first message as the system message.
+
+        Args:
+            messages (list): The new messages, system message first
+
+        Raises:
+            ValueError: If the last message does not fit the budget beside the
+                        system message; the others are kept
+        """
+        self.summary = ""
+        self.messages = []
+        self.token_counts = []
+        self.total_tokens = 0
+        for message in messages:
+            self._append(message)
+        if self.total_tokens > self.token_budget:
+            self._compact()
+
+    def _compact(self):
+        # Index 0 is the system message; index 1 holds the summary when there is one
+        first = 2 if self.summary else 1
+        if len(self.messages) > first and self.token_counts[0] + self.token_counts[-1] > self.token_budget:
+            tokens = self.token_counts[-1]
+            self._pop(len(self.messages) - 1)
+            raise ValueError(f"A {tokens}-token message does not fit the {self.token_budget}-token "
+                             f"budget beside the system message")
+        last = len(self.messages) - self.keep_recent
+        if last > first:
+            if self.compaction == "summary":
+                self._summarize(first, last)
+            else:
+                self._truncate(first, last)
+        self._enforce_budget()
+
+    def _truncate(self, first, last):
+        while self.total_tokens > self.token_budget and first < last:
+            self._pop(first)
+            last -= 1
+
+    def _summarize(self, first, last):
+        # Summarize every compactable message at once so the summarizer runs
+        # once per overflow rather than once per turn
+        summary_budget = max(self.token_budget // 4, 1)
+        try:
+            summary = self.summarizer(self.summary, self.messages[first:last])
+        except Exception:
+            # Losing the summary is better than losing the turn
+            self._truncate(first, last)
+            return
+        for _ in range(last - first):
+            self._pop(first)
+        if self.summary:
+            self._pop(1)
+        self.summary = truncate_to_tokens(summary, summary_budget, self.model)
+        summary_message = {"role": "system", "content": SUMMARY_PREFIX + self.summary}
+        tokens = count_message_tokens(summary_message, self.model)
+        self.messages.insert(1, summary_message)
+        self.token_counts.insert(1, tokens)
+        self.total_tokens += tokens
+
+    def _enforce_budget(self):
+        # The recent turns can exceed the budget on their own: drop the oldest of
+        # them, then the summary, but never the newest message, which _compact()
+        # has checked fits beside the system message
+        first = 2 if self.summary else 1
+        while self.total_tokens > self.token_budget and len(self.messages) - first > 1:
+            self._pop(first)
+        if self.total_tokens > self.token_budget and self.summary:
+            self._pop(1)
+            self.summary = ""
@@ -0,0 +1,79 @@
+"""
+Prompt Engineering CLI
+A single entry point for the examples:
+
+    python cli.py <command> [options]
+    python cli.py zero-shot --input texts.jsonl --concurrency 32
+    python cli.py rag --question "What is few-shot prompting?"
+
+Only the module behind the chosen command is imported, so `--help` and the
+command list load no SDK at all. The OpenAI client is created on the first
+request, and LangChain and CrewAI are only loaded by the summary and crew
+commands. Run `python cli.py <command> --help` for a command's options.
+"""
+
+import argparse
+import importlib
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CREW_DIR = os.path.join(os.path.dirname(HERE), "agents", "crew-ai")
+
+# Command name: (module, directory it lives in, one-line description)
+COMMANDS = {
+    "zero-shot": ("zero_shot_prompting", HERE, "Zero-shot sentiment classification, one text or a file"),
+    "few-shot": ("few_shot_prompting", HERE, "Few-shot translation with per-query example selection"),
+    "role": ("role_prompting", HERE, "Role-based prompting"),
+    "template": ("template_prompting", HERE, "Template-based prompting, one prompt or a file of rows"),
+    "rag": ("retrieval_augmented_prompting", HERE, "Retrieval-augmented prompting over a local corpus"),
+    "cot": ("chain_of_thought_prompting", HERE, "Chain-of-thought reasoning"),
+    "summary": ("basic_langchain_chain", HERE, "Summarize text with a LangChain map-reduce chain"),
+    "cobol": ("cobol_to_java_conversion", HERE, "Convert a COBOL program to Java"),
+    "cobol-batch": ("cobol_batch_convert", HERE, "Convert a tree of COBOL files to Java"),
+    "crew": ("main", CREW_DIR, "Merge and verify the JSON sources with CrewAI (runs in agents/crew-ai)"),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="Run a prompt engineering example",
+        epilog="Run 'cli.py <command> --help' for the options of a command.",
+    )
+    subparsers = parser.add_subparsers(dest="command", metavar="<command>", required=True)
+    for name, (_, _, description) in COMMANDS.items():
+        # The command's own parser handles its options, including --help
+        subparsers.add_parser(name, help=description, add_help=False)
+    return parser
+
+
+def load_command(name):
+    """
+    Import the module behind a command.
+
+    Args:
+        name (str): Command name from COMMANDS
+
+    Returns:
+        module: The imported module, which provides main(argv)
+    """
+    module_name, directory, _ = COMMANDS[name]
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    return importlib.import_module(module_name)
+
+
+def main(argv=None):
+    args, rest = build_parser().parse_known_args(argv)
+    # The crew example reads and writes its data/ files relative to its own directory
+    if args.command == "crew":
+        os.chdir(CREW_DIR)
+    module = load_command(args.command)
+    # Make the command's own usage line read "cli.py <command>"
+    sys.argv[0] = f"cli.py {args.command}"
+    module.main(rest)
+
+
+if __name__ == "__main__":
+    main()
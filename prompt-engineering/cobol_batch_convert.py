@@ -0,0 +1,209 @@
+"""
+Batch COBOL to Java Conversion
+This script converts a whole tree of COBOL programs and copybooks to Java.
+Files are converted concurrently, the output mirrors the input tree, and a
+content-hash manifest lets reruns skip unchanged files and resume cleanly
+after an interruption.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from cobol_to_java_conversion import aconvert_cobol_to_java, java_name, MODEL
+from token_utils import count_tokens
+
+COBOL_EXTENSIONS = (".cbl", ".cob", ".cpy")
+MANIFEST_NAME = ".conversion_manifest.jsonl"
+SUMMARY_NAME = "conversion_summary.json"
+
+def find_sources(source_dir):
+    """
+    Find every COBOL program and copybook under a directory.
+
+    Args:
+        source_dir (str): Root of the source tree
+
+    Returns:
+        list: Paths relative to source_dir, sorted
+    """
+    sources = []
+    for root, _, files in os.walk(source_dir):
+        for name in files:
+            if name.lower().endswith(COBOL_EXTENSIONS):
+                sources.append(os.path.relpath(os.path.join(root, name), source_dir))
+    return sorted(sources)
+
+def load_manifest(manifest_path):
+    """
+    Load the manifest of previous conversions.
+
+    The manifest is an append-only JSONL file; the last entry for a file wins.
+
+    Args:
+        manifest_path (str): Path to the manifest
+
+    Returns:
+        dict: Relative source path to its latest manifest entry
+    """
+    manifest = {}
+    if not os.path.exists(manifest_path):
+        return manifest
+    with open(manifest_path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A partial line left by an interrupted run
+                continue
+            manifest[entry["source"]] = entry
+    return manifest
+
+def output_path_for(relative_path, output_dir):
+    """Map a source file to its Java file, mirroring the source tree."""
+    directory, name = os.path.split(relative_path)
+    class_name = java_name(os.path.splitext(name)[0], class_name=True)
+    return os.path.join(output_dir, directory, f"{class_name}.java")
+
+def output_paths(sources, output_dir):
+    """
+    Map every source file to a distinct Java file.
+
+    Sources whose names map to the same class, such as PROG.cbl and PROG.cpy
+    or FOO-BAR.cbl and FOO_BAR.cbl, keep their extension in the class name
+    (ProgCbl, ProgCpy), and a number is appended if that still collides.
+    Names are compared case-insensitively so the result is safe on
+    case-insensitive file systems, and sources are taken in sorted order so
+    the mapping is the same on every run.
+
+    Args:
+        sources (list): Paths relative to the source root, from find_sources()
+        output_dir (str): Root of the Java output tree
+
+    Returns:
+        dict: Relative source path to its Java file path
+    """
+    by_target = {}
+    for relative_path in sources:
+        by_target.setdefault(output_path_for(relative_path, output_dir).lower(), []).append(relative_path)
+
+    paths = {}
+    for relative_path in sources:
+        target = output_path_for(relative_path, output_dir)
+        if len(by_target[target.lower()]) > 1:
+            directory, name = os.path.split(relative_path)
+            stem, extension = os.path.splitext(name)
+            class_name = java_name(f"{stem}-{extension.lstrip('.')}", class_name=True)
+            target = os.path.join(output_dir, directory, f"{class_name}.java")
+        paths[relative_path] = target
+
+    # FOO-BAR.cbl and FOO_BAR.cbl still collide with their extensions; number the later ones
+    taken = set()
+    for relative_path in sorted(paths):
+        target = base = paths[relative_path]
+        number = 1
+        while target.lower() in taken:
+            number += 1
+            target = f"{base[:-len('.java')]}{number}.java"
+        taken.add(target.lower())
+        paths[relative_path] = target
+    return paths
+
+async def convert_tree(source_dir, output_dir, workers=8):
+    """
+    Convert every COBOL file under source_dir into output_dir.
+
+    Args:
+        source_dir (str): Root of the COBOL source tree
+        output_dir (str): Root of the Java output tree
+        workers (int): Number of files converted concurrently
+
+    Returns:
+        dict: Summary of the run, also written to conversion_summary.json.
+              Token totals are tiktoken counts of the COBOL input and Java output.
+              A file that cannot be read, converted or written is recorded as
+              failed without stopping the others.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    semaphore = asyncio.Semaphore(workers)
+    summary = {"converted": 0, "skipped": 0, "failed": [], "input_tokens": 0, "output_tokens": 0}
+    started = time.perf_counter()
+
+    sources = find_sources(source_dir)
+    targets = output_paths(sources, output_dir)
+
+    with open(manifest_path, "a", encoding="utf-8") as manifest_file:
+        def record(entry):
+            # One line per finished file, flushed immediately, so an interrupted run resumes here
+            manifest_file.write(json.dumps(entry) + "\n")
+            manifest_file.flush()
+
+        async def convert(relative_path):
+            try:
+                await convert_file(relative_path)
+            except Exception as e:
+                error = f"Error: {type(e).__name__}: {e}"
+                summary["failed"].append({"source": relative_path, "error": error})
+                record({"source": relative_path, "sha256": None,
+                        "output": os.path.relpath(targets[relative_path], output_dir),
+                        "status": "error", "error": error})
+
+        async def convert_file(relative_path):
+            async with semaphore:
+                with open(os.path.join(source_dir, relative_path), "r", encoding="utf-8", errors="replace") as file:
+                    cobol_code = file.read()
+                digest = hashlib.sha256(cobol_code.encode("utf-8")).hexdigest()
+                target = targets[relative_path]
+                previous = manifest.get(relative_path)
+                if previous and previous["sha256"] == digest and previous["status"] == "ok" and os.path.exists(target):
+                    summary["skipped"] += 1
+                    return
+                java_code = await aconvert_cobol_to_java(cobol_code)
+
+            entry = {"source": relative_path, "sha256": digest, "output": os.path.relpath(target, output_dir)}
+            if java_code is None or java_code.startswith("Error:"):
+                entry.update(status="error", error=java_code)
+                summary["failed"].append({"source": relative_path, "error": java_code})
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, "w", encoding="utf-8") as file:
+                    file.write(java_code)
+                input_tokens = count_tokens(cobol_code, MODEL)
+                output_tokens = count_tokens(java_code, MODEL)
+                entry.update(status="ok", input_tokens=input_tokens, output_tokens=output_tokens)
+                summary["converted"] += 1
+                summary["input_tokens"] += input_tokens
+                summary["output_tokens"] += output_tokens
+            record(entry)
+
+        await asyncio.gather(*(convert(path) for path in sources))
+
+    elapsed = time.perf_counter() - started
+    summary.update(
+        files=len(sources),
+        elapsed_seconds=round(elapsed, 3),
+        files_per_second=round(summary["converted"] / elapsed, 3) if elapsed else 0.0
+    )
+    with open(os.path.join(output_dir, SUMMARY_NAME), "w", encoding="utf-8") as file:
+        json.dump(summary, file, indent=2)
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a tree of COBOL files to Java")
+    parser.add_argument("source_dir", help="Directory containing .cbl, .cob and .cpy files")
+    parser.add_argument("output_dir", help="Directory to write the Java files to")
+    parser.add_argument("--workers", type=int, default=8, help="Files converted concurrently")
+    args = parser.parse_args(argv)
+
+    summary = asyncio.run(convert_tree(args.source_dir, args.output_dir, args.workers))
+    print(f"Converted {summary['converted']} files, skipped {summary['skipped']} unchanged, "
+          f"{len(summary['failed'])} failed in {summary['elapsed_seconds']}s "
+          f"({summary['files_per_second']} files/s, "
+          f"{summary['input_tokens'] + summary['output_tokens']} tokens).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+COBOL Source Chunking
+Splits a COBOL program along DIVISION, SECTION and paragraph boundaries so
+that large programs can be converted in pieces. Each PROCEDURE DIVISION
+chunk is paired with only the DATA DIVISION records it references, which
+keeps every request small while still giving the model the declarations it
+needs, and the DATA DIVISION records themselves are packed into groups of
+the same size so a large record layout is converted in pieces too.
+"""
+
+import re
+from token_utils import count_tokens
+
+DIVISION_RE = re.compile(r"^\s*(IDENTIFICATION|ID|ENVIRONMENT|DATA|PROCEDURE)\s+DIVISION\b", re.IGNORECASE)
+HEADER_RE = re.compile(r"^\s*([A-Z0-9][A-Z0-9-]*)(\s+SECTION)?\s*\.\s*$", re.IGNORECASE)
+RECORD_RE = re.compile(r"^\s*(01|77|FD|SD)\s+([A-Z0-9][A-Z0-9-]*)", re.IGNORECASE)
+ITEM_RE = re.compile(r"^\s*\d{2}\s+([A-Z0-9][A-Z0-9-]*)", re.IGNORECASE)
+WORD_RE = re.compile(r"[A-Z0-9][A-Z0-9-]*", re.IGNORECASE)
+
+# Name given to PROCEDURE DIVISION code before the first paragraph, so it becomes
+# a method of its own; execution starts there
+ENTRY_PARAGRAPH = "PROCEDURE-ENTRY"
+
+# Single-word statements that look like paragraph headers
+STATEMENT_WORDS = {"EXIT", "GOBACK", "CONTINUE", "STOP", "END-IF", "END-PERFORM", "END-EVALUATE", "END-READ"}
+
+
+def _code(line):
+    """Return the code part of a source line, or "" for comment lines."""
+    # Fixed-format sources carry a sequence area in columns 1-6 and an indicator in column 7
+    if len(line) > 6 and line[:6].strip().isdigit():
+        if line[6:7] in ("*", "/"):
+            return ""
+        return line[7:72]
+    if line.lstrip().startswith(("*>", "*")):
+        return ""
+    return line
+
+
+def _in_area_a(line):
+    """Whether a line's code starts in area A (columns 8-11), where paragraph names go."""
+    code = _code(line)
+    indent = len(code) - len(code.lstrip())
+    if len(line) > 6 and line[:6].strip().isdigit():
+        return indent <= 3
+    return indent <= 10
+
+
+def split_divisions(source):
+    """
+    Split a COBOL program into its divisions.
+
+    Args:
+        source (str): The COBOL program
+
+    Returns:
+        dict: Division name ("IDENTIFICATION", "ENVIRONMENT", "DATA", "PROCEDURE") to its text
+    """
+    divisions = {}
+    current = None
+    for line in source.splitlines():
+        match = DIVISION_RE.match(_code(line))
+        if match:
+            current = match.group(1).upper()
+            if current == "ID":
+                current = "IDENTIFICATION"
+            divisions[current] = []
+        if current is not None:
+            divisions[current].append(line)
+    return {name: "\n".join(lines) for name, lines in divisions.items()}
+
+
+def split_paragraphs(procedure_text):
+    """
+    Split the PROCEDURE DIVISION into sections and paragraphs.
+
+    Args:
+        procedure_text (str): The PROCEDURE DIVISION text
+
+    Returns:
+        list: (name, text) pairs in source order; name is None for code before the first paragraph
+    """
+    paragraphs = []
+    name, lines = None, []
+    for line in procedure_text.splitlines():
+        code = _code(line)
+        if DIVISION_RE.match(code):
+            continue
+        match = HEADER_RE.match(code)
+        if match and _in_area_a(line) and match.group(1).upper() not in STATEMENT_WORDS:
+            if lines and any(_code(l).strip() for l in lines):
+                paragraphs.append((name, "\n".join(lines)))
+            name, lines = match.group(1).upper() + (" SECTION" if match.group(2) else ""), []
+        lines.append(line)
+    if lines and any(_code(l).strip() for l in lines):
+        paragraphs.append((name, "\n".join(lines)))
+    return paragraphs
+
+
+def split_data_records(data_text):
+    """
+    Split the DATA DIVISION into top-level records (01/77 levels and FD/SD entries).
+
+    Args:
+        data_text (str): The DATA DIVISION text
+
+    Returns:
+        list: Dicts with "name", "names" (the record and all its subordinate items) and "text"
+    """
+    records = []
+    current = None
+    for line in data_text.splitlines():
+        code = _code(line)
+        match = RECORD_RE.match(code)
+        if match:
+            current = {"name": match.group(2).upper(), "names": {match.group(2).upper()}, "lines": [line]}
+            records.append(current)
+            continue
+        if current is None or re.match(r"^\s*[A-Z-]+\s+SECTION\s*\.", code, re.IGNORECASE):
+            current = None
+            continue
+        current["lines"].append(line)
+        item = ITEM_RE.match(code)
+        if item:
+            current["names"].add(item.group(1).upper())
+    return [{"name": r["name"], "names": r["names"], "text": "\n".join(r["lines"])} for r in records]
+
+
+def referenced_records(text, records):
+    """Return the data records whose names appear in a piece of PROCEDURE DIVISION code."""
+    words = {word.upper() for word in WORD_RE.findall(text)}
+    return [record for record in records if record["names"] & words]
+
+
+def perform_sections(paragraphs):
+    """
+    Make each SECTION run its paragraphs when it is performed.
+
+    PERFORM of a section executes the section's own code and then every
+    paragraph up to the next section. Paragraphs become separate methods, so
+    a PERFORM of each one, in order, is appended to the section's code.
+
+    Args:
+        paragraphs (list): (name, text) pairs from split_paragraphs()
+
+    Returns:
+        list: The same pairs, with section texts extended
+    """
+    members = {}
+    section = None
+    for name, _ in paragraphs:
+        if name is not None and name.endswith(" SECTION"):
+            section = name
+            members[section] = []
+        elif section is not None and name is not None:
+            members[section].append(name)
+    return [
+        (name, text + "".join(f"\n           PERFORM {member}." for member in members[name]))
+        if members.get(name) else (name, text)
+        for name, text in paragraphs
+    ]
+
+
+def group_records(records, max_tokens=1500, model=None):
+    """
+    Pack DATA DIVISION records, in source order, into groups of at most max_tokens.
+
+    A single record larger than max_tokens gets a group of its own.
+
+    Args:
+        records (list): Records from split_data_records()
+        max_tokens (int): Token budget for the declarations in one group
+        model (str): Model whose tokenizer is used for counting
+
+    Returns:
+        list: Lists of records
+    """
+    groups, current, current_tokens = [], [], 0
+    for record in records:
+        tokens = count_tokens(record["text"], model)
+        if current and current_tokens + tokens > max_tokens:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(record)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+def chunk_program(source, max_tokens=1500, model=None):
+    """
+    Split a COBOL program into conversion chunks.
+
+    Paragraphs are packed greedily into chunks of at most max_tokens; a single
+    paragraph larger than that is split on statement boundaries. Code before
+    the first paragraph gets an ENTRY_PARAGRAPH header (made unique if a
+    paragraph already has that name), so it is converted like any other
+    paragraph and comes first in the chunk list. Sections perform their
+    paragraphs (see perform_sections()).
+
+    Args:
+        source (str): The COBOL program
+        max_tokens (int): Token budget for the PROCEDURE DIVISION code in one chunk
+        model (str): Model whose tokenizer is used for counting
+
+    Returns:
+        dict: "divisions" (from split_divisions), "records" (from split_data_records)
+              "record_groups" (from group_records()) and "chunks", a list of
+              dicts with "paragraphs", "text" and "records"
+    """
+    divisions = split_divisions(source)
+    records = split_data_records(divisions.get("DATA", ""))
+    paragraphs = split_paragraphs(divisions.get("PROCEDURE", ""))
+    if paragraphs and paragraphs[0][0] is None:
+        taken = {name for name, _ in paragraphs}
+        entry, number = ENTRY_PARAGRAPH, 1
+        while entry in taken:
+            number += 1
+            entry = f"{ENTRY_PARAGRAPH}-{number}"
+        paragraphs[0] = (entry, f"       {entry}.\n{paragraphs[0][1]}")
+    pieces = []
+    for name, text in perform_sections(paragraphs):
+        tokens = count_tokens(text, model)
+        if tokens <= max_tokens:
+            pieces.append((name, text, tokens))
+            continue
+        # Oversized paragraph: cut after sentence-ending lines into NAME, NAME-PART-2, ...
+        # and chain the parts with a PERFORM so control flow is preserved
+        parts, part, part_tokens = [], [], 0
+        for line in text.splitlines():
+            line_tokens = count_tokens(line, model) + 1
+            if part and part_tokens + line_tokens > max_tokens and part[-1].rstrip().endswith("."):
+                parts.append((part, part_tokens))
+                part, part_tokens = [], 0
+            part.append(line)
+            part_tokens += line_tokens
+        if part:
+            parts.append((part, part_tokens))
+        for number, (lines, tokens) in enumerate(parts, start=1):
+            part_name = name if number == 1 else f"{name}-PART-{number}"
+            if number > 1:
+                lines = [f"       {part_name}."] + lines
+            if number < len(parts):
+                lines = lines + [f"           PERFORM {name}-PART-{number + 1}."]
+            pieces.append((part_name, "\n".join(lines), tokens))
+
+    chunks = []
+    current, current_tokens = [], 0
+    for piece in pieces:
+        if current and current_tokens + piece[2] > max_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += piece[2]
+    if current:
+        chunks.append(current)
+
+    result = []
+    for chunk in chunks:
+        text = "\n".join(piece[1] for piece in chunk)
+        names = []
+        for piece in chunk:
+            if piece[0] not in names:
+                names.append(piece[0])
+        result.append({"paragraphs": names, "text": text, "records": referenced_records(text, records)})
+    return {"divisions": divisions, "records": records,
+            "record_groups": group_records(records, max_tokens, model), "chunks": result}
@@ -3,15 +3,13 @@ COBOL to Java Program Conversion
 This script demonstrates COBOL to Java conversion using OpenAI's API.
 """
 
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+import argparse
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+from llm_client import complete, acomplete
+from cobol_chunking import chunk_program
+from token_utils import count_tokens
 
 def read_file(file_path):
     """
@@ -43,18 +41,7 @@ def write_file(file_path, content):
     except Exception as e:
         print(f"Error writing file: {str(e)}")
 
-def convert_cobol_to_java(cobol_code):
-    """
-    Convert COBOL code to Java using OpenAI's API.
-    
-    Args:
-        cobol_code (str): The COBOL code to convert
-        
-    Returns:
-        str: The converted Java code
-    """
-    try:
-        system_prompt = """You are an expert COBOL to Java conversion specialist with deep knowledge of both languages.
+SYSTEM_PROMPT = """You are an expert COBOL to Java conversion specialist with deep knowledge of both languages.
         Your task is to convert COBOL code to Java while following these strict guidelines:
         1. Follow Java naming conventions (camelCase for variables, PascalCase for classes)
         2. Use proper Java data types that match COBOL data types
@@ -74,30 +61,274 @@ def convert_cobol_to_java(cobol_code):
         
         Return only the Java code without any additional explanations or markdown formatting.
         The code should be immediately compilable and runnable."""
-        
-        user_prompt = f"""Convert the following COBOL code to Java while strictly following the guidelines above.
+
+MODEL = "gpt-4.1-nano-2025-04-14"
+TEMPERATURE = 0.3  # Lower temperature for more consistent output
+
+# Programs larger than this are split and converted chunk by chunk
+CHUNK_THRESHOLD_TOKENS = 3000
+
+def _conversion_messages(cobol_code):
+    user_prompt = f"""Convert the following COBOL code to Java while strictly following the guidelines above.
         Ensure the converted code is production-ready and follows all Java standards.
         
         COBOL Code:
         {cobol_code}
         """
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+
+def convert_cobol_to_java(cobol_code):
+    """
+    Convert COBOL code to Java using OpenAI's API.
+    
+    Programs larger than CHUNK_THRESHOLD_TOKENS are converted in concurrent
+    chunks on a thread pool, so this works whether or not an event loop is
+    already running; async callers should use aconvert_cobol_to_java().
+    
+    Args:
+        cobol_code (str): The COBOL code to convert
         
-        response = client.chat.completions.create(
-            model="gpt-4.1-nano-2025-04-14",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.3,  # Lower temperature for more consistent output
+    Returns:
+        str: The converted Java code
+    """
+    try:
+        if count_tokens(cobol_code, MODEL) > CHUNK_THRESHOLD_TOKENS:
+            return convert_cobol_to_java_chunked_sync(cobol_code)
+        
+        return complete(
+            _conversion_messages(cobol_code),
+            model=MODEL,
+            temperature=TEMPERATURE,
             max_tokens=2000  # Increased tokens for more complex conversions
         )
-        return response.choices[0].message.content
     except Exception as e:
         return f"Error: {str(e)}"
 
-def main():
+async def aconvert_cobol_to_java(cobol_code):
+    """
+    Async variant of convert_cobol_to_java() for converting many programs concurrently.
+    """
+    try:
+        if count_tokens(cobol_code, MODEL) > CHUNK_THRESHOLD_TOKENS:
+            return await convert_cobol_to_java_chunked(cobol_code)
+        
+        return await acomplete(
+            _conversion_messages(cobol_code),
+            model=MODEL,
+            temperature=TEMPERATURE,
+            max_tokens=2000
+        )
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+def java_name(cobol_name, class_name=False):
+    """
+    Turn a COBOL name such as MAIN-PROCEDURE into mainProcedure (or MainProcedure).
+    
+    Args:
+        cobol_name (str): The COBOL data or paragraph name
+        class_name (bool): Whether to capitalize the first word
+        
+    Returns:
+        str: The Java identifier
+    """
+    words = [word for word in re.split(r"[^A-Za-z0-9]+", cobol_name.replace(" SECTION", "")) if word]
+    name = "".join(word.capitalize() for word in words)
+    if not class_name:
+        name = name[:1].lower() + name[1:]
+    if not name or name[0].isdigit():
+        name = ("C" if class_name else "c") + name
+    return name
+
+def strip_code_fences(text):
+    """Remove markdown code fences the model may add despite instructions."""
+    lines = [line for line in text.strip().splitlines() if not line.strip().startswith("```")]
+    return "\n".join(lines)
+
+def _naming_table(names, class_name=False):
+    return "\n".join(f"{name} -> {java_name(name, class_name)}" for name in sorted(names))
+
+def _skeleton_messages(parsed, class_name, first_method):
+    divisions = parsed["divisions"]
+    declarations = "\n\n".join(
+        divisions[name] for name in ("IDENTIFICATION", "ENVIRONMENT") if name in divisions
+    )
+    user_prompt = f"""Convert the following COBOL declarations into the skeleton of a Java class named {class_name}.
+        Include the package declaration, imports, a no-argument constructor, a public static void
+        main(String[] args) that creates the class and calls run(), and a public void run() that
+        calls {first_method}().
+        Do NOT declare fields for the DATA DIVISION items and do NOT write methods for the PROCEDURE
+        DIVISION paragraphs; both are converted separately and will be inserted before the final
+        closing brace of the class.
+        
+        COBOL Code:
+        {declarations}
+        """
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+
+def _fields_messages(records):
+    declarations = "\n".join(record["text"] for record in records)
+    field_names = set().union(*(record["names"] for record in records))
+    user_prompt = f"""Convert the following COBOL DATA DIVISION records into field declarations
+        of an existing class. Declare one field per data item and apply each VALUE clause as the
+        field's initializer; a group item may become a nested static class. Write the declarations
+        and nothing else: no package, no class declaration, no methods. If a declaration needs an
+        import, put the import lines first.
+        
+        Use exactly these Java field names:
+        {_naming_table(field_names)}
+        
+        COBOL Code:
+        {declarations}
+        """
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+
+def _chunk_messages(chunk, paragraph_names):
+    declarations = "\n".join(record["text"] for record in chunk["records"])
+    field_names = set().union(*(record["names"] for record in chunk["records"])) if chunk["records"] else set()
+    user_prompt = f"""Convert the following COBOL PROCEDURE DIVISION paragraphs into private Java methods
+        of an existing class. Write one method per paragraph and nothing else: no package, no class
+        declaration. If a method needs an import, put the import lines first.
+        Convert PERFORM of a paragraph into a call of its method.
+        
+        The class already declares these fields (COBOL name -> Java field):
+        {_naming_table(field_names)}
+        
+        A paragraph ending in SECTION becomes a method named after the section that runs its
+        own code and then its PERFORM statements in order.
+        
+        Use these method names (COBOL paragraph -> Java method):
+        {_naming_table(paragraph_names)}
+        
+        Data declarations for reference:
+        {declarations}
+        
+        COBOL Code:
+        {chunk["text"]}
+        """
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+
+def _chunked_requests(cobol_code, max_chunk_tokens):
+    """
+    Split a program and build its requests: the class skeleton, one request
+    per group of DATA DIVISION records and one per chunk of paragraphs.
+    
+    Returns:
+        list: Message lists, the skeleton's first and then in program order
+    """
+    parsed = chunk_program(cobol_code, max_chunk_tokens, MODEL)
+    program = re.search(r"PROGRAM-ID\.\s*([A-Z0-9-]+)", cobol_code, re.IGNORECASE)
+    class_name = java_name(program.group(1) if program else "ConvertedProgram", class_name=True)
+    paragraph_names = [name for chunk in parsed["chunks"] for name in chunk["paragraphs"]]
+    # Execution starts at the first paragraph, or at the code before it, which
+    # chunk_program() names ENTRY_PARAGRAPH
+    first_method = java_name(paragraph_names[0]) if paragraph_names else "execute"
+    return ([_skeleton_messages(parsed, class_name, first_method)]
+            + [_fields_messages(records) for records in parsed["record_groups"]]
+            + [_chunk_messages(chunk, paragraph_names) for chunk in parsed["chunks"]])
+
+def _complete_chunk(messages):
+    return strip_code_fences(complete(messages, model=MODEL, temperature=TEMPERATURE, max_tokens=4000))
+
+async def _acomplete_chunk(messages):
+    return strip_code_fences(await acomplete(messages, model=MODEL, temperature=TEMPERATURE, max_tokens=4000))
+
+def stitch_java(skeleton, member_blocks):
+    """
+    Combine the class skeleton and converted members into one compilation unit.
+    
+    Import lines from the member blocks are merged into the skeleton's imports,
+    and the fields and methods are inserted before the class's final closing brace.
+    
+    Args:
+        skeleton (str): Java class skeleton
+        member_blocks (list): Converted field declarations and methods, in program order
+        
+    Returns:
+        str: The complete Java source
+    """
+    skeleton_lines = skeleton.rstrip().splitlines()
+    imports = [line for line in skeleton_lines if line.startswith("import ")]
+    members = []
+    for block in member_blocks:
+        for line in block.splitlines():
+            if line.startswith("import "):
+                if line not in imports:
+                    imports.append(line)
+            else:
+                members.append(line)
+    
+    body = [line for line in skeleton_lines if not line.startswith("import ")]
+    header_end = next((i + 1 for i, line in enumerate(body) if line.startswith("package ")), 0)
+    closing = max((i for i, line in enumerate(body) if line.strip() == "}"), default=len(body))
+    rest = body[header_end:closing]
+    while rest and not rest[0].strip():
+        rest.pop(0)
+    header = body[:header_end] + ([""] if header_end else [])
+    if imports:
+        header += imports + [""]
+    return "\n".join(header + rest + [""] + members + body[closing:]) + "\n"
+
+async def convert_cobol_to_java_chunked(cobol_code, max_chunk_tokens=1500, concurrency=8):
+    """
+    Convert a large COBOL program by splitting it and converting the pieces concurrently.
+    
+    The IDENTIFICATION and ENVIRONMENT divisions become a Java class skeleton,
+    each group of DATA DIVISION records becomes a set of fields and each chunk
+    of paragraphs becomes a set of methods; all requests run at once (up to
+    concurrency), so wall time follows the largest chunk rather than the
+    program length.
+    
+    Args:
+        cobol_code (str): The COBOL code to convert
+        max_chunk_tokens (int): Token budget for the PROCEDURE DIVISION code in one chunk
+        concurrency (int): Maximum number of requests in flight
+        
+    Returns:
+        str: The converted Java code
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def limited(messages):
+        async with semaphore:
+            return await _acomplete_chunk(messages)
+    
+    skeleton, *member_blocks = await asyncio.gather(
+        *(limited(messages) for messages in _chunked_requests(cobol_code, max_chunk_tokens))
+    )
+    return stitch_java(skeleton, member_blocks)
+
+def convert_cobol_to_java_chunked_sync(cobol_code, max_chunk_tokens=1500, concurrency=8):
+    """
+    Synchronous variant of convert_cobol_to_java_chunked() that runs the requests on a thread pool.
+    
+    It needs no event loop, so it can be called from notebooks and from code
+    that is already inside one.
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        skeleton, *member_blocks = pool.map(_complete_chunk, _chunked_requests(cobol_code, max_chunk_tokens))
+    return stitch_java(skeleton, member_blocks)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a COBOL program to Java")
+    parser.add_argument("--input", default="sample.cbl", help="COBOL source file")
+    parser.add_argument("--output", default="java_ai.java", help="Java file to write")
+    args = parser.parse_args(argv)
+
     # Read the COBOL file
-    cobol_code = read_file("sample.cbl")
+    cobol_code = read_file(args.input)
     if cobol_code.startswith("Error"):
         print(cobol_code)
         return
@@ -107,8 +338,8 @@ def main():
     java_code = convert_cobol_to_java(cobol_code)
     
     # Save the Java code to a file
-    write_file("java_ai.java", java_code)
-    print("Conversion complete. Java code saved to java_ai.java")
+    write_file(args.output, java_code)
+    print(f"Conversion complete. Java code saved to {args.output}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
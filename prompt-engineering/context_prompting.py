@@ -4,16 +4,10 @@ This script demonstrates context-based prompting using OpenAI's API.
 Context prompting provides relevant background or situational information to guide the model's response.
 """
 
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from llm_client import complete, acomplete, user_message
+from semantic_cache import semantic_cached
 
+@semantic_cached("context_prompt")
 def context_prompt(prompt_with_context):
     """
     Send a context-based prompt to OpenAI's API and get a response.
@@ -23,15 +17,17 @@ def context_prompt(prompt_with_context):
         str: The model's response.
     """
     try:
-        response = client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
-            messages=[
-                {"role": "user", "content": prompt_with_context}
-            ],
-            temperature=float(os.getenv("OPENAI_TEMPERATURE", 0.7)),
-            max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", 150))
-        )
-        return response.choices[0].message.content.strip()
+        return complete(user_message(prompt_with_context)).strip()
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+@semantic_cached("context_prompt")
+async def acontext_prompt(prompt_with_context):
+    """
+    Async variant of context_prompt() for running many requests concurrently.
+    """
+    try:
+        return (await acomplete(user_message(prompt_with_context))).strip()
     except Exception as e:
         return f"Error: {str(e)}"
 
@@ -4,16 +4,10 @@ This script demonstrates contrastive prompting using OpenAI's API.
 Contrastive prompting provides multiple options or examples and asks the model to compare or choose between them.
 """
 
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from llm_client import complete, acomplete, user_message
+from semantic_cache import semantic_cached
 
+@semantic_cached("contrastive_prompt")
 def contrastive_prompt(prompt_with_options):
     """
     Send a contrastive prompt to OpenAI's API and get a response.
@@ -23,15 +17,17 @@ def contrastive_prompt(prompt_with_options):
         str: The model's response.
     """
     try:
-        response = client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
-            messages=[
-                {"role": "user", "content": prompt_with_options}
-            ],
-            temperature=float(os.getenv("OPENAI_TEMPERATURE", 0.7)),
-            max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", 150))
-        )
-        return response.choices[0].message.content.strip()
+        return complete(user_message(prompt_with_options)).strip()
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+@semantic_cached("contrastive_prompt")
+async def acontrastive_prompt(prompt_with_options):
+    """
+    Async variant of contrastive_prompt() for running many requests concurrently.
+    """
+    try:
+        return (await acomplete(user_message(prompt_with_options))).strip()
     except Exception as e:
         return f"Error: {str(e)}"
 
@@ -4,16 +4,21 @@ This script demonstrates demonstration-based prompting using OpenAI's API.
 Demonstration prompting provides the model with explicit demonstrations of how to perform a task before asking it to complete a similar task.
 """
 
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
+import argparse
+from llm_client import complete, acomplete, user_message
+from semantic_cache import semantic_cached
+from example_selector import ExampleSelector, load_examples
 
-# Load environment variables from .env file
-load_dotenv()
-
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Built-in demonstration bank; pass --examples to use a larger JSONL or CSV bank
+ARITHMETIC_DEMONSTRATIONS = [
+    {"input": "2 + 2", "output": "4"},
+    {"input": "5 + 7", "output": "12"},
+    {"input": "9 - 3", "output": "6"},
+    {"input": "4 * 6", "output": "24"},
+    {"input": "15 / 3", "output": "5"},
+]
 
+@semantic_cached("demonstration_prompt")
 def demonstration_prompt(prompt_with_demonstrations):
     """
     Send a demonstration-based prompt to OpenAI's API and get a response.
@@ -23,29 +28,31 @@ def demonstration_prompt(prompt_with_demonstrations):
         str: The model's response.
     """
     try:
-        response = client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
-            messages=[
-                {"role": "user", "content": prompt_with_demonstrations}
-            ],
-            temperature=float(os.getenv("OPENAI_TEMPERATURE", 0.7)),
-            max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", 150))
-        )
-        return response.choices[0].message.content.strip()
+        return complete(user_message(prompt_with_demonstrations)).strip()
     except Exception as e:
         return f"Error: {str(e)}"
 
-def main():
-    print("Example: Demonstration-Based Prompting")
-    demonstrations = """
-    Input: 2 + 2
-    Output: 4
-    
-    Input: 5 + 7
-    Output: 12
+@semantic_cached("demonstration_prompt")
+async def ademonstration_prompt(prompt_with_demonstrations):
+    """
+    Async variant of demonstration_prompt() for running many requests concurrently.
     """
-    query = "Input: 8 + 6\nOutput:"
-    prompt = f"{demonstrations}\n{query}"
+    try:
+        return (await acomplete(user_message(prompt_with_demonstrations))).strip()
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Demonstration prompting with per-query demonstration selection")
+    parser.add_argument("--examples", help="JSONL or CSV demonstration bank with input and output fields")
+    parser.add_argument("--query", default="8 + 6", help="Input to solve")
+    parser.add_argument("-k", type=int, default=2, help="Maximum demonstrations per prompt")
+    args = parser.parse_args(argv)
+
+    print("Example: Demonstration-Based Prompting")
+    demonstrations = load_examples(args.examples) if args.examples else ARITHMETIC_DEMONSTRATIONS
+    selector = ExampleSelector(demonstrations, k=args.k)
+    prompt = selector.build_prompt(args.query)
     response = demonstration_prompt(prompt)
     print(f"Prompt: {prompt}")
     print(f"Model's Response: {response}\n")
@@ -0,0 +1,199 @@
+"""
+Embedding Pipeline
+Computes embeddings for large sets of texts with as few API round trips as
+possible. Identical inputs are embedded once, vectors already computed are
+read from a local SQLite cache, and the remaining texts are packed into
+batches bounded by both input count and total tokens, with several batches
+in flight at once.
+
+An Embedder has the same transform(texts) interface as the hashing
+vectorizer in vector_index, so it can back a VectorIndex, a VectorStore or
+the few-shot example selector directly.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from batching import ordered_map
+from llm_client import embed, aembed, settings
+from token_utils import count_tokens, truncate_to_tokens
+from vector_index import normalize_rows
+
+
+class EmbeddingCache:
+    def __init__(self, path):
+        """
+        Open (or create) a persistent cache of embedding vectors.
+
+        Args:
+            path (str): SQLite database file
+        """
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+
+    def get_many(self, keys):
+        """
+        Look up cached vectors.
+
+        Args:
+            keys (list): Cache keys
+
+        Returns:
+            dict: Key to float32 vector, for the keys found
+        """
+        found = {}
+        with self._lock:
+            # Stay under SQLite's limit on bound parameters
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items):
+        """
+        Store vectors in one transaction.
+
+        Args:
+            items (list): (key, vector) pairs
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items],
+            )
+            self._conn.execute("COMMIT")
+
+
+def batch_texts(texts, max_batch_size=256, max_batch_tokens=100000, token_counts=None):
+    """
+    Group texts into request batches bounded by count and total tokens.
+
+    Args:
+        texts (list): Texts to embed
+        max_batch_size (int): Maximum inputs per request
+        max_batch_tokens (int): Maximum total tokens per request
+        token_counts (list): Token count per text; estimated when omitted
+
+    Returns:
+        list: Lists of indices into texts, one list per request
+    """
+    if token_counts is None:
+        token_counts = [count_tokens(text) for text in texts]
+    batches, current, current_tokens = [], [], 0
+    for i, tokens in enumerate(token_counts):
+        if current and (len(current) >= max_batch_size or current_tokens + tokens > max_batch_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class Embedder:
+    def __init__(self, model=None, max_batch_size=256, max_batch_tokens=100000, max_input_tokens=8191,
+                 concurrency=4, cache_path=None, use_cache=True):
+        """
+        Batched, deduplicated and cached embedding computation.
+
+        Args:
+            model (str): Embedding model, defaults to OPENAI_EMBEDDING_MODEL
+            max_batch_size (int): Maximum inputs per request
+            max_batch_tokens (int): Maximum total tokens per request
+            max_input_tokens (int): Longer inputs are truncated to this many tokens
+            concurrency (int): Batches in flight at once
+            cache_path (str): Vector cache file, defaults to EMBEDDING_CACHE_PATH
+            use_cache (bool): Whether to read and write the vector cache
+        """
+        self.model = model or settings.embedding_model
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_input_tokens = max_input_tokens
+        self.concurrency = concurrency
+        self.cache = EmbeddingCache(cache_path or settings.embedding_cache_path) if use_cache else None
+        self.stats = {"texts": 0, "unique": 0, "cache_hits": 0, "requests": 0, "embedded": 0}
+
+    def _key(self, text):
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _plan(self, texts):
+        """Deduplicate texts, read the cache and batch what is left to embed."""
+        keys = [self._key(text) for text in texts]
+        unique = dict(zip(keys, texts))
+        vectors = self.cache.get_many(list(unique)) if self.cache is not None else {}
+        missing = [key for key in unique if key not in vectors]
+        inputs, token_counts = [], []
+        for key in missing:
+            text = unique[key]
+            tokens = count_tokens(text, self.model)
+            if tokens > self.max_input_tokens:
+                text, tokens = truncate_to_tokens(text, self.max_input_tokens, self.model), self.max_input_tokens
+            inputs.append(text or " ")
+            token_counts.append(tokens)
+        batches = [
+            ([missing[i] for i in batch], [inputs[i] for i in batch])
+            for batch in batch_texts(inputs, self.max_batch_size, self.max_batch_tokens, token_counts)
+        ]
+        self.stats["texts"] += len(texts)
+        self.stats["unique"] += len(unique)
+        self.stats["cache_hits"] += len(vectors)
+        return keys, vectors, batches
+
+    def _store(self, vectors, batch_keys, embeddings):
+        items = list(zip(batch_keys, embeddings))
+        vectors.update((key, np.asarray(vector, dtype=np.float32)) for key, vector in items)
+        if self.cache is not None:
+            self.cache.put_many(items)
+        self.stats["requests"] += 1
+        self.stats["embedded"] += len(items)
+
+    def _assemble(self, keys, vectors):
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return normalize_rows(np.stack([vectors[key] for key in keys]))
+
+    def embed(self, texts):
+        """
+        Embed texts, calling the API only for inputs not seen before.
+
+        Args:
+            texts (list): Strings to embed
+
+        Returns:
+            np.ndarray: float32 matrix with one L2-normalized row per text
+        """
+        keys, vectors, batches = self._plan(texts)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = pool.map(lambda batch: embed(batch[1], self.model), batches)
+            for (batch_keys, _), embeddings in zip(batches, results):
+                self._store(vectors, batch_keys, embeddings)
+        return self._assemble(keys, vectors)
+
+    async def aembed(self, texts):
+        """
+        Async variant of embed() for use inside an event loop.
+
+        Returns:
+            np.ndarray: float32 matrix with one L2-normalized row per text
+        """
+        keys, vectors, batches = self._plan(texts)
+        async for (batch_keys, _), embeddings in ordered_map(
+            lambda batch: aembed(batch[1], self.model), batches, concurrency=self.concurrency
+        ):
+            self._store(vectors, batch_keys, embeddings)
+        return self._assemble(keys, vectors)
+
+    def transform(self, texts):
+        """Vectorizer interface used by VectorIndex; same as embed()."""
+        return self.embed(texts)
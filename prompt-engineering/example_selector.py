@@ -0,0 +1,132 @@
+"""
+Few-Shot Example Selection
+Picks the examples to show the model for each query from a bank of labeled
+input/output pairs, instead of pasting a fixed block into every prompt.
+
+The bank is vectorized once. Each query is scored against every example
+with a single matrix product, the closest candidates are re-ranked with
+maximal marginal relevance (MMR) so the chosen examples are both similar to
+the query and different from each other, and examples are added until the
+prompt's token budget is reached. Prompt size therefore stays constant no
+matter how large the bank grows.
+"""
+
+import csv
+import json
+import numpy as np
+from token_utils import count_tokens
+from vector_index import HashingVectorizer, top_k
+
+
+def load_examples(path, input_key="input", output_key="output"):
+    """
+    Load an example bank from a JSONL or CSV file.
+
+    Args:
+        path (str): File with one example per line (JSONL) or row (CSV)
+        input_key (str): Field holding the example input
+        output_key (str): Field holding the expected output
+
+    Returns:
+        list: Dicts with "input" and "output"
+    """
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(file))
+        else:
+            rows = [json.loads(line) for line in file if line.strip()]
+    return [{"input": str(row[input_key]), "output": str(row[output_key])} for row in rows]
+
+
+class ExampleSelector:
+    def __init__(self, examples, input_label="Input", output_label="Output", vectorizer=None,
+                 k=3, token_budget=400, diversity=0.3, candidates=20, model=None):
+        """
+        Index an example bank for per-query selection.
+
+        Args:
+            examples (list): Dicts with "input" and "output"
+            input_label (str): Label written before each input, e.g. "English"
+            output_label (str): Label written before each output, e.g. "French"
+            vectorizer: Object with transform(texts) returning normalized rows,
+                        such as an embedding_pipeline.Embedder; defaults to a
+                        HashingVectorizer fitted on the example inputs
+            k (int): Maximum examples per prompt
+            token_budget (int): Maximum tokens spent on examples per prompt
+            diversity (float): 0 ranks purely by similarity, 1 purely by novelty
+            candidates (int): Nearest examples considered for MMR re-ranking
+            model (str): Model whose tokenizer is used for the budget
+        """
+        self.examples = list(examples)
+        self.input_label = input_label
+        self.output_label = output_label
+        self.k = k
+        self.token_budget = token_budget
+        self.diversity = diversity
+        self.candidates = candidates
+        inputs = [example["input"] for example in self.examples]
+        self.vectorizer = vectorizer or HashingVectorizer().fit(inputs)
+        self.vectors = self.vectorizer.transform(inputs)
+        self.formatted = [self.format_example(example) for example in self.examples]
+        self.token_counts = np.array([count_tokens(text, model) for text in self.formatted])
+
+    def format_example(self, example):
+        """Render one example as it appears in the prompt."""
+        return f"{self.input_label}: {example['input']}\n{self.output_label}: {example['output']}"
+
+    def select(self, query, k=None):
+        """
+        Choose examples for a query.
+
+        Args:
+            query (str): The input the model will be asked about
+            k (int): Maximum examples, defaults to the selector's k
+
+        Returns:
+            list: Indices into the bank, least similar first so the closest
+                  example sits right before the query
+        """
+        k = self.k if k is None else k
+        if not self.examples:
+            return []
+        query_vector = self.vectorizer.transform([query])[0]
+        similarity = self.vectors @ query_vector
+        pool = top_k(similarity, max(self.candidates, k))
+        pool_vectors = self.vectors[pool]
+        relevance = similarity[pool]
+        redundancy = np.full(len(pool), -np.inf)
+        available = np.ones(len(pool), dtype=bool)
+        chosen, used_tokens = [], 0
+        while len(chosen) < k and available.any():
+            if chosen:
+                score = (1 - self.diversity) * relevance - self.diversity * redundancy
+            else:
+                score = relevance.copy()
+            score[~available] = -np.inf
+            best = int(np.argmax(score))
+            available[best] = False
+            tokens = self.token_counts[pool[best]]
+            if used_tokens + tokens > self.token_budget:
+                continue
+            chosen.append(best)
+            used_tokens += tokens
+            redundancy = np.maximum(redundancy, pool_vectors @ pool_vectors[best])
+        chosen.sort(key=lambda i: relevance[i])
+        return [int(pool[i]) for i in chosen]
+
+    def build_prompt(self, query, instructions=None, k=None):
+        """
+        Build a few-shot prompt with the examples selected for a query.
+
+        Args:
+            query (str): The input the model will be asked about
+            instructions (str): Optional text placed before the examples
+            k (int): Maximum examples, defaults to the selector's k
+
+        Returns:
+            str: The prompt, ending with the output label for the model to complete
+        """
+        parts = [instructions] if instructions else []
+        parts.extend(self.formatted[i] for i in self.select(query, k))
+        parts.append(f"{self.input_label}: {query}\n{self.output_label}:")
+        return "\n\n".join(parts)
@@ -5,16 +5,21 @@ Few-shot prompting provides the model with a small number of examples
 (shots) of the desired task format or output before asking the actual question.
 """
 
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
+import argparse
+from llm_client import complete, acomplete, user_message
+from semantic_cache import semantic_cached
 
-# Load environment variables from .env file
-load_dotenv()
-
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Built-in example bank; pass --examples to use a larger JSONL or CSV bank
+TRANSLATION_EXAMPLES = [
+    {"input": "sea otter", "output": "loutre de mer"},
+    {"input": "peppermint", "output": "menthe poivrée"},
+    {"input": "plush girafe", "output": "girafe en peluche"},
+    {"input": "goat cheese", "output": "fromage de chèvre"},
+    {"input": "blue cheese", "output": "fromage bleu"},
+    {"input": "bread", "output": "pain"},
+]
 
+@semantic_cached("few_shot_prompt")
 def few_shot_prompt(prompt_with_examples):
     """
     Send a few-shot prompt to OpenAI's API and get a response.
@@ -26,39 +31,42 @@ def few_shot_prompt(prompt_with_examples):
         str: The model's response.
     """
     try:
-        response = client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
-            messages=[
-                {"role": "user", "content": prompt_with_examples}
-            ],
-            temperature=float(os.getenv("OPENAI_TEMPERATURE", 0.7)),
-            max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", 150)),
-            stop=["\n\n"] # Often helpful to stop generation after the answer
-        )
-        return response.choices[0].message.content.strip()
+        return complete(user_message(prompt_with_examples), stop=["\n\n"]).strip()
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+@semantic_cached("few_shot_prompt")
+async def afew_shot_prompt(prompt_with_examples):
+    """
+    Async variant of few_shot_prompt() for running many requests concurrently.
+    """
+    try:
+        return (await acomplete(user_message(prompt_with_examples), stop=["\n\n"])).strip()
     except Exception as e:
         return f"Error: {str(e)}"
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Few-shot translation with per-query example selection")
+    parser.add_argument("--examples", help="JSONL or CSV example bank with input and output fields")
+    parser.add_argument("--word", default="cheese", help="Word to translate")
+    parser.add_argument("-k", type=int, default=3, help="Maximum examples per prompt")
+    args = parser.parse_args(argv)
+
     # Example: Simple English to French translation with examples
     print("Example: Few-Shot English to French Translation")
     
-    # Provide a few examples (shots) in the prompt
-    examples = """
-    English: sea otter
-    French: loutre de mer
-    
-    English: peppermint
-    French: menthe poivrée
-    
-    English: plush girafe
-    French: girafe en peluche
-    """
+    # Pick the most similar, non-redundant examples (shots) for this word
+    # Imported here so --help does not load NumPy and tiktoken
+    from example_selector import ExampleSelector, load_examples
+
+    examples = load_examples(args.examples) if args.examples else TRANSLATION_EXAMPLES
+    selector = ExampleSelector(examples, input_label="English", output_label="French", k=args.k)
     
-    word_to_translate = "cheese"
-    prompt = f"{examples}\nEnglish: {word_to_translate}\nFrench:"
+    word_to_translate = args.word
+    prompt = selector.build_prompt(word_to_translate)
     
     response = few_shot_prompt(prompt)
+    print(f"Prompt: {prompt}")
     print(f"English: {word_to_translate}")
     print(f"French Translation: {response}\n")
 
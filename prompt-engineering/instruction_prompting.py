@@ -4,16 +4,10 @@ This script demonstrates instruction prompting using OpenAI's API.
 Instruction prompting gives the model a clear, direct instruction to perform a specific task.
 """
 
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from llm_client import complete, acomplete, user_message
+from semantic_cache import semantic_cached
 
+@semantic_cached("instruction_prompt")
 def instruction_prompt(prompt_instruction):
     """
     Send an instruction prompt to OpenAI's API and get a response.
@@ -23,15 +17,17 @@ def instruction_prompt(prompt_instruction):
         str: The model's response.
     """
     try:
-        response = client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
-            messages=[
-                {"role": "user", "content": prompt_instruction}
-            ],
-            temperature=float(os.getenv("OPENAI_TEMPERATURE", 0.7)),
-            max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", 150))
-        )
-        return response.choices[0].message.content.strip()
+        return complete(user_message(prompt_instruction)).strip()
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+@semantic_cached("instruction_prompt")
+async def ainstruction_prompt(prompt_instruction):
+    """
+    Async variant of instruction_prompt() for running many requests concurrently.
+    """
+    try:
+        return (await acomplete(user_message(prompt_instruction))).strip()
     except Exception as e:
         return f"Error: {str(e)}"
 
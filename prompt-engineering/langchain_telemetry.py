@@ -0,0 +1,57 @@
+"""
+LangChain Telemetry
+A LangChain callback handler that records every chat model invocation made
+by a chain as a telemetry span, the same way llm_client records its calls.
+"""
+
+from langchain_core.callbacks import BaseCallbackHandler
+from telemetry import get_telemetry
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    # Record spans in the calling thread, also for async chains
+    run_inline = True
+
+    def __init__(self, telemetry=None, name=None):
+        """
+        Args:
+            telemetry (Telemetry): Where spans are recorded, defaults to the shared instance
+            name (str): Optional label written on every span, e.g. the chain name
+        """
+        self.telemetry = telemetry or get_telemetry()
+        self.name = name
+        self._spans = {}
+
+    def _start(self, run_id, kwargs):
+        params = kwargs.get("invocation_params") or {}
+        metadata = kwargs.get("metadata") or {}
+        model = params.get("model") or params.get("model_name") or metadata.get("ls_model_name")
+        self._spans[run_id] = self.telemetry.start_span("langchain", model, self.name)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, kwargs)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        span = self._spans.get(run_id)
+        if span is not None:
+            span.first_token()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        usage = (response.llm_output or {}).get("token_usage")
+        if not usage and response.generations and response.generations[0]:
+            message = getattr(response.generations[0][0], "message", None)
+            usage = getattr(message, "usage_metadata", None)
+        span.set_usage(usage)
+        self.telemetry.finish(span)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            span.set_error(error)
+            self.telemetry.finish(span)
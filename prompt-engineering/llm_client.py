@@ -0,0 +1,342 @@
+"""
+Shared OpenAI Client
+This module provides one pooled sync client and one pooled async client that
+every prompting script shares, so repeated calls reuse HTTP connections
+instead of opening a new one per script or per request.
+
+The openai and httpx packages are imported when the first client is created,
+not at import time, so scripts start quickly and `--help` costs nothing.
+"""
+
+import os
+from dotenv import load_dotenv
+from request_executor import RequestExecutor
+from response_cache import ResponseCache, request_key
+from telemetry import get_telemetry
+
+# Load environment variables from .env file
+load_dotenv()
+
+
+class Settings:
+    """Model and connection settings, read from the environment once at import."""
+
+    def __init__(self):
+        self.api_key = os.getenv("OPENAI_API_KEY")
+        self.base_url = os.getenv("OPENAI_BASE_URL") or None
+        self.model = os.getenv("OPENAI_MODEL", "gpt-4.1-nano-2025-04-14")
+        self.temperature = float(os.getenv("OPENAI_TEMPERATURE", 0.7))
+        self.max_tokens = int(os.getenv("OPENAI_MAX_TOKENS", 150))
+        self.timeout = float(os.getenv("OPENAI_TIMEOUT", 60))
+        self.max_connections = int(os.getenv("OPENAI_MAX_CONNECTIONS", 100))
+        self.max_keepalive_connections = int(os.getenv("OPENAI_MAX_KEEPALIVE", 20))
+        self.keepalive_expiry = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", 30))
+        self.max_retries = int(os.getenv("OPENAI_MAX_RETRIES", 5))
+        self.initial_concurrency = int(os.getenv("LLM_INITIAL_CONCURRENCY", 8))
+        self.max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", self.max_connections))
+        self.latency_target = float(os.getenv("LLM_LATENCY_TARGET", 0)) or None
+        hedge_after = os.getenv("LLM_HEDGE_AFTER", "")
+        self.hedge_after = hedge_after if hedge_after == "p95" else float(hedge_after or 0) or None
+        self.circuit_failures = int(os.getenv("LLM_CIRCUIT_FAILURES", 20))
+        self.circuit_cooldown = float(os.getenv("LLM_CIRCUIT_COOLDOWN", 30))
+        self.cache_path = os.getenv(
+            "LLM_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".llm_cache.sqlite")
+        )
+        self.cache_max_bytes = int(os.getenv("LLM_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+        self.cache_max_age = float(os.getenv("LLM_CACHE_MAX_AGE", 7 * 24 * 3600))
+        self.cache_bypass = os.getenv("LLM_CACHE_BYPASS", "0").lower() in ("1", "true", "yes")
+        self.semantic_cache_threshold = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.95))
+        # Per-function overrides, e.g. "retrieval_augmented_prompt=0.9"
+        self.semantic_cache_thresholds = {
+            name.strip(): float(value)
+            for name, value in (
+                item.split("=", 1) for item in os.getenv("SEMANTIC_CACHE_THRESHOLDS", "").split(",") if item.strip()
+            )
+        }
+        self.semantic_cache_max_entries = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 10000))
+        self.semantic_cache_bypass = os.getenv("SEMANTIC_CACHE_BYPASS", "0").lower() in ("1", "true", "yes")
+        self.embedding_model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+        self.embedding_cache_path = os.getenv(
+            "EMBEDDING_CACHE_PATH",
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), ".embedding_cache.sqlite"),
+        )
+
+
+settings = Settings()
+
+_client = None
+_async_client = None
+_cache = None
+_executor = None
+
+
+def _limits():
+    import httpx
+    return httpx.Limits(
+        max_connections=settings.max_connections,
+        max_keepalive_connections=settings.max_keepalive_connections,
+        keepalive_expiry=settings.keepalive_expiry,
+    )
+
+
+def get_client():
+    """
+    Return the shared synchronous OpenAI client, creating it on first use.
+
+    Returns:
+        OpenAI: A client backed by a keep-alive connection pool
+    """
+    global _client
+    if _client is None:
+        import httpx
+        from openai import OpenAI
+        _client = OpenAI(
+            api_key=settings.api_key,
+            base_url=settings.base_url,
+            timeout=settings.timeout,
+            # Retries happen in the request executor, which also adapts concurrency
+            max_retries=0,
+            http_client=httpx.Client(limits=_limits(), timeout=settings.timeout),
+        )
+    return _client
+
+
+def get_async_client():
+    """
+    Return the shared asynchronous OpenAI client, creating it on first use.
+
+    Returns:
+        AsyncOpenAI: A client backed by a keep-alive connection pool
+    """
+    global _async_client
+    if _async_client is None:
+        import httpx
+        from openai import AsyncOpenAI
+        _async_client = AsyncOpenAI(
+            api_key=settings.api_key,
+            base_url=settings.base_url,
+            timeout=settings.timeout,
+            max_retries=0,
+            http_client=httpx.AsyncClient(limits=_limits(), timeout=settings.timeout),
+        )
+    return _async_client
+
+
+def get_executor():
+    """
+    Return the shared request executor, creating it on first use.
+
+    Returns:
+        RequestExecutor: Retries, adaptive concurrency and circuit breaker
+                         configured by the OPENAI_MAX_RETRIES and LLM_* settings
+    """
+    global _executor
+    if _executor is None:
+        _executor = RequestExecutor(
+            max_retries=settings.max_retries,
+            initial_concurrency=settings.initial_concurrency,
+            max_concurrency=settings.max_concurrency,
+            latency_target=settings.latency_target,
+            hedge_after=settings.hedge_after,
+            failure_threshold=settings.circuit_failures,
+            cooldown=settings.circuit_cooldown,
+        )
+    return _executor
+
+
+def executor_stats():
+    """Return the concurrency limit, breaker state and retry counters of the shared executor."""
+    return get_executor().snapshot()
+
+
+def _counting_retries(span):
+    def on_retry(error):
+        span.retries += 1
+    return on_retry
+
+
+def _request(messages, model=None, temperature=None, max_tokens=None, stop=None):
+    params = {
+        "model": model or settings.model,
+        "messages": messages,
+        "temperature": settings.temperature if temperature is None else temperature,
+        "max_tokens": max_tokens or settings.max_tokens,
+    }
+    if stop is not None:
+        params["stop"] = stop
+    return params
+
+
+def get_cache():
+    """
+    Return the shared on-disk response cache, opening it on first use.
+
+    Returns:
+        ResponseCache: The cache configured by the LLM_CACHE_* settings
+    """
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(
+            settings.cache_path,
+            max_bytes=settings.cache_max_bytes,
+            max_age=settings.cache_max_age,
+        )
+    return _cache
+
+
+def cache_stats():
+    """Return hit/miss counters for the shared response cache."""
+    return get_cache().stats()
+
+
+def _cache_enabled(use_cache):
+    return use_cache and not settings.cache_bypass
+
+
+def complete(messages, model=None, temperature=None, max_tokens=None, stop=None, use_cache=True):
+    """
+    Send a chat completion request through the shared client.
+
+    Identical requests are answered from the response cache unless use_cache
+    is False or LLM_CACHE_BYPASS is set. Requests go through the shared
+    request executor, which retries transient failures and adapts
+    concurrency. Every call is recorded as a telemetry span.
+
+    Args:
+        messages (list): Chat messages in OpenAI format
+        model (str): Model name, defaults to OPENAI_MODEL
+        temperature (float): Sampling temperature, defaults to OPENAI_TEMPERATURE
+        max_tokens (int): Completion limit, defaults to OPENAI_MAX_TOKENS
+        stop (list): Optional stop sequences
+        use_cache (bool): Whether to read and write the response cache
+
+    Returns:
+        str: The content of the first choice
+    """
+    params = _request(messages, model, temperature, max_tokens, stop)
+    with get_telemetry().span("chat", params["model"]) as span:
+        if _cache_enabled(use_cache):
+            key = request_key(params)
+            cached = get_cache().get(key)
+            if cached is not None:
+                span.cache_hit = True
+                return cached
+        raw = get_executor().run(
+            lambda: get_client().chat.completions.with_raw_response.create(**params),
+            on_retry=_counting_retries(span),
+        )
+        response = raw.parse()
+        span.set_usage(response.usage)
+        content = response.choices[0].message.content
+        if _cache_enabled(use_cache):
+            get_cache().put(key, content)
+        return content
+
+
+async def acomplete(messages, model=None, temperature=None, max_tokens=None, stop=None, use_cache=True):
+    """
+    Async variant of complete() so many requests can be in flight at once.
+
+    Returns:
+        str: The content of the first choice
+    """
+    params = _request(messages, model, temperature, max_tokens, stop)
+    with get_telemetry().span("chat", params["model"]) as span:
+        if _cache_enabled(use_cache):
+            key = request_key(params)
+            cached = get_cache().get(key)
+            if cached is not None:
+                span.cache_hit = True
+                return cached
+        raw = await get_executor().arun(
+            lambda: get_async_client().chat.completions.with_raw_response.create(**params),
+            on_retry=_counting_retries(span),
+        )
+        response = raw.parse()
+        span.set_usage(response.usage)
+        content = response.choices[0].message.content
+        if _cache_enabled(use_cache):
+            get_cache().put(key, content)
+        return content
+
+
+def stream(messages, model=None, temperature=None, max_tokens=None, stop=None):
+    """
+    Stream a chat completion through the shared client.
+
+    Streaming responses bypass the response cache. The telemetry span
+    records the time to the first token and, when the API reports it, usage.
+
+    Args:
+        messages (list): Chat messages in OpenAI format
+        model (str): Model name, defaults to OPENAI_MODEL
+        temperature (float): Sampling temperature, defaults to OPENAI_TEMPERATURE
+        max_tokens (int): Completion limit, defaults to OPENAI_MAX_TOKENS
+        stop (list): Optional stop sequences
+
+    Yields:
+        str: Content deltas as they arrive
+    """
+    params = _request(messages, model, temperature, max_tokens, stop)
+    with get_telemetry().span("stream", params["model"]) as span:
+        # Retries cover opening the stream; a stream that fails midway is not replayed
+        raw = get_executor().run(
+            lambda: get_client().chat.completions.with_raw_response.create(
+                stream=True, stream_options={"include_usage": True}, **params
+            ),
+            on_retry=_counting_retries(span),
+        )
+        for chunk in raw.parse():
+            if chunk.usage is not None:
+                span.set_usage(chunk.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                span.first_token()
+                yield chunk.choices[0].delta.content
+
+
+def user_message(content):
+    """Wrap a single prompt string as a one-message chat history."""
+    return [{"role": "user", "content": content}]
+
+
+def embed(texts, model=None):
+    """
+    Embed a batch of texts in one request through the shared client.
+
+    Embeddings are not stored in the response cache; see embedding_pipeline
+    for batching, deduplication and the vector cache.
+
+    Args:
+        texts (list): Input strings, sent as a single request
+        model (str): Embedding model, defaults to OPENAI_EMBEDDING_MODEL
+
+    Returns:
+        list: One embedding (list of floats) per input, in input order
+    """
+    model = model or settings.embedding_model
+    with get_telemetry().span("embedding", model, inputs=len(texts)) as span:
+        raw = get_executor().run(
+            lambda: get_client().embeddings.with_raw_response.create(model=model, input=texts),
+            on_retry=_counting_retries(span),
+        )
+        response = raw.parse()
+        span.set_usage(response.usage)
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+async def aembed(texts, model=None):
+    """
+    Async variant of embed() so many batches can be in flight at once.
+
+    Returns:
+        list: One embedding (list of floats) per input, in input order
+    """
+    model = model or settings.embedding_model
+    with get_telemetry().span("embedding", model, inputs=len(texts)) as span:
+        raw = await get_executor().arun(
+            lambda: get_async_client().embeddings.with_raw_response.create(model=model, input=texts),
+            on_retry=_counting_retries(span),
+        )
+        response = raw.parse()
+        span.set_usage(response.usage)
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
@@ -0,0 +1,122 @@
+"""
+Prompt Templates
+Parses prompt templates once, checks their placeholders up front and renders
+them over whole tables of rows. A template with a typo in a placeholder, or
+a row missing a value, fails with a clear error before any request is sent
+rather than as a KeyError halfway through a job.
+"""
+
+import functools
+import string
+
+_FORMATTER = string.Formatter()
+
+
+class TemplateError(ValueError):
+    """Raised when a template is malformed or a row does not fill it."""
+
+
+class PromptTemplate:
+    def __init__(self, template, name=None):
+        """
+        Parse a str.format-style template and record its placeholders.
+
+        Args:
+            template (str): Template with named {placeholders}
+            name (str): Optional name used in error messages
+
+        Raises:
+            TemplateError: If the template cannot be parsed or uses positional fields
+        """
+        self.template = template
+        self.name = name or "template"
+        fields = []
+        try:
+            for _, field_name, format_spec, _ in _FORMATTER.parse(template):
+                if field_name is None:
+                    continue
+                # "{user.name}" and "{items[0]}" need the top-level value "user" / "items"
+                root = field_name.split(".", 1)[0].split("[", 1)[0]
+                if root == "" or root.isdigit():
+                    raise TemplateError(f"{self.name}: positional placeholder {{{field_name}}} is not supported")
+                if "{" in (format_spec or ""):
+                    raise TemplateError(f"{self.name}: nested placeholders in {{{field_name}:{format_spec}}} are not supported")
+                if root not in fields:
+                    fields.append(root)
+        except ValueError as e:
+            if isinstance(e, TemplateError):
+                raise
+            raise TemplateError(f"{self.name}: {e}") from e
+        self.fields = tuple(fields)
+
+    def missing(self, values):
+        """
+        Return the placeholders a mapping does not provide, in template order.
+
+        A None value counts as missing; CSV readers use it for the cells of a short row.
+        """
+        return [field for field in self.fields if values.get(field) is None]
+
+    def validate(self, names):
+        """
+        Check that a set of column names fills every placeholder.
+
+        Args:
+            names (iterable): Available value names, e.g. a CSV header
+
+        Raises:
+            TemplateError: If any placeholder has no matching name
+        """
+        missing = [field for field in self.fields if field not in set(names)]
+        if missing:
+            raise TemplateError(f"{self.name}: no value for {', '.join(missing)}")
+
+    def render(self, values=None, **kwargs):
+        """
+        Fill the template.
+
+        Args:
+            values (dict): Placeholder values; extra keys are ignored
+            **kwargs: More placeholder values
+
+        Returns:
+            str: The rendered prompt
+
+        Raises:
+            TemplateError: If a placeholder has no value
+        """
+        if kwargs:
+            values = dict(values or {}, **kwargs)
+        values = values or {}
+        missing = self.missing(values)
+        if missing:
+            raise TemplateError(f"{self.name}: no value for {', '.join(missing)}")
+        return self.template.format_map(values)
+
+    def render_rows(self, rows):
+        """
+        Render the template for each row of a table.
+
+        Rows are consumed lazily, so any size of input streams through.
+
+        Args:
+            rows (iterable): Dicts of placeholder values, such as CSV rows or
+                             DataFrame.to_dict("records")
+
+        Yields:
+            tuple: (row, prompt) pairs in input order
+
+        Raises:
+            TemplateError: If a row is missing a value, naming the row
+        """
+        for position, row in enumerate(rows):
+            missing = self.missing(row)
+            if missing:
+                raise TemplateError(f"{self.name}: row {position} has no value for {', '.join(missing)}")
+            yield row, self.template.format_map(row)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_template(template):
+    """Parse a template string once and reuse the result on later calls."""
+    return PromptTemplate(template)
@@ -0,0 +1,410 @@
+"""
+Request Executor
+Runs API requests with adaptive concurrency, retries and a circuit breaker,
+so bulk jobs settle just under the provider's limits without manual tuning.
+
+- Concurrency follows AIMD (additive increase, multiplicative decrease): the
+  in-flight limit grows by about one request per round of successes and is
+  cut back on 429s, timeouts or latency above an optional target. Until the
+  first overload it grows by one per success (slow start), so it reaches the
+  provider's limit quickly.
+- Retryable failures (429, 408, 409, 5xx, timeouts, connection errors) are
+  retried with jittered exponential backoff, waiting at least as long as the
+  server's Retry-After header asks.
+- Async requests can be hedged: if a request is slower than a fixed delay
+  or the recent p95 latency, a duplicate is sent and the first answer wins.
+- After many consecutive failures a circuit breaker rejects requests
+  immediately for a cooldown period, then lets one trial request through.
+  Only retryable failures count; a 400, 401 or 404 means the API is up.
+"""
+
+import asyncio
+import collections
+import random
+import threading
+import time
+
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit breaker is open."""
+
+
+def is_retryable(error):
+    """Whether a failed request is worth retrying."""
+    # Imported here so the executor can be created before the SDK is loaded
+    import httpx
+    import openai
+    if isinstance(error, (openai.APIConnectionError, httpx.TransportError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return status in RETRYABLE_STATUS or (status is not None and status >= 500)
+
+
+def is_overload(error):
+    """Whether a failure signals that the provider is saturated (429 or timeout)."""
+    import openai
+    if isinstance(error, (openai.RateLimitError, openai.APITimeoutError)):
+        return True
+    return getattr(error, "status_code", None) == 429
+
+
+def retry_after(error):
+    """
+    Return the delay the server asked for, in seconds, or None.
+
+    Reads the retry-after-ms and retry-after headers of an API error.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        # An HTTP date instead of seconds; fall back to our own backoff
+        return None
+    return None
+
+
+class AIMDLimit:
+    def __init__(self, initial=8, minimum=1, maximum=256, backoff=0.7, latency_target=None):
+        """
+        Additive-increase, multiplicative-decrease concurrency limit.
+
+        Args:
+            initial (int): Starting in-flight limit
+            minimum (int): Lowest limit
+            maximum (int): Highest limit
+            backoff (float): Factor applied to the limit on an overload signal
+            latency_target (float): Seconds; slower successes count as overload
+        """
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.latency_target = latency_target
+        self.slow_start = True
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self):
+        return max(self.minimum, int(self.limit))
+
+    def on_success(self, latency):
+        if self.latency_target is not None and latency > self.latency_target:
+            self.on_overload(latency)
+            return
+        with self._lock:
+            # Slow start doubles the limit per window; afterwards +1 per window
+            step = 1.0 if self.slow_start else 1.0 / max(self.limit, 1.0)
+            self.limit = min(self.maximum, self.limit + step)
+
+    def on_overload(self, latency=None):
+        now = time.monotonic()
+        with self._lock:
+            # Many in-flight requests fail together on one overload; cut back once per round trip
+            if now - self._last_decrease < max(latency or 0.0, 0.1):
+                return
+            self._last_decrease = now
+            self.slow_start = False
+            self.limit = max(self.minimum, self.limit * self.backoff)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=20, cooldown=30.0):
+        """
+        Args:
+            failure_threshold (int): Consecutive failed requests that open the circuit
+            cooldown (float): Seconds the circuit stays open before a trial request
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "open" if time.monotonic() - self.opened_at < self.cooldown else "half-open"
+
+    def before_request(self):
+        """
+        Admit a request or raise CircuitOpenError.
+
+        Returns:
+            bool: True if the request is the half-open trial; its caller must
+                  call release_trial() when it ends without on_success() or
+                  on_failure(), such as on cancellation
+        """
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half-open" and self._trial_in_flight):
+                raise CircuitOpenError(
+                    f"Circuit open after {self.failures} consecutive failures; "
+                    f"requests are rejected for up to {self.cooldown:g}s"
+                )
+            if state == "half-open":
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def on_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def on_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Let another request be the trial; the circuit stays as it is."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class RequestExecutor:
+    def __init__(self, max_retries=5, base_delay=0.5, max_delay=30.0, initial_concurrency=8,
+                 max_concurrency=256, latency_target=None, hedge_after=None,
+                 failure_threshold=20, cooldown=30.0):
+        """
+        Adaptive executor shared by the sync and async request paths.
+
+        Args:
+            max_retries (int): Retries after the first attempt
+            base_delay (float): First backoff delay in seconds, doubled per retry
+            max_delay (float): Upper bound of a backoff delay
+            initial_concurrency (int): Starting in-flight limit
+            max_concurrency (int): Highest in-flight limit
+            latency_target (float): Seconds; slower responses reduce concurrency
+            hedge_after (float or str): Seconds before an async request is hedged,
+                "p95" to use the recent 95th percentile latency, or None for no hedging
+            failure_threshold (int): Consecutive failures that open the circuit breaker
+            cooldown (float): Seconds the circuit breaker stays open
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_after = hedge_after
+        self.limit = AIMDLimit(initial_concurrency, maximum=max_concurrency, latency_target=latency_target)
+        self.breaker = CircuitBreaker(failure_threshold, cooldown)
+        self.latencies = collections.deque(maxlen=200)
+        self.stats = {"requests": 0, "retries": 0, "hedges": 0, "failures": 0, "rejected": 0}
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._async_in_flight = 0
+        self._async_waiters = collections.deque()
+
+    def _backoff(self, attempt, error):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        requested = retry_after(error)
+        if requested is not None:
+            delay = max(delay, min(requested, self.max_delay * 2))
+        return delay
+
+    def _record(self, started, error=None):
+        latency = time.monotonic() - started
+        if error is None:
+            self.latencies.append(latency)
+            self.limit.on_success(latency)
+        elif is_overload(error):
+            self.limit.on_overload(latency)
+
+    def _hedge_delay(self):
+        if self.hedge_after == "p95":
+            if len(self.latencies) < 20:
+                return None
+            ordered = sorted(self.latencies)
+            return ordered[int(len(ordered) * 0.95) - 1]
+        return self.hedge_after
+
+    # Sync path
+
+    def _acquire(self):
+        with self._condition:
+            while self._in_flight >= self.limit.value:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def _release(self):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def run(self, func, on_retry=None):
+        """
+        Call func() with retries, adaptive concurrency and the circuit breaker.
+
+        Args:
+            func (callable): Sends one request and returns its result
+            on_retry (callable): Called with the error before every retry
+
+        Returns:
+            The result of the first successful call
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+            Exception: The last error once retries are exhausted or it is not retryable
+        """
+        trial = self._check_breaker()
+        try:
+            for attempt in range(self.max_retries + 1):
+                self._acquire()
+                started = time.monotonic()
+                try:
+                    result = func()
+                except Exception as e:
+                    self._record(started, e)
+                    if attempt == self.max_retries or not is_retryable(e):
+                        self._fail(e)
+                        raise
+                    error = e
+                else:
+                    self._record(started)
+                    self._succeed()
+                    return result
+                finally:
+                    self._release()
+                self._retry(error, on_retry)
+                time.sleep(self._backoff(attempt, error))
+        finally:
+            if trial:
+                self.breaker.release_trial()
+
+    # Async path
+
+    async def _aacquire(self):
+        while self._async_in_flight >= self.limit.value:
+            waiter = asyncio.get_running_loop().create_future()
+            self._async_waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._async_waiters:
+                    self._async_waiters.remove(waiter)
+        self._async_in_flight += 1
+
+    def _arelease(self):
+        self._async_in_flight -= 1
+        # Wake as many waiters as the (possibly grown) limit allows
+        free = self.limit.value - self._async_in_flight
+        while free > 0 and self._async_waiters:
+            waiter = self._async_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    async def _attempt(self, func):
+        await self._aacquire()
+        started = time.monotonic()
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._record(started, e)
+            raise
+        else:
+            self._record(started)
+            return result
+        finally:
+            self._arelease()
+
+    async def _hedged(self, func):
+        delay = self._hedge_delay()
+        if delay is None:
+            return await self._attempt(func)
+        pending = {asyncio.ensure_future(self._attempt(func))}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                self.stats["hedges"] += 1
+                pending.add(asyncio.ensure_future(self._attempt(func)))
+            error = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # The losing attempt, or both if the caller was cancelled
+            for task in pending:
+                task.cancel()
+
+    async def arun(self, func, on_retry=None):
+        """
+        Async variant of run(); func is an async callable.
+
+        Slow attempts are hedged when hedge_after is set.
+        """
+        trial = self._check_breaker()
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    result = await self._hedged(func)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    if attempt == self.max_retries or not is_retryable(e):
+                        self._fail(e)
+                        raise
+                    error = e
+                else:
+                    self._succeed()
+                    return result
+                self._retry(error, on_retry)
+                await asyncio.sleep(self._backoff(attempt, error))
+        finally:
+            # A cancelled or rejected trial must not keep the circuit half-open forever
+            if trial:
+                self.breaker.release_trial()
+
+    # Shared bookkeeping
+
+    def _check_breaker(self):
+        try:
+            trial = self.breaker.before_request()
+        except CircuitOpenError:
+            self.stats["rejected"] += 1
+            raise
+        self.stats["requests"] += 1
+        return trial
+
+    def _retry(self, error, on_retry):
+        self.stats["retries"] += 1
+        if on_retry is not None:
+            on_retry(error)
+
+    def _succeed(self):
+        self.breaker.on_success()
+
+    def _fail(self, error):
+        self.stats["failures"] += 1
+        # A rejected request (400, 401, 404, ...) says nothing about the API's health
+        if is_retryable(error):
+            self.breaker.on_failure()
+
+    def snapshot(self):
+        """Current limit, in-flight counts, breaker state and counters."""
+        return {
+            "concurrency_limit": self.limit.value,
+            "in_flight": self._in_flight + self._async_in_flight,
+            "circuit": self.breaker.state,
+            **self.stats,
+        }
@@ -0,0 +1,165 @@
+"""
+Response Cache
+A persistent, content-addressed cache for chat completions backed by SQLite.
+Requests are keyed on a hash of the full payload (model, messages,
+temperature, max_tokens, stop), so an identical request is answered from
+disk without calling the API. Entries are evicted least-recently-used once
+the cache exceeds its size limit, and expire after a maximum age.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+def request_key(payload):
+    """
+    Build the cache key for a request payload.
+
+    Args:
+        payload (dict): The request parameters sent to the API
+
+    Returns:
+        str: A SHA-256 hex digest of the canonical JSON payload
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, max_age=7 * 24 * 3600):
+        """
+        Open (or create) a response cache.
+
+        Args:
+            path (str): SQLite database file
+            max_bytes (int): Total size of cached responses before LRU eviction
+            max_age (float): Seconds after which an entry is treated as stale
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    def get(self, key):
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): Key returned by request_key()
+
+        Returns:
+            str: The cached response, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, size, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, size, created = row
+            if now - created > self.max_age:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Store a response and evict old entries if the cache is over its limits.
+
+        Args:
+            key (str): Key returned by request_key()
+            value (str): The response content
+        """
+        if value is None:
+            return
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            row = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._total_bytes -= row[0]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._total_bytes += size
+            if self._total_bytes > self.max_bytes:
+                self._evict(now)
+
+    def _evict(self, now):
+        # Drop expired entries first, then the least recently used until under the limit
+        cutoff = now - self.max_age
+        count, size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses WHERE created < ?", (cutoff,)
+        ).fetchone()
+        if count:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (cutoff,))
+            self._total_bytes -= size
+            self.evictions += count
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self.evictions += 1
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._total_bytes = 0
+
+    def stats(self):
+        """
+        Report cache counters for sizing.
+
+        Returns:
+            dict: hits, misses, hit_rate, evictions, entries and bytes
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": self._total_bytes,
+        }
@@ -4,42 +4,108 @@ This script demonstrates retrieval-augmented prompting using OpenAI's API.
 Retrieval-augmented prompting supplements the prompt with relevant external information to improve the model's response.
 """
 
+import argparse
 import os
-from openai import OpenAI
-from dotenv import load_dotenv
+from llm_client import complete, acomplete, user_message
+from semantic_cache import semantic_cached
 
-# Load environment variables from .env file
-load_dotenv()
+# Markdown guides in this repository, used as the default corpus
+DEFAULT_CORPUS = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", name)
+    for name in ("GUIDE.md", "study_guide.md", "README.md")
+]
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+def _cache_prompt(prompt_with_context, index=None, k=3):
+    if index is None:
+        return prompt_with_context
+    # The retrieved context depends on the indexed chunks, the vectorizer and k,
+    # so only calls against the same index contents can share a response
+    return (f"index {index.fingerprint()} ({type(index.vectorizer).__name__}), k={k}: "
+            f"{prompt_with_context}")
 
-def retrieval_augmented_prompt(prompt_with_context):
+def _cache_question(prompt_with_context, index=None, k=3):
+    # A bare question can be matched semantically; a prompt with its context already filled in cannot
+    return prompt_with_context if index is not None else None
+
+def build_rag_prompt(index, question, k=3):
+    """
+    Retrieve the chunks most relevant to a question and build a prompt from them.
+    Args:
+        index (VectorIndex): Index to retrieve from.
+        question (str): The user's question.
+        k (int): Number of chunks to include.
+    Returns:
+        str: The prompt including retrieved context and the question.
+    """
+    hits = index.search(question, k)
+    context = "\n\n".join(
+        f"[{i}] ({os.path.basename(hit['source'] or 'unknown')}) {hit['text']}" for i, hit in enumerate(hits, start=1)
+    )
+    return f"Answer the question using the context below.\n\nContext:\n{context}\n\nQuestion: {question}"
+
+@semantic_cached("retrieval_augmented_prompt", prompt_of=_cache_prompt, variable_of=_cache_question)
+def retrieval_augmented_prompt(prompt_with_context, index=None, k=3):
     """
     Send a retrieval-augmented prompt to OpenAI's API and get a response.
     Args:
-        prompt_with_context (str): The prompt including retrieved context and the query.
+        prompt_with_context (str): The prompt including retrieved context and the query,
+            or just the question when an index is given.
+        index (VectorIndex): Optional index to retrieve the context from.
+        k (int): Number of chunks to retrieve when an index is given.
     Returns:
         str: The model's response.
     """
+    if index is not None:
+        prompt_with_context = build_rag_prompt(index, prompt_with_context, k)
+    try:
+        return complete(user_message(prompt_with_context)).strip()
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+@semantic_cached("retrieval_augmented_prompt", prompt_of=_cache_prompt, variable_of=_cache_question)
+async def aretrieval_augmented_prompt(prompt_with_context, index=None, k=3):
+    """
+    Async variant of retrieval_augmented_prompt() for running many requests concurrently.
+    """
+    if index is not None:
+        prompt_with_context = build_rag_prompt(index, prompt_with_context, k)
     try:
-        response = client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
-            messages=[
-                {"role": "user", "content": prompt_with_context}
-            ],
-            temperature=float(os.getenv("OPENAI_TEMPERATURE", 0.7)),
-            max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", 200))
-        )
-        return response.choices[0].message.content.strip()
+        return (await acomplete(user_message(prompt_with_context))).strip()
     except Exception as e:
         return f"Error: {str(e)}"
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retrieval-augmented prompting over a local corpus")
+    parser.add_argument("--corpus", nargs="+", default=DEFAULT_CORPUS, help="Files or directories to index")
+    parser.add_argument("--question", default="What is prompt engineering and why does it matter?")
+    parser.add_argument("-k", type=int, default=3, help="Number of chunks to retrieve")
+    parser.add_argument("--store", help="Vector store directory; built from --corpus on first use, then opened instantly")
+    parser.add_argument("--add", nargs="+", help="Files or directories to append to an existing --store")
+    parser.add_argument("--embeddings", action="store_true",
+                        help="Use OpenAI embeddings instead of the local hashing vectorizer")
+    parser.add_argument("--ivf", action="store_true",
+                        help="Search an approximate IVF index instead of scanning every chunk")
+    args = parser.parse_args(argv)
+
+    # Imported here so --help does not load NumPy and tiktoken
+    from embedding_pipeline import Embedder
+    from vector_index import build_index
+    from vector_store import VectorStore, build_store
+
     print("Example: Retrieval-Augmented Prompting")
-    retrieved_context = "Wikipedia: The mitochondrion is the powerhouse of the cell."
-    question = "What is the function of mitochondria in a cell?"
-    prompt = f"{retrieved_context}\nQuestion: {question}"
+    vectorizer = Embedder() if args.embeddings else None
+    if args.store is None:
+        index = build_index(args.corpus, vectorizer)
+    elif args.add:
+        index = build_store(args.add, args.store, vectorizer)
+    elif os.path.exists(os.path.join(args.store, "meta.json")):
+        index = VectorStore(args.store, vectorizer)
+    else:
+        index = build_store(args.corpus, args.store, vectorizer)
+    print(f"Indexed {len(index)} chunks")
+    if args.ivf:
+        index.build_ivf()
+    prompt = build_rag_prompt(index, args.question, args.k)
     response = retrieval_augmented_prompt(prompt)
     print(f"Prompt: {prompt}")
     print(f"Model's Response: {response}\n")
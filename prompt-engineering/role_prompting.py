@@ -4,16 +4,11 @@ This script demonstrates role-based prompting using OpenAI's API.
 Role prompting assigns a specific persona or role to the model to guide its responses.
 """
 
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+import argparse
+from llm_client import complete, acomplete, user_message
+from semantic_cache import semantic_cached
 
+@semantic_cached("role_prompt")
 def role_prompt(prompt_with_role):
     """
     Send a role-based prompt to OpenAI's API and get a response.
@@ -23,21 +18,28 @@ def role_prompt(prompt_with_role):
         str: The model's response.
     """
     try:
-        response = client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
-            messages=[
-                {"role": "user", "content": prompt_with_role}
-            ],
-            temperature=float(os.getenv("OPENAI_TEMPERATURE", 0.7)),
-            max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", 150))
-        )
-        return response.choices[0].message.content.strip()
+        return complete(user_message(prompt_with_role)).strip()
     except Exception as e:
         return f"Error: {str(e)}"
 
-def main():
+@semantic_cached("role_prompt")
+async def arole_prompt(prompt_with_role):
+    """
+    Async variant of role_prompt() for running many requests concurrently.
+    """
+    try:
+        return (await acomplete(user_message(prompt_with_role))).strip()
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Role-based prompting")
+    parser.add_argument("--prompt", default="You are a professional chef. Explain how to make a perfect omelette.",
+                        help="Prompt that gives the model a role")
+    args = parser.parse_args(argv)
+
     print("Example: Role-Based Prompting")
-    prompt = "You are a professional chef. Explain how to make a perfect omelette."
+    prompt = args.prompt
     response = role_prompt(prompt)
     print(f"Prompt: {prompt}")
     print(f"Model's Response: {response}\n")
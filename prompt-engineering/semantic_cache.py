@@ -0,0 +1,295 @@
+"""
+Semantic Cache
+An in-memory cache that answers prompts which are near-duplicates of ones
+already seen. Every prompt function gets hits for the same text with
+different whitespace, casing or Unicode forms. A function can also opt in
+to semantic matching by naming the part of its prompt that varies between
+calls, such as the question: a call then reuses the response of an earlier
+one whose prompt differs only in that part, and only if the two parts are
+close enough. The parts are compared as hashed words and word pairs, so
+word order and negation ("not good" vs "good") change the vector.
+
+The exact response cache in llm_client still handles byte-identical
+requests; this layer sits in front of the *_prompt functions.
+"""
+
+import functools
+import inspect
+import re
+import threading
+import unicodedata
+from llm_client import settings
+
+WHITESPACE_RE = re.compile(r"\s+")
+# Same tokens as vector_index.TOKEN_RE, which is not imported until the cache is created
+WORD_RE = re.compile(r"\w+")
+
+
+def normalize_prompt(text):
+    """Canonicalize a prompt: Unicode NFKC, case-folded, whitespace collapsed."""
+    return WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text).casefold()).strip()
+
+
+def ordered_terms(text):
+    """
+    Turn text into its words followed by its adjacent word pairs.
+
+    The pairs are joined with "_" so the hashing vectorizer treats each as
+    one term; they make "not good" and "good" different vectors.
+    """
+    words = WORD_RE.findall(text)
+    return " ".join(words + [f"{first}_{second}" for first, second in zip(words, words[1:])])
+
+
+class SemanticCache:
+    def __init__(self, threshold=0.95, thresholds=None, max_entries=10000, dim=512):
+        """
+        Create an empty semantic cache.
+
+        Args:
+            threshold (float): Default minimum cosine similarity for a semantic hit
+            thresholds (dict): Per-namespace thresholds overriding the default
+            max_entries (int): Entries kept before least-recently-used eviction
+            dim (int): Vector dimensions
+        """
+        # Imported here so decorating the prompt functions does not load NumPy
+        import numpy as np
+        from vector_index import HashingVectorizer
+        self.threshold = threshold
+        self.thresholds = dict(thresholds or {})
+        self.max_entries = max_entries
+        # Unfitted, so every prompt is vectorized the same way as the cache grows
+        self.vectorizer = HashingVectorizer(dim)
+        self.vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        # Entries can only match semantically within a group: the same
+        # namespace and the same prompt outside its variable part
+        self.group_ids = np.full(max_entries, -1, dtype=np.int32)
+        self.last_used = np.zeros(max_entries, dtype=np.int64)
+        self.keys = [None] * max_entries
+        self.responses = [None] * max_entries
+        self.size = 0
+        self.evictions = 0
+        self._slots = {}
+        self._groups = {}
+        self._counters = {}
+        self._clock = 0
+        self._lock = threading.Lock()
+
+    def _counters_for(self, namespace):
+        if namespace not in self._counters:
+            self._counters[namespace] = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+        return self._counters[namespace]
+
+    def _group_key(self, namespace, normalized, variable):
+        if variable is None:
+            return None
+        return namespace, normalized.replace(normalize_prompt(variable), "\0", 1)
+
+    def _variable_vector(self, variable):
+        return self.vectorizer.transform([ordered_terms(normalize_prompt(variable))])[0]
+
+    def _touch(self, slot):
+        self._clock += 1
+        self.last_used[slot] = self._clock
+
+    def lookup(self, namespace, prompt, variable=None):
+        """
+        Find a cached response for a prompt or a near-duplicate of it.
+
+        Args:
+            namespace (str): The prompt function the prompt belongs to
+            prompt (str): The prompt text
+            variable (str): The part of the prompt that varies between calls;
+                without it only the normalized prompt is matched
+
+        Returns:
+            str: The cached response, or None on a miss
+        """
+        normalized = normalize_prompt(prompt)
+        with self._lock:
+            counters = self._counters_for(namespace)
+            slot = self._slots.get((namespace, normalized))
+            if slot is not None:
+                counters["exact_hits"] += 1
+                self._touch(slot)
+                return self.responses[slot]
+            threshold = self.thresholds.get(namespace, self.threshold)
+            group_id = self._groups.get(self._group_key(namespace, normalized, variable), -1)
+            if self.size and group_id >= 0 and threshold < 1.0:
+                query = self._variable_vector(variable)
+                scores = self.vectors[:self.size] @ query
+                scores[self.group_ids[:self.size] != group_id] = -1.0
+                best = int(scores.argmax())
+                if scores[best] >= threshold:
+                    counters["semantic_hits"] += 1
+                    self._touch(best)
+                    return self.responses[best]
+            counters["misses"] += 1
+            return None
+
+    def store(self, namespace, prompt, response, variable=None):
+        """
+        Cache a response, evicting the least recently used entry when full.
+
+        Args:
+            namespace (str): The prompt function the prompt belongs to
+            prompt (str): The prompt text
+            response (str): The model's response
+            variable (str): The part of the prompt that varies between calls,
+                as passed to lookup()
+        """
+        normalized = normalize_prompt(prompt)
+        vector = self._variable_vector(variable) if variable is not None else 0.0
+        with self._lock:
+            key = (namespace, normalized)
+            slot = self._slots.get(key)
+            if slot is None:
+                if self.size < self.max_entries:
+                    slot = self.size
+                    self.size += 1
+                else:
+                    slot = int(self.last_used.argmin())
+                    del self._slots[self.keys[slot]]
+                    self.evictions += 1
+                self._slots[key] = slot
+                self.keys[slot] = key
+                self.vectors[slot] = vector
+                self._counters_for(namespace)
+                group = self._group_key(namespace, normalized, variable)
+                self.group_ids[slot] = -1 if group is None else self._groups.setdefault(group, len(self._groups))
+            self.responses[slot] = response
+            self._touch(slot)
+
+    def clear(self):
+        """Remove every cached entry; counters are kept."""
+        with self._lock:
+            self._slots.clear()
+            self.keys = [None] * self.max_entries
+            self.responses = [None] * self.max_entries
+            self.group_ids[:] = -1
+            self._groups.clear()
+            self.last_used[:] = 0
+            self.size = 0
+
+    def stats(self):
+        """
+        Report hit-rate counters.
+
+        Returns:
+            dict: Overall hits, misses, hit_rate, evictions and entries, plus
+                  per-namespace exact_hits, semantic_hits, misses and hit_rate
+        """
+        with self._lock:
+            namespaces = {}
+            for namespace, counters in self._counters.items():
+                hits = counters["exact_hits"] + counters["semantic_hits"]
+                lookups = hits + counters["misses"]
+                namespaces[namespace] = dict(counters, hit_rate=hits / lookups if lookups else 0.0)
+            hits = sum(c["exact_hits"] + c["semantic_hits"] for c in self._counters.values())
+            misses = sum(c["misses"] for c in self._counters.values())
+            return {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "evictions": self.evictions,
+                "entries": self.size,
+                "namespaces": namespaces,
+            }
+
+
+_cache = None
+
+
+def get_semantic_cache():
+    """
+    Return the shared semantic cache, creating it on first use.
+
+    Returns:
+        SemanticCache: The cache configured by the SEMANTIC_CACHE_* settings
+    """
+    global _cache
+    if _cache is None:
+        _cache = SemanticCache(
+            threshold=settings.semantic_cache_threshold,
+            thresholds=settings.semantic_cache_thresholds,
+            max_entries=settings.semantic_cache_max_entries,
+        )
+    return _cache
+
+
+def semantic_cache_stats():
+    """Return hit-rate counters for the shared semantic cache."""
+    return get_semantic_cache().stats()
+
+
+def _enabled():
+    return not (settings.semantic_cache_bypass or settings.cache_bypass)
+
+
+def _cacheable(response):
+    return response is not None and not response.startswith("Error:")
+
+
+def semantic_cached(namespace, prompt_of=None, variable_of=None):
+    """
+    Put the shared semantic cache in front of a prompt function.
+
+    Works on both sync and async functions. Error responses are not cached.
+    Calls match when their normalized prompts are identical; semantic
+    matching is opt-in through variable_of.
+
+    Args:
+        namespace (str): Cache namespace, normally the sync function's name
+        prompt_of (callable): Maps the call's arguments to the prompt text; by
+            default the first argument. Returning None skips the cache.
+        variable_of (callable): Maps the call's arguments to the part of the
+            prompt that varies between calls, such as the user's question.
+            Calls whose prompts are otherwise the same then match when these
+            parts are at least the namespace's threshold similar.
+
+    Returns:
+        callable: A decorator
+    """
+    def prompt_for(args, kwargs):
+        if prompt_of is not None:
+            return prompt_of(*args, **kwargs)
+        return args[0] if args else None
+
+    def variable_for(args, kwargs):
+        return variable_of(*args, **kwargs) if variable_of is not None else None
+
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                prompt = prompt_for(args, kwargs) if _enabled() else None
+                if prompt is None:
+                    return await func(*args, **kwargs)
+                cache = get_semantic_cache()
+                variable = variable_for(args, kwargs)
+                cached = cache.lookup(namespace, prompt, variable)
+                if cached is not None:
+                    return cached
+                response = await func(*args, **kwargs)
+                if _cacheable(response):
+                    cache.store(namespace, prompt, response, variable)
+                return response
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            prompt = prompt_for(args, kwargs) if _enabled() else None
+            if prompt is None:
+                return func(*args, **kwargs)
+            cache = get_semantic_cache()
+            variable = variable_for(args, kwargs)
+            cached = cache.lookup(namespace, prompt, variable)
+            if cached is not None:
+                return cached
+            response = func(*args, **kwargs)
+            if _cacheable(response):
+                cache.store(namespace, prompt, response, variable)
+            return response
+        return wrapper
+
+    return decorate
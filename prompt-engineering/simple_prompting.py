@@ -3,16 +3,10 @@ Simple Prompting Example with OpenAI
 This script demonstrates basic prompt engineering concepts using OpenAI's API.
 """
 
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from llm_client import complete, acomplete, user_message
+from semantic_cache import semantic_cached
 
+@semantic_cached("basic_prompt")
 def basic_prompt(prompt_text):
     """
     Send a simple prompt to OpenAI's API and get a response.
@@ -24,15 +18,17 @@ def basic_prompt(prompt_text):
         str: The model's response
     """
     try:
-        response = client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-4.1-nano-2025-04-14"),
-            messages=[
-                {"role": "user", "content": prompt_text}
-            ],
-            temperature=float(os.getenv("OPENAI_TEMPERATURE", 0.7)),
-            max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", 150)),
-        )
-        return response.choices[0].message.content
+        return complete(user_message(prompt_text))
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+@semantic_cached("basic_prompt")
+async def abasic_prompt(prompt_text):
+    """
+    Async variant of basic_prompt() for running many requests concurrently.
+    """
+    try:
+        return await acomplete(user_message(prompt_text))
     except Exception as e:
         return f"Error: {str(e)}"
 
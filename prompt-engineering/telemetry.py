@@ -0,0 +1,311 @@
+"""
+LLM Telemetry
+Records one span per model call: wall time, time to first token, prompt,
+completion and cached tokens, estimated cost, retries taken by the request
+executor and the error class of failed calls. Spans update in-process counters and
+latency histograms, and are written as JSONL traces when LLM_TRACE_PATH is
+set, so slow or expensive calls can be found after a run.
+
+This module has no third-party dependencies so that the crew-ai example can
+use it as well as llm_client.
+"""
+
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+
+# USD per million tokens: (input, cached input, output), matched by model-name prefix
+PRICES = {
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "text-embedding-3-small": (0.02, 0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.13, 0.0),
+}
+
+# Histogram bucket upper bounds in milliseconds
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+def _price(model):
+    if not model:
+        return None
+    model = model.split("/")[-1]
+    matches = [prefix for prefix in PRICES if model.startswith(prefix)]
+    return PRICES[max(matches, key=len)] if matches else None
+
+
+def estimate_cost(model, prompt_tokens=0, completion_tokens=0, cached_tokens=0):
+    """
+    Estimate the USD cost of a call from its token counts.
+
+    Args:
+        model (str): Model name, with or without a date suffix
+        prompt_tokens (int): Input tokens, including cached ones
+        completion_tokens (int): Output tokens
+        cached_tokens (int): Input tokens served from the provider's prompt cache
+
+    Returns:
+        float: Estimated cost, or None for models without a known price or
+               calls without reported usage
+    """
+    price = _price(model)
+    if price is None or (prompt_tokens is None and completion_tokens is None):
+        return None
+    input_price, cached_price, output_price = price
+    uncached = max(0, (prompt_tokens or 0) - (cached_tokens or 0))
+    return (uncached * input_price + (cached_tokens or 0) * cached_price
+            + (completion_tokens or 0) * output_price) / 1_000_000
+
+
+class Histogram:
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        """
+        Fixed-bucket histogram.
+
+        Args:
+            bounds (tuple): Ascending bucket upper bounds
+        """
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of observations."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+            "buckets": dict(zip([*map(str, self.bounds), "inf"], self.counts)),
+        }
+
+
+def _field(source, name):
+    if source is None:
+        return None
+    if isinstance(source, dict):
+        return source.get(name)
+    return getattr(source, name, None)
+
+
+class Span:
+    def __init__(self, kind, model=None, name=None, started=None, **attributes):
+        """
+        Timing and usage of one model call.
+
+        Args:
+            kind (str): Call type, e.g. "chat", "stream", "embedding", "langchain", "crew_task"
+            model (str): Model name
+            name (str): Optional caller-defined label
+            started (float): time.perf_counter() start; now when omitted
+            **attributes: Extra fields written to the trace
+        """
+        self.kind = kind
+        self.model = model
+        self.name = name
+        self.started = time.perf_counter() if started is None else started
+        self.timestamp = time.time() - (time.perf_counter() - self.started)
+        self.latency = None
+        self.ttft = None
+        self.prompt_tokens = None
+        self.completion_tokens = None
+        self.cached_tokens = None
+        self.retries = 0
+        self.error = None
+        self.cache_hit = False
+        self.attributes = attributes
+
+    def first_token(self):
+        """Mark the arrival of the first streamed token."""
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.started
+
+    def set_usage(self, usage):
+        """
+        Copy token counts from an OpenAI usage object or an equivalent dict.
+
+        Args:
+            usage: Object or dict with prompt_tokens / completion_tokens (or
+                   input_tokens / output_tokens) and optional cached-token details
+        """
+        if usage is None:
+            return
+        self.prompt_tokens = _field(usage, "prompt_tokens") or _field(usage, "input_tokens")
+        self.completion_tokens = _field(usage, "completion_tokens") or _field(usage, "output_tokens")
+        details = _field(usage, "prompt_tokens_details") or _field(usage, "input_token_details")
+        self.cached_tokens = (_field(usage, "cached_tokens") or _field(details, "cached_tokens")
+                              or _field(details, "cache_read") or 0)
+
+    def set_error(self, error):
+        """Record the class of the exception that ended the call."""
+        self.error = type(error).__name__
+        status = getattr(error, "status_code", None)
+        if status is not None:
+            self.attributes["status_code"] = status
+
+    @property
+    def cost(self):
+        if self.cache_hit:
+            return 0.0
+        return estimate_cost(self.model, self.prompt_tokens, self.completion_tokens, self.cached_tokens)
+
+    def to_dict(self):
+        return {
+            "timestamp": round(self.timestamp, 6),
+            "kind": self.kind,
+            "name": self.name,
+            "model": self.model,
+            "latency_ms": None if self.latency is None else round(self.latency * 1000, 3),
+            "ttft_ms": None if self.ttft is None else round(self.ttft * 1000, 3),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cost_usd": self.cost,
+            "retries": self.retries,
+            "cache_hit": self.cache_hit,
+            "error": self.error,
+            **self.attributes,
+        }
+
+
+class Telemetry:
+    def __init__(self, trace_path=None):
+        """
+        Collects spans into counters and histograms and optionally a JSONL trace.
+
+        Args:
+            trace_path (str): File that every finished span is appended to as one JSON line
+        """
+        self.trace_path = trace_path
+        self._trace = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear all counters and histograms."""
+        with self._lock:
+            self.counters = {
+                "calls": 0, "errors": 0, "cache_hits": 0, "retries": 0,
+                "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "cost_usd": 0.0,
+            }
+            self.errors_by_class = {}
+            self.calls_by_kind = {}
+            self.latency_ms = {}
+            self.ttft_ms = {}
+
+    def start_span(self, kind, model=None, name=None, started=None, **attributes):
+        """Start a span that is later passed to finish()."""
+        return Span(kind, model, name, started, **attributes)
+
+    def finish(self, span):
+        """Record a finished span in the counters, histograms and trace."""
+        span.latency = time.perf_counter() - span.started
+        record = span.to_dict()
+        with self._lock:
+            counters = self.counters
+            counters["calls"] += 1
+            counters["retries"] += span.retries or 0
+            counters["cache_hits"] += span.cache_hit
+            for field in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+                counters[field] += record[field] or 0
+            counters["cost_usd"] += record["cost_usd"] or 0.0
+            if span.error:
+                counters["errors"] += 1
+                self.errors_by_class[span.error] = self.errors_by_class.get(span.error, 0) + 1
+            self.calls_by_kind[span.kind] = self.calls_by_kind.get(span.kind, 0) + 1
+            if not span.cache_hit:
+                self.latency_ms.setdefault(span.kind, Histogram()).observe(record["latency_ms"])
+                if record["ttft_ms"] is not None:
+                    self.ttft_ms.setdefault(span.kind, Histogram()).observe(record["ttft_ms"])
+            if self.trace_path:
+                if self._trace is None:
+                    self._trace = open(self.trace_path, "a", encoding="utf-8", buffering=1)
+                self._trace.write(json.dumps(record) + "\n")
+
+    @contextlib.contextmanager
+    def span(self, kind, model=None, name=None, **attributes):
+        """
+        Time a block of code as one call.
+
+        The span is yielded so the block can add usage, retries or the first
+        token time. An exception is recorded by class and re-raised.
+        """
+        span = self.start_span(kind, model, name, **attributes)
+        try:
+            yield span
+        except Exception as e:
+            span.set_error(e)
+            raise
+        finally:
+            self.finish(span)
+
+    def snapshot(self):
+        """
+        Report the counters and histograms.
+
+        Returns:
+            dict: Totals, errors by class, calls by kind and latency / TTFT
+                  histograms per kind, in milliseconds
+        """
+        with self._lock:
+            return {
+                **self.counters,
+                "errors_by_class": dict(self.errors_by_class),
+                "calls_by_kind": dict(self.calls_by_kind),
+                "latency_ms": {kind: h.snapshot() for kind, h in self.latency_ms.items()},
+                "ttft_ms": {kind: h.snapshot() for kind, h in self.ttft_ms.items()},
+            }
+
+    def close(self):
+        with self._lock:
+            if self._trace is not None:
+                self._trace.close()
+                self._trace = None
+
+
+_telemetry = None
+
+
+def get_telemetry():
+    """
+    Return the shared Telemetry instance, creating it on first use.
+
+    Returns:
+        Telemetry: Tracing to LLM_TRACE_PATH when that variable is set
+    """
+    global _telemetry
+    if _telemetry is None:
+        _telemetry = Telemetry(os.getenv("LLM_TRACE_PATH") or None)
+    return _telemetry
+
+
+def telemetry_snapshot():
+    """Return the shared counters and histograms."""
+    return get_telemetry().snapshot()
@@ -4,42 +4,157 @@ This script demonstrates template-based prompting using OpenAI's API.
 Template prompting uses a reusable prompt structure with placeholders for dynamic content.
 """
 
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
+import argparse
+import asyncio
+import json
+from llm_client import complete, acomplete, user_message
+from semantic_cache import semantic_cached
+from batching import RateLimiter, ordered_map, read_rows, with_ids, last_completed_id, pending_records
+from prompt_templates import PromptTemplate, TemplateError, compile_template
 
-# Load environment variables from .env file
-load_dotenv()
+TRANSLATION_TEMPLATE = "Translate the following {source_language} sentence to {target_language}: {sentence}"
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+def _compiled(prompt_template):
+    if isinstance(prompt_template, PromptTemplate):
+        return prompt_template
+    return compile_template(prompt_template)
+
+@semantic_cached("template_prompt")
+def _send_prompt(prompt_filled):
+    try:
+        return complete(user_message(prompt_filled)).strip()
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+@semantic_cached("template_prompt")
+async def _asend_prompt(prompt_filled):
+    # Raises on failure, so bulk runs can tell a failed request from an answer that starts with "Error:"
+    return (await acomplete(user_message(prompt_filled))).strip()
 
 def template_prompt(prompt_template, **kwargs):
     """
     Send a template-based prompt to OpenAI's API and get a response.
     Args:
-        prompt_template (str): The prompt template with placeholders.
+        prompt_template (str or PromptTemplate): The prompt template with placeholders.
         **kwargs: Values to fill in the template.
     Returns:
         str: The model's response.
+    Raises:
+        TemplateError: If a placeholder has no value; raised before any request is sent.
+    """
+    return _send_prompt(_compiled(prompt_template).render(kwargs))
+
+async def atemplate_prompt(prompt_template, **kwargs):
     """
-    prompt_filled = prompt_template.format(**kwargs)
+    Async variant of template_prompt() for running many requests concurrently.
+    """
+    prompt_filled = _compiled(prompt_template).render(kwargs)
     try:
-        response = client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
-            messages=[
-                {"role": "user", "content": prompt_filled}
-            ],
-            temperature=float(os.getenv("OPENAI_TEMPERATURE", 0.7)),
-            max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", 150)),
-        )
-        return response.choices[0].message.content.strip()
+        return await _asend_prompt(prompt_filled)
     except Exception as e:
         return f"Error: {str(e)}"
 
-def main():
+def read_records(input_path, defaults=None):
+    """
+    Stream rows of placeholder values from a JSONL or CSV file.
+
+    Args:
+        input_path (str): JSONL or CSV file; rows may carry an "id"
+        defaults (dict): Values used for placeholders a row does not set,
+                         including CSV cells left empty by a short row
+
+    Yields:
+        dict: The row's values over the defaults, with a string "id";
+              rows without one are numbered by position
+    """
+    for record_id, row in with_ids(read_rows(input_path)):
+        record = dict(defaults or {})
+        record.update((name, value) for name, value in row.items() if value is not None)
+        record["id"] = record_id
+        yield record
+
+async def render_file(prompt_template, input_path, output_path, concurrency=16, requests_per_minute=None, defaults=None):
+    """
+    Render a template for every row of a file and stream the responses to JSONL.
+
+    Every row is checked against the template in a first pass over the file,
+    before any request is sent, so a row missing a value cannot stop a job
+    halfway. Responses are written in input order, one line per row, so
+    memory stays flat and a rerun resumes after the last completed ID. Every
+    line has a "status": a failed request is written with status "error" and
+    retried by the next run, which appends its new result; the last line for
+    an ID is the current one.
+
+    Args:
+        prompt_template (str or PromptTemplate): The prompt template with placeholders.
+        input_path (str): JSONL or CSV file with one row of values per prompt; rows may carry an "id".
+        output_path (str): JSONL file to append results to.
+        concurrency (int): Maximum number of requests in flight.
+        requests_per_minute (float): Optional request rate limit.
+        defaults (dict): Values used for placeholders a row does not set.
+    Returns:
+        int: Number of rows processed in this run.
+    Raises:
+        TemplateError: If any row does not fill the template, naming the first such row.
+        ValueError: If the output was written for a different input, so the
+            last completed ID does not appear in it.
+    """
+    template = _compiled(prompt_template)
+    resume_after = last_completed_id(output_path)
+    rows, resume_found = 0, resume_after is None
+    for position, record in enumerate(read_records(input_path, defaults)):
+        missing = template.missing(record)
+        if missing:
+            raise TemplateError(f"{template.name}: row {position} (id {record['id']!r}) "
+                                f"has no value for {', '.join(missing)}")
+        resume_found = resume_found or record["id"] == resume_after
+        rows += 1
+    if not rows:
+        return 0
+    if not resume_found:
+        raise ValueError(f"Cannot resume: last completed ID {resume_after!r} in {output_path} "
+                         f"is not in {input_path}")
+    records = pending_records(read_records(input_path, defaults), output_path, resume_after)
+
+    async def run(item):
+        # render_rows() has already filled the template; send that prompt as is
+        try:
+            return "ok", await _asend_prompt(item[1])
+        except Exception as e:
+            return "error", f"Error: {str(e)}"
+
+    limiter = RateLimiter(requests_per_minute) if requests_per_minute else None
+    count = 0
+    with open(output_path, "a", encoding="utf-8") as out:
+        async for (row, _), (status, response) in ordered_map(run, template.render_rows(records), concurrency, limiter):
+            if status == "error":
+                result = {"id": row["id"], "status": status, "error": response}
+            else:
+                result = {"id": row["id"], "status": status, "response": response}
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            count += 1
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Template-based prompting")
+    parser.add_argument("--template", default=TRANSLATION_TEMPLATE, help="Prompt template with {placeholders}")
+    parser.add_argument("--input", help="JSONL or CSV file of placeholder values to render in bulk")
+    parser.add_argument("--output", default="template_results.jsonl", help="JSONL results file")
+    parser.add_argument("--set", nargs="*", default=[], metavar="NAME=VALUE",
+                        help="Values shared by every row, e.g. target_language=Spanish")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight")
+    parser.add_argument("--rpm", type=float, help="Requests-per-minute limit")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        defaults = dict(item.split("=", 1) for item in args.set)
+        count = asyncio.run(render_file(args.template, args.input, args.output, args.concurrency, args.rpm, defaults))
+        print(f"Processed {count} rows. Results saved to {args.output}")
+        return
+
     print("Example: Template-Based Prompting")
-    template = "Translate the following {source_language} sentence to {target_language}: {sentence}"
+    template = args.template
     response = template_prompt(template, source_language="English", target_language="Spanish", sentence="How are you?")
     print(f"Prompt Template: {template}")
     print(f"Model's Response: {response}\n")
@@ -0,0 +1,87 @@
+"""
+Token Counting Helpers
+Count tokens the way OpenAI models do, using tiktoken. When the tokenizer
+files cannot be loaded (for example on an offline machine) the counts fall
+back to a characters-per-token estimate so callers keep working.
+"""
+
+import functools
+
+# Tokens the chat format adds around every message
+MESSAGE_OVERHEAD = 4
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(model=None):
+    """
+    Return the tiktoken encoding for a model, or None if it cannot be loaded.
+
+    Args:
+        model (str): Model name; unknown models use o200k_base
+
+    Returns:
+        tiktoken.Encoding: The encoding, or None when unavailable
+    """
+    # Imported on first use so CLI commands that never count tokens start quickly
+    import tiktoken
+    try:
+        try:
+            return tiktoken.encoding_for_model(model or "")
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text, model=None):
+    """
+    Count the tokens in a piece of text.
+
+    Args:
+        text (str): The text to measure
+        model (str): Model whose tokenizer to use
+
+    Returns:
+        int: Number of tokens
+    """
+    if not text:
+        return 0
+    encoding = get_encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(message, model=None):
+    """
+    Count the tokens a chat message contributes to a request.
+
+    Args:
+        message (dict): A message with "role" and "content"
+        model (str): Model whose tokenizer to use
+
+    Returns:
+        int: Number of tokens including per-message overhead
+    """
+    return count_tokens(message.get("content") or "", model) + MESSAGE_OVERHEAD
+
+
+def truncate_to_tokens(text, max_tokens, model=None):
+    """
+    Cut text down to at most max_tokens tokens.
+
+    Args:
+        text (str): The text to shorten
+        max_tokens (int): Token limit
+        model (str): Model whose tokenizer to use
+
+    Returns:
+        str: The (possibly) shortened text
+    """
+    encoding = get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
@@ -0,0 +1,355 @@
+"""
+Local Vector Index
+Chunks a document corpus, turns the chunks into vectors and answers top-k
+similarity queries with vectorized cosine similarity in NumPy.
+
+Vectors come from a hashed TF-IDF vectorizer by default, which needs no
+model calls, or from any embedder with the same transform(texts) interface.
+For large corpora an inverted-file (IVF) index narrows each query to a few
+clusters, so a query scans a fraction of the vectors instead of all of them.
+"""
+
+import hashlib
+import json
+import os
+import re
+import zlib
+import numpy as np
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def chunk_text(text, chunk_words=150, overlap_words=30):
+    """
+    Split text into overlapping chunks of roughly chunk_words words.
+
+    Paragraph breaks are preferred as chunk boundaries.
+
+    Args:
+        text (str): The document text
+        chunk_words (int): Target words per chunk
+        overlap_words (int): Words repeated at the start of the next chunk
+
+    Returns:
+        list: Chunk strings
+
+    Raises:
+        ValueError: If chunk_words is not positive or overlap_words is not
+            smaller than chunk_words, which would never advance
+    """
+    if chunk_words <= 0:
+        raise ValueError(f"chunk_words must be positive, got {chunk_words}")
+    if not 0 <= overlap_words < chunk_words:
+        raise ValueError(f"overlap_words must be between 0 and chunk_words - 1, got {overlap_words}")
+    chunks = []
+    current = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        words = paragraph.split()
+        while words:
+            room = chunk_words - len(current)
+            current.extend(words[:room])
+            words = words[room:]
+            if len(current) >= chunk_words:
+                chunks.append(" ".join(current))
+                current = current[-overlap_words:] if overlap_words else []
+    if current and (not chunks or len(current) > overlap_words):
+        chunks.append(" ".join(current))
+    return chunks
+
+
+class HashingVectorizer:
+    def __init__(self, dim=512):
+        """
+        Hashed TF-IDF vectorizer producing dense, L2-normalized float32 rows.
+
+        Words are hashed into dim signed buckets with a stable hash, so the
+        same text always maps to the same vector in every process.
+
+        Args:
+            dim (int): Number of hash buckets (vector dimensions)
+        """
+        self.dim = dim
+        self.idf = np.ones(dim, dtype=np.float32)
+        self._buckets = {}
+
+    def _bucket(self, word):
+        bucket = self._buckets.get(word)
+        if bucket is None:
+            h = zlib.crc32(word.encode("utf-8"))
+            # Low bits pick the bucket, one high bit picks the sign
+            bucket = (h % self.dim, 1.0 if h & 0x80000000 else -1.0)
+            self._buckets[word] = bucket
+        return bucket
+
+    def _term_frequencies(self, texts):
+        rows, cols, values = [], [], []
+        for row, text in enumerate(texts):
+            counts = {}
+            for word in TOKEN_RE.findall(text.lower()):
+                bucket, sign = self._bucket(word)
+                counts[bucket] = counts.get(bucket, 0.0) + sign
+            for bucket, count in counts.items():
+                if count:
+                    rows.append(row)
+                    cols.append(bucket)
+                    # Sublinear term frequency, keeping the hash sign
+                    values.append(np.sign(count) * (1.0 + np.log(abs(count))))
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if rows:
+            np.add.at(matrix, (np.array(rows), np.array(cols)), np.array(values, dtype=np.float32))
+        return matrix
+
+    def fit(self, texts):
+        """
+        Learn inverse document frequencies from a corpus.
+
+        Args:
+            texts (list): Chunk strings
+
+        Returns:
+            HashingVectorizer: self
+        """
+        tf = self._term_frequencies(texts)
+        df = np.count_nonzero(tf, axis=0)
+        self.idf = (np.log((1.0 + len(texts)) / (1.0 + df)) + 1.0).astype(np.float32)
+        return self
+
+    def transform(self, texts):
+        """
+        Vectorize texts with the learned IDF weights.
+
+        Args:
+            texts (list): Strings to vectorize
+
+        Returns:
+            np.ndarray: float32 matrix with one L2-normalized row per text
+        """
+        matrix = self._term_frequencies(texts) * self.idf
+        return normalize_rows(matrix)
+
+
+def normalize_rows(matrix):
+    """L2-normalize each row so dot products are cosine similarities."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k(scores, k):
+    """Return the indices of the k highest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+class IVFIndex:
+    def __init__(self, vectors, nlist=None, nprobe=8, iterations=10, sample_size=50000, seed=0):
+        """
+        Inverted-file index: vectors are clustered with spherical k-means and
+        each query only scans the nprobe clusters closest to it.
+
+        The index keeps only the cluster of every row, as a permutation of
+        row IDs grouped by cluster, and reads the rows from the vectors it was
+        built over, so a memory-mapped matrix is not copied into RAM.
+
+        Args:
+            vectors (np.ndarray): L2-normalized float32 rows to index
+            nlist (int): Number of clusters, defaults to sqrt(len(vectors))
+            nprobe (int): Clusters scanned per query
+            iterations (int): k-means iterations
+            sample_size (int): Rows used to train the centroids
+            seed (int): Random seed for reproducible clustering
+        """
+        count = len(vectors)
+        self.nlist = max(1, min(nlist or int(np.sqrt(count)), count))
+        self.nprobe = nprobe
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(count, size=min(sample_size, count), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=self.nlist, replace=False)]
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            counts = np.bincount(assignment, minlength=self.nlist)
+            order = np.argsort(assignment, kind="stable")
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            sums = centroids.copy()
+            filled = counts > 0
+            sums[filled] = np.add.reduceat(sample[order], starts[filled], axis=0)
+            centroids = normalize_rows(sums)
+        self.centroids = centroids
+
+        assignment = np.empty(count, dtype=np.int64)
+        for start in range(0, count, 65536):
+            assignment[start:start + 65536] = np.argmax(vectors[start:start + 65536] @ centroids.T, axis=1)
+        self.vectors = vectors
+        self.ids = np.argsort(assignment, kind="stable")
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(assignment, minlength=self.nlist))))
+
+    def search(self, query, k):
+        """
+        Find approximate nearest neighbours of a normalized query vector.
+
+        Returns:
+            tuple: (ids, scores) arrays, best first
+        """
+        probes = top_k(self.centroids @ query, self.nprobe)
+        ids = np.concatenate([self.ids[self.offsets[p]:self.offsets[p + 1]] for p in probes])
+        # Sorting the probed row IDs keeps reads from a memory-mapped matrix sequential
+        ids.sort()
+        scores = self.vectors[ids] @ query
+        best = top_k(scores, k)
+        return ids[best], scores[best]
+
+
+class VectorIndex:
+    def __init__(self, vectorizer=None):
+        """
+        An in-memory vector index over text chunks.
+
+        Args:
+            vectorizer: Object with transform(texts) returning normalized rows;
+                        defaults to a HashingVectorizer
+        """
+        self.vectorizer = vectorizer or HashingVectorizer()
+        self.chunks = []
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.ivf = None
+        self._digest = hashlib.sha256()
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def fingerprint(self):
+        """
+        Hash of the indexed chunks' texts and sources, in order.
+
+        Two indexes with the same fingerprint retrieve the same context, so
+        it can key cached answers; it changes whenever chunks are added.
+
+        Returns:
+            str: Hex digest
+        """
+        return self._digest.hexdigest()
+
+    def add(self, texts, sources=None):
+        """
+        Vectorize and add chunks to the index.
+
+        Args:
+            texts (list): Chunk strings
+            sources (list): Optional source label per chunk
+        """
+        if not texts:
+            return
+        sources = sources or [None] * len(texts)
+        vectors = self.vectorizer.transform(texts)
+        self.vectors = vectors if not len(self.chunks) else np.vstack([self.vectors, vectors])
+        for text, source in zip(texts, sources):
+            self.chunks.append({"text": text, "source": source})
+            self._digest.update((json.dumps([text, source], ensure_ascii=False) + "\n").encode("utf-8"))
+
+    def build_ivf(self, nlist=None, nprobe=8):
+        """
+        Build an approximate IVF index over the current vectors.
+
+        Chunks added later are still found: they are scanned exactly until the
+        IVF index is rebuilt.
+        """
+        self.ivf = IVFIndex(self.vectors, nlist=nlist, nprobe=nprobe)
+
+    def search(self, query, k=3):
+        """
+        Return the k chunks most similar to a query.
+
+        Args:
+            query (str): The query text
+            k (int): Number of results
+
+        Returns:
+            list: Dicts with "text", "source" and "score", best first
+        """
+        if not self.chunks:
+            return []
+        vector = self.vectorizer.transform([query])[0]
+        if self.ivf is None:
+            ids = top_k(self.vectors @ vector, k)
+            scores = self.vectors[ids] @ vector
+        else:
+            ids, scores = self.ivf.search(vector, k)
+            indexed = len(self.ivf.ids)
+            if indexed < len(self.vectors):
+                tail_scores = self.vectors[indexed:] @ vector
+                ids = np.concatenate([ids, np.arange(indexed, len(self.vectors))])
+                scores = np.concatenate([scores, tail_scores])
+                best = top_k(scores, k)
+                ids, scores = ids[best], scores[best]
+        return [dict(self.chunks[i], score=float(s)) for i, s in zip(ids, scores)]
+
+
+def read_corpus(paths, extensions=(".txt", ".md")):
+    """
+    Read documents from files and directories.
+
+    Args:
+        paths (list): Files or directories to read
+        extensions (tuple): File extensions to include from directories
+
+    Yields:
+        tuple: (path, text) per document
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.lower().endswith(extensions):
+                        full_path = os.path.join(root, name)
+                        with open(full_path, "r", encoding="utf-8", errors="replace") as file:
+                            yield full_path, file.read()
+        else:
+            with open(path, "r", encoding="utf-8", errors="replace") as file:
+                yield path, file.read()
+
+
+def corpus_chunks(paths, chunk_words=150, overlap_words=30):
+    """
+    Read and chunk a document corpus.
+
+    Args:
+        paths (list): Files or directories to read
+        chunk_words (int): Target words per chunk
+        overlap_words (int): Overlap between consecutive chunks
+
+    Returns:
+        tuple: (texts, sources) lists, one entry per chunk
+    """
+    texts, sources = [], []
+    for path, text in read_corpus(paths):
+        for chunk in chunk_text(text, chunk_words, overlap_words):
+            texts.append(chunk)
+            sources.append(path)
+    return texts, sources
+
+
+def build_index(paths, vectorizer=None, chunk_words=150, overlap_words=30):
+    """
+    Chunk and index a document corpus.
+
+    A HashingVectorizer is fitted on the corpus when no vectorizer is given.
+
+    Args:
+        paths (list): Files or directories to index
+        vectorizer: Optional vectorizer or embedder with transform(texts)
+        chunk_words (int): Target words per chunk
+        overlap_words (int): Overlap between consecutive chunks
+
+    Returns:
+        VectorIndex: The populated index
+    """
+    texts, sources = corpus_chunks(paths, chunk_words, overlap_words)
+    if vectorizer is None:
+        vectorizer = HashingVectorizer().fit(texts)
+    index = VectorIndex(vectorizer)
+    index.add(texts, sources)
+    return index
@@ -0,0 +1,201 @@
+"""
+Memory-Mapped Vector Store
+Persists a vector index on disk in an append-only binary format so that
+short-lived processes can open it almost instantly instead of rebuilding it.
+
+A store is a directory holding:
+    vectors.f32  - fixed-width float32 rows, one per chunk
+    chunks.jsonl - chunk metadata ({"text", "source"}), one JSON line per chunk
+    offsets.u64  - uint64 byte offsets into chunks.jsonl; row i spans
+                   offsets[i]:offsets[i + 1], so there is one more offset than rows
+    meta.json    - vector dimension and the fitted vectorizer state
+
+Vectors and offsets are opened with numpy.memmap in read-only mode, so the
+operating system's page cache shares them across every worker process that
+opens the same store. New documents are appended without rewriting existing
+data; the offsets file is written last and acts as the commit point, so a
+crash mid-append leaves the store readable at its previous size.
+
+A store has a single writer; any number of processes may read it.
+"""
+
+import json
+import os
+import numpy as np
+from vector_index import HashingVectorizer, VectorIndex, corpus_chunks
+
+VECTORS_NAME = "vectors.f32"
+CHUNKS_NAME = "chunks.jsonl"
+OFFSETS_NAME = "offsets.u64"
+META_NAME = "meta.json"
+
+
+class MappedChunks:
+    def __init__(self, chunks_path, offsets):
+        """
+        Read-only sequence of chunk metadata, decoded from disk on access.
+
+        Args:
+            chunks_path (str): Path to chunks.jsonl
+            offsets (np.ndarray): Byte offsets, one more than the number of chunks
+        """
+        self.offsets = offsets
+        self._data = np.memmap(chunks_path, dtype=np.uint8, mode="r") if offsets[-1] else b""
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return json.loads(bytes(self._data[start:end]))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class VectorStore(VectorIndex):
+    def __init__(self, path, vectorizer=None):
+        """
+        Open (or create) a memory-mapped vector store.
+
+        The vectorizer is restored from the store when it was saved with a
+        HashingVectorizer; other embedders must be passed in on every open.
+
+        Args:
+            path (str): Store directory
+            vectorizer: Vectorizer or embedder with transform(texts); required
+                        when creating a store or when the store cannot restore its own
+        """
+        self.path = path
+        meta_path = os.path.join(path, META_NAME)
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as file:
+                self.meta = json.load(file)
+            if vectorizer is None and "idf" in self.meta:
+                vectorizer = HashingVectorizer(self.meta["dim"])
+                vectorizer.idf = np.array(self.meta["idf"], dtype=np.float32)
+        elif vectorizer is None:
+            raise ValueError(f"No vector store at {path}; pass a vectorizer to create one")
+        else:
+            self.meta = None
+        if vectorizer is None:
+            raise ValueError(f"The vector store at {path} needs its embedder passed in")
+        super().__init__(vectorizer)
+        # Bytes of chunks.jsonl already fed to the fingerprint digest
+        self._hashed_bytes = 0
+        self._map()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _map(self):
+        """Memory-map the committed part of the store."""
+        if self.meta is None:
+            self.vectors = np.zeros((0, 0), dtype=np.float32)
+            self.chunks = []
+            return
+        offsets = np.fromfile(self._file(OFFSETS_NAME), dtype=np.uint64)
+        count = len(offsets) - 1
+        if count:
+            self.vectors = np.memmap(self._file(VECTORS_NAME), dtype=np.float32, mode="r",
+                                     shape=(count, self.meta["dim"]))
+        else:
+            self.vectors = np.zeros((0, self.meta["dim"]), dtype=np.float32)
+        self.chunks = MappedChunks(self._file(CHUNKS_NAME), offsets)
+
+    def _create(self, dim):
+        os.makedirs(self.path, exist_ok=True)
+        self.meta = {"dim": dim}
+        if isinstance(self.vectorizer, HashingVectorizer):
+            self.meta["idf"] = self.vectorizer.idf.tolist()
+        for name in (VECTORS_NAME, CHUNKS_NAME):
+            open(self._file(name), "wb").close()
+        np.zeros(1, dtype=np.uint64).tofile(self._file(OFFSETS_NAME))
+        # meta.json last: its presence marks a complete, empty store
+        with open(self._file(META_NAME), "w", encoding="utf-8") as file:
+            json.dump(self.meta, file)
+
+    def add(self, texts, sources=None):
+        """
+        Vectorize chunks and append them to the store.
+
+        Args:
+            texts (list): Chunk strings
+            sources (list): Optional source label per chunk
+        """
+        if not texts:
+            return
+        sources = sources or [None] * len(texts)
+        vectors = np.ascontiguousarray(self.vectorizer.transform(texts), dtype=np.float32)
+        if self.meta is None:
+            self._create(vectors.shape[1])
+        elif vectors.shape[1] != self.meta["dim"]:
+            raise ValueError(f"Expected {self.meta['dim']}-dimensional vectors, got {vectors.shape[1]}")
+
+        offsets = np.fromfile(self._file(OFFSETS_NAME), dtype=np.uint64)
+        count, end = len(offsets) - 1, int(offsets[-1])
+        lines = [
+            (json.dumps({"text": text, "source": source}, ensure_ascii=False) + "\n").encode("utf-8")
+            for text, source in zip(texts, sources)
+        ]
+        new_offsets = end + np.cumsum([len(line) for line in lines], dtype=np.uint64)
+
+        # Drop anything left behind by an interrupted append before writing past it
+        with open(self._file(VECTORS_NAME), "r+b") as file:
+            file.truncate(count * self.meta["dim"] * 4)
+            file.seek(0, os.SEEK_END)
+            file.write(vectors.tobytes())
+        with open(self._file(CHUNKS_NAME), "r+b") as file:
+            file.truncate(end)
+            file.seek(0, os.SEEK_END)
+            file.write(b"".join(lines))
+        with open(self._file(OFFSETS_NAME), "ab") as file:
+            file.write(new_offsets.astype(np.uint64).tobytes())
+        self._map()
+
+    def fingerprint(self):
+        """
+        Hash of the committed chunks.jsonl bytes.
+
+        The file is append-only, so only bytes committed since the last call
+        are read.
+
+        Returns:
+            str: Hex digest
+        """
+        end = int(self.chunks.offsets[-1]) if len(self.chunks) else 0
+        if end > self._hashed_bytes:
+            self._digest.update(self.chunks._data[self._hashed_bytes:end])
+            self._hashed_bytes = end
+        return self._digest.hexdigest()
+
+    def refresh(self):
+        """Re-map the store to pick up chunks appended by another process."""
+        self._map()
+
+
+def build_store(paths, store_path, vectorizer=None, chunk_words=150, overlap_words=30):
+    """
+    Chunk a document corpus and append it to a vector store.
+
+    A new store gets a HashingVectorizer fitted on this corpus unless a
+    vectorizer is given; an existing store keeps the vectorizer it was created
+    with, so appended documents land in the same vector space.
+
+    Args:
+        paths (list): Files or directories to index
+        store_path (str): Store directory
+        vectorizer: Optional vectorizer or embedder with transform(texts)
+        chunk_words (int): Target words per chunk
+        overlap_words (int): Overlap between consecutive chunks
+
+    Returns:
+        VectorStore: The store, with the new chunks appended
+    """
+    texts, sources = corpus_chunks(paths, chunk_words, overlap_words)
+    if vectorizer is None and not os.path.exists(os.path.join(store_path, META_NAME)):
+        vectorizer = HashingVectorizer().fit(texts)
+    store = VectorStore(store_path, vectorizer)
+    store.add(texts, sources)
+    return store
@@ -5,16 +5,16 @@ Zero-shot prompting means the model is asked to perform a task
 without any prior examples of how to do it.
 """
 
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
+import argparse
+import asyncio
+import json
+from llm_client import complete, acomplete, user_message
+from semantic_cache import semantic_cached
+from batching import RateLimiter, ordered_map, read_rows, with_ids, last_completed_id, pending_records
 
-# Load environment variables from .env file
-load_dotenv()
-
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+SENTIMENT_PROMPT = "Classify the sentiment of the following text: '{text}'\nSentiment:"
 
+@semantic_cached("zero_shot_prompt")
 def zero_shot_prompt(prompt_text):
     """
     Send a zero-shot prompt to OpenAI's API and get a response.
@@ -26,29 +26,111 @@ def zero_shot_prompt(prompt_text):
         str: The model's response.
     """
     try:
-        response = client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
-            messages=[
-                {"role": "user", "content": prompt_text}
-            ],
-            temperature=float(os.getenv("OPENAI_TEMPERATURE", 0.7)),
-            max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", 150)),
-        )
-        return response.choices[0].message.content
+        return complete(user_message(prompt_text))
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+@semantic_cached("zero_shot_prompt")
+async def _azero_shot_request(prompt_text):
+    # Raises on failure, so bulk runs can tell a failed request from an answer that starts with "Error:"
+    return await acomplete(user_message(prompt_text))
+
+async def azero_shot_prompt(prompt_text):
+    """
+    Async variant of zero_shot_prompt() for running many requests concurrently.
+    """
+    try:
+        return await _azero_shot_request(prompt_text)
     except Exception as e:
         return f"Error: {str(e)}"
 
-def main():
+def read_texts(input_path):
+    """
+    Stream records to classify from a JSONL or CSV file.
+
+    JSONL lines and CSV rows need a "text" field and may carry an "id";
+    records without one are numbered by position.
+
+    Args:
+        input_path (str): Path to a .jsonl or .csv file
+
+    Yields:
+        dict: Records with "id" and "text" keys
+    """
+    for record_id, row in with_ids(read_rows(input_path)):
+        yield {"id": record_id, "text": row["text"]}
+
+async def classify_file(input_path, output_path, concurrency=16, requests_per_minute=None):
+    """
+    Classify every text in a file concurrently and stream results to JSONL.
+
+    Results are written in input order, one line per record, so memory stays
+    flat and a rerun resumes after the last completed ID. Every line has a
+    "status": a failed request is written with status "error" and retried by
+    the next run, which appends its new result; the last line for an ID is the
+    current one.
+
+    Args:
+        input_path (str): JSONL or CSV file with "id" and "text" fields
+        output_path (str): JSONL file to append results to
+        concurrency (int): Maximum number of requests in flight
+        requests_per_minute (float): Optional request rate limit
+
+    Returns:
+        int: Number of records classified in this run
+
+    Raises:
+        ValueError: If the output was written for a different input, so the
+            last completed ID does not appear in it
+    """
+    resume_after = last_completed_id(output_path)
+    if resume_after is not None and not any(record["id"] == resume_after for record in read_texts(input_path)):
+        raise ValueError(f"Cannot resume: last completed ID {resume_after!r} in {output_path} "
+                         f"is not in {input_path}")
+    records = pending_records(read_texts(input_path), output_path, resume_after)
+
+    async def classify(record):
+        try:
+            return "ok", (await _azero_shot_request(SENTIMENT_PROMPT.format(text=record["text"])) or "").strip()
+        except Exception as e:
+            return "error", f"Error: {str(e)}"
+
+    limiter = RateLimiter(requests_per_minute) if requests_per_minute else None
+    count = 0
+    with open(output_path, "a", encoding="utf-8") as out:
+        async for record, (status, response) in ordered_map(classify, records, concurrency, limiter):
+            if status == "error":
+                result = {"id": record["id"], "status": status, "error": response}
+            else:
+                result = {"id": record["id"], "status": status, "sentiment": response}
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            count += 1
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Zero-shot sentiment classification")
+    parser.add_argument("--input", help="JSONL or CSV file of texts to classify in bulk")
+    parser.add_argument("--output", default="sentiment_results.jsonl", help="JSONL results file")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight")
+    parser.add_argument("--rpm", type=float, help="Requests-per-minute limit")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        count = asyncio.run(classify_file(args.input, args.output, args.concurrency, args.rpm))
+        print(f"Classified {count} texts. Results saved to {args.output}")
+        return
+
     # Example: Sentiment analysis without examples
     print("Example: Zero-Shot Sentiment Analysis")
     text_to_analyze = "I absolutely loved the movie! It was fantastic."
-    prompt = f"Classify the sentiment of the following text: '{text_to_analyze}'\nSentiment:"
+    prompt = SENTIMENT_PROMPT.format(text=text_to_analyze)
     response = zero_shot_prompt(prompt)
     print(f"Text: {text_to_analyze}")
     print(f"Response: {response}\n")
     
     text_to_analyze_2 = "The weather today is quite gloomy and dull."
-    prompt_2 = f"Classify the sentiment of the following text: '{text_to_analyze_2}'\nSentiment:"
+    prompt_2 = SENTIMENT_PROMPT.format(text=text_to_analyze_2)
     response_2 = zero_shot_prompt(prompt_2)
     print(f"Text: {text_to_analyze_2}")
     print(f"Response: {response_2}\n")